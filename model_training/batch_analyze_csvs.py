@@ -6,10 +6,13 @@ and generates Excel reports with comprehensive metrics.
 
 import os
 import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 import joblib
-from feature_extractor import extract_features
+from feature_extractor import FEATURE_ORDER, features_from_dataframe, read_timeline_csv
 
 
 def get_grade(score):
@@ -24,16 +27,101 @@ def get_grade(score):
         return "Poor"
 
 
-def process_csv_files(csv_folder, category, model, scaler, output_excel_dir):
+def analyze_csv(csv_path):
+    """
+    Read one timeline CSV (once) and compute its model features.
+    
+    Returns:
+        (filename, features dict or None, duration_seconds, error message or None)
+    """
+    filename = os.path.basename(csv_path)
+    try:
+        df = read_timeline_csv(csv_path)
+        features = features_from_dataframe(df)
+        duration_seconds = float(df['time_s'].iloc[-1]) if len(df) > 0 else 0.0
+        return filename, features, duration_seconds, None
+    except Exception as e:
+        return filename, None, 0.0, str(e)
+
+
+def extract_all(csv_files, workers=None):
+    """Run analyze_csv over all files in a process pool (input order kept)."""
+    workers = max(1, min(workers or os.cpu_count() or 1, len(csv_files)))
+    if workers == 1:
+        return [analyze_csv(path) for path in csv_files]
+    # Small per-file work: hand out chunks so IPC does not dominate
+    chunksize = max(1, len(csv_files) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(analyze_csv, csv_files, chunksize=chunksize))
+
+
+def score_features(features, model, scaler):
+    """Form scores (0-100) for a DataFrame of features: one transform, one predict."""
+    X_scaled = scaler.transform(features[FEATURE_ORDER].to_numpy(dtype=np.float64))
+    return model.predict_proba(X_scaled)[:, 1] * 100
+
+
+def _round(values, ndigits):
+    # Built-in round (correctly rounded) so reports match the per-row version exactly
+    return [round(float(v), ndigits) for v in values]
+
+
+def build_results(filenames, features, durations, form_scores):
+    """Report table for all videos at once (same columns as the per-row version)."""
+    f = features
+    grades = [get_grade(score) for score in form_scores]
+    return pd.DataFrame({
+        'filename': filenames,
+        'form_score': _round(form_scores, 2),
+        'grade': grades,
+        'rom_degrees': _round(f['rom'], 2),
+        'torso_stability': _round((f['true_torso_stability_left_std'] + f['true_torso_stability_right_std']) / 2, 2),
+        'movement_smoothness': _round(f['movement_smoothness'], 4),
+        'symmetry': _round(f['symmetry'], 3),
+        # Symmetry difference in degrees (lower is better)
+        'symmetry_difference_deg': _round((1.0 - f['symmetry'].abs()).abs() * 180, 2),
+        'total_reps': f['total_reps'].astype(int),
+        'correct_rep_ratio_pct': _round(f['correct_rep_ratio'] * 100, 2),
+        'duration_seconds': _round(durations, 2),
+        'peak_flexion_deg': _round(f['peak_flexion'], 2),
+        'peak_extension_deg': _round(f['peak_extension'], 2),
+        'frame_count': f['frame_count'].astype(int),
+        # All training features
+        'tempo': _round(f['tempo'], 2),
+        'true_torso_stability_left_mean': _round(f['true_torso_stability_left_mean'], 2),
+        'true_torso_stability_left_std': _round(f['true_torso_stability_left_std'], 2),
+        'true_torso_stability_right_mean': _round(f['true_torso_stability_right_mean'], 2),
+        'true_torso_stability_right_std': _round(f['true_torso_stability_right_std'], 2),
+        'bilateral_true_torso_mean': _round(f['bilateral_true_torso_mean'], 2),
+        'bilateral_true_torso_std': _round(f['bilateral_true_torso_std'], 2),
+        'angle_cv': _round(f['angle_cv'], 4),
+    })
+
+
+def autofit_columns(worksheet, df, max_width=50):
+    """Set column widths from the longest header/value of each column."""
+    from openpyxl.utils import get_column_letter
+    
+    for idx, column in enumerate(df.columns, 1):
+        lengths = df[column].astype(str).str.len()
+        longest = max(len(str(column)), int(lengths.max()) if len(lengths) else 0)
+        worksheet.column_dimensions[get_column_letter(idx)].width = min(longest + 2, max_width)
+
+
+def process_csv_files(csv_folder, category, model, scaler, output_excel_dir, workers=None):
     """
     Process all CSV files in a folder and generate Excel report.
     
+    Each CSV is read once (in parallel); all feature vectors are then scaled
+    and scored in a single transform/predict_proba call.
+    
     Args:
         csv_folder: Folder containing CSV files
         category: "true" or "false"
         model: Trained ML model
         scaler: StandardScaler
         output_excel_dir: Directory to save Excel file
+        workers: Worker processes for reading CSVs (default: CPU count)
         
     Returns:
         DataFrame with results
@@ -45,97 +133,27 @@ def process_csv_files(csv_folder, category, model, scaler, output_excel_dir):
     # Get all CSV files
     csv_files = sorted(glob.glob(os.path.join(csv_folder, "*.csv")))
     print(f"Found {len(csv_files)} CSV files\n")
+    if not csv_files:
+        return pd.DataFrame()
     
-    results = []
+    started = time.perf_counter()
+    extracted = extract_all(csv_files, workers)
     
-    for idx, csv_path in enumerate(csv_files, 1):
-        filename = os.path.basename(csv_path)
-        print(f"[{idx}/{len(csv_files)}] Processing: {filename} ", end='')
-        
-        try:
-            # Extract features
-            features = extract_features(csv_path)
-            
-            # Prepare features for prediction
-            feature_order = [
-                'rom',
-                'true_torso_stability_left_mean',
-                'true_torso_stability_left_std',
-                'tempo',
-                'symmetry',
-                'true_torso_stability_right_mean',
-                'true_torso_stability_right_std',
-                'bilateral_true_torso_mean',
-                'bilateral_true_torso_std',
-                'movement_smoothness',
-                'peak_flexion',
-                'peak_extension',
-                'total_reps',
-                'correct_rep_ratio',
-                'angle_cv',
-                'frame_count'
-            ]
-            
-            X = np.array([[features[key] for key in feature_order]])
-            X_scaled = scaler.transform(X)
-            
-            # Get prediction probability
-            proba = model.predict_proba(X_scaled)[0]
-            form_score = proba[1] * 100
-            grade = get_grade(form_score)
-            
-            # Get video duration from CSV
-            try:
-                df = pd.read_csv(csv_path, encoding='utf-8-sig')
-                duration_seconds = df['time_s'].iloc[-1] if len(df) > 0 else 0
-            except:
-                duration_seconds = 0
-            
-            # Calculate derived metrics
-            avg_torso_stability = (
-                features['true_torso_stability_left_std'] + 
-                features['true_torso_stability_right_std']
-            ) / 2
-            
-            # Symmetry difference in degrees (lower is better)
-            symmetry_diff = abs(1.0 - abs(features['symmetry'])) * 180
-            
-            # Store comprehensive results
-            result = {
-                'filename': filename,
-                'form_score': round(form_score, 2),
-                'grade': grade,
-                'rom_degrees': round(features['rom'], 2),
-                'torso_stability': round(avg_torso_stability, 2),
-                'movement_smoothness': round(features['movement_smoothness'], 4),
-                'symmetry': wround(features['symmetry'], 3),
-                'symmetry_difference_deg': round(symmetry_diff, 2),
-                'total_reps': int(features['total_reps']),
-                'correct_rep_ratio_pct': round(features['correct_rep_ratio'] * 100, 2),
-                'duration_seconds': round(duration_seconds, 2),
-                'peak_flexion_deg': round(features['peak_flexion'], 2),
-                'peak_extension_deg': round(features['peak_extension'], 2),
-                'frame_count': int(features['frame_count']),
-                # All training features
-                'tempo': round(features['tempo'], 2),
-                'true_torso_stability_left_mean': round(features['true_torso_stability_left_mean'], 2),
-                'true_torso_stability_left_std': round(features['true_torso_stability_left_std'], 2),
-                'true_torso_stability_right_mean': round(features['true_torso_stability_right_mean'], 2),
-                'true_torso_stability_right_std': round(features['true_torso_stability_right_std'], 2),
-                'bilateral_true_torso_mean': round(features['bilateral_true_torso_mean'], 2),
-                'bilateral_true_torso_std': round(features['bilateral_true_torso_std'], 2),
-                'angle_cv': round(features['angle_cv'], 4),
-            }
-            
-            results.append(result)
-            print(f"-> Score: {form_score:.1f}% ({grade})")
-            
-        except Exception as e:
-            print(f"-> ERROR: {e}")
-            continue
+    ok = []
+    for filename, features, duration_seconds, error in extracted:
+        if error is not None:
+            print(f"[-] {filename} -> ERROR: {error}")
+        else:
+            ok.append((filename, features, duration_seconds))
     
-    # Create DataFrame
-    df_results = pd.DataFrame(results)
+    if ok:
+        filenames, feature_rows, durations = zip(*ok)
+        features = pd.DataFrame(list(feature_rows), columns=FEATURE_ORDER)
+        form_scores = score_features(features, model, scaler)
+        df_results = build_results(list(filenames), features, np.array(durations), form_scores)
+    else:
+        df_results = pd.DataFrame()
+    print(f"[+] Scored {len(df_results)} of {len(csv_files)} CSV files in {time.perf_counter() - started:.2f}s")
     
     if len(df_results) > 0:
         # Save to Excel
@@ -146,24 +164,11 @@ def process_csv_files(csv_folder, category, model, scaler, output_excel_dir):
         with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
             df_results.to_excel(writer, index=False, sheet_name='Results')
             
-            # Get the worksheet
-            worksheet = writer.sheets['Results']
-            
             # Adjust column widths
-            for column in worksheet.columns:
-                max_length = 0
-                column = [cell for cell in column]
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column[0].column_letter].width = adjusted_width
+            autofit_columns(writer.sheets['Results'], df_results)
         
         print(f"\n{'='*70}")
-        print(f"[+] Processed {len(results)} videos successfully")
+        print(f"[+] Processed {len(df_results)} videos successfully")
         print(f"[+] Results saved to: {excel_path}")
         print(f"{'='*70}")
         
@@ -190,6 +195,10 @@ def process_csv_files(csv_folder, category, model, scaler, output_excel_dir):
 
 def main():
     """Main batch processing pipeline."""
+    parser = argparse.ArgumentParser(description='Score all timeline CSVs with the form model')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    args = parser.parse_args()
+    
     print("="*70)
     print(" "*15 + "BATCH VIDEO FORM ANALYSIS")
     print("="*70)
@@ -230,7 +239,8 @@ def main():
             "true",
             model,
             scaler,
-            true_results_dir
+            true_results_dir,
+            workers=args.workers
         )
     else:
         print(f"\n[X] Warning: True CSV folder not found: {true_csv_folder}")
@@ -243,7 +253,8 @@ def main():
             "false",
             model,
             scaler,
-            false_results_dir
+            false_results_dir,
+            workers=args.workers
         )
     else:
         print(f"\n[X] Warning: False CSV folder not found: {false_csv_folder}")
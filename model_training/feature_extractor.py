@@ -0,0 +1,123 @@
+"""
+Feature Extraction for the Form Score Model
+Computes the 16 biomechanical features the form-score model (biceps_model.pkl
++ scaler.pkl) was trained on from a BicepsCurlVideoAnalyzer timeline CSV.
+Same definitions as extract_features in scripts/ML_Training_TrainTestVal.ipynb.
+"""
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+# Column order the scaler and model expect
+FEATURE_ORDER = [
+    'rom',
+    'true_torso_stability_left_mean',
+    'true_torso_stability_left_std',
+    'tempo',
+    'symmetry',
+    'true_torso_stability_right_mean',
+    'true_torso_stability_right_std',
+    'bilateral_true_torso_mean',
+    'bilateral_true_torso_std',
+    'movement_smoothness',
+    'peak_flexion',
+    'peak_extension',
+    'total_reps',
+    'correct_rep_ratio',
+    'angle_cv',
+    'frame_count'
+]
+
+
+def read_timeline_csv(csv_path: str) -> pd.DataFrame:
+    """Read an analyzer timeline CSV (with or without a UTF-8 BOM)."""
+    return pd.read_csv(csv_path, encoding='utf-8-sig')
+
+
+def features_from_dataframe(df: pd.DataFrame) -> Dict[str, float]:
+    """
+    Compute the 16 features from an already-loaded timeline.
+
+    Raises:
+        KeyError: if a required timeline column is missing
+    """
+    features = {}
+
+    # 1. ROM
+    left_angles = pd.to_numeric(df['left_angle_smoothed_deg'], errors='coerce').dropna()
+    right_angles = pd.to_numeric(df['right_angle_smoothed_deg'], errors='coerce').dropna()
+    all_angles = pd.concat([left_angles, right_angles])
+    features['rom'] = float(all_angles.max() - all_angles.min()) if len(all_angles) > 0 else 0.0
+
+    # 2-3. True Torso Stability - Left
+    left_torso = pd.to_numeric(df['left_true_torso_angle_deg'], errors='coerce').dropna()
+    features['true_torso_stability_left_mean'] = float(left_torso.mean()) if len(left_torso) > 0 else 0.0
+    features['true_torso_stability_left_std'] = float(left_torso.std()) if len(left_torso) > 0 else 0.0
+
+    # 4. Tempo
+    total_reps = df['total_reps'].iloc[-1] if len(df) > 0 else 0
+    total_time = df['time_s'].iloc[-1] if len(df) > 0 else 0
+    features['tempo'] = float(total_time / total_reps) if total_reps > 0 else 0.0
+
+    # 5. Symmetry
+    if len(left_angles) > 1 and len(right_angles) > 1:
+        min_len = min(len(left_angles), len(right_angles))
+        corr = np.corrcoef(left_angles.iloc[:min_len].values, right_angles.iloc[:min_len].values)[0, 1]
+        features['symmetry'] = float(corr) if not np.isnan(corr) else 0.0
+    else:
+        features['symmetry'] = 0.0
+
+    # 6-7. True Torso Stability - Right
+    right_torso = pd.to_numeric(df['right_true_torso_angle_deg'], errors='coerce').dropna()
+    features['true_torso_stability_right_mean'] = float(right_torso.mean()) if len(right_torso) > 0 else 0.0
+    features['true_torso_stability_right_std'] = float(right_torso.std()) if len(right_torso) > 0 else 0.0
+
+    # 8-9. Bilateral True Torso
+    all_torso = pd.concat([left_torso, right_torso])
+    features['bilateral_true_torso_mean'] = float(all_torso.mean()) if len(all_torso) > 0 else 0.0
+    features['bilateral_true_torso_std'] = float(all_torso.std()) if len(all_torso) > 0 else 0.0
+
+    # 10. Movement Smoothness
+    all_changes = pd.concat([left_angles.diff().abs().dropna(), right_angles.diff().abs().dropna()])
+    avg_change = all_changes.mean()
+    features['movement_smoothness'] = float(1.0 / (avg_change + 1e-6)) if len(all_changes) > 0 else 0.0
+
+    # 11-12. Peak Flexion/Extension
+    features['peak_flexion'] = float(all_angles.min()) if len(all_angles) > 0 else 0.0
+    features['peak_extension'] = float(all_angles.max()) if len(all_angles) > 0 else 0.0
+
+    # 13. Total Reps
+    features['total_reps'] = float(total_reps)
+
+    # 14. Correct Rep Ratio
+    left_correct = df['left_correct_reps'].iloc[-1] if len(df) > 0 else 0
+    right_correct = df['right_correct_reps'].iloc[-1] if len(df) > 0 else 0
+    total_correct = left_correct + right_correct
+    total_reps_both = total_reps * 2
+    features['correct_rep_ratio'] = float(total_correct / total_reps_both) if total_reps_both > 0 else 0.0
+
+    # 15. Angle CV
+    angle_mean = all_angles.mean()
+    angle_std = all_angles.std()
+    features['angle_cv'] = float(angle_std / angle_mean) if angle_mean > 0 else 0.0
+
+    # 16. Frame Count
+    features['frame_count'] = float(len(df))
+
+    return features
+
+
+def extract_features(csv_path: str) -> Dict[str, float]:
+    """
+    Extract the 16 features from a timeline CSV.
+
+    Returns all-zero features if the CSV cannot be read (as during training).
+    """
+    try:
+        return features_from_dataframe(read_timeline_csv(csv_path))
+    except Exception as e:
+        print(f"Error: {e}")
+        return {k: 0.0 for k in FEATURE_ORDER}
@@ -0,0 +1,289 @@
+"""
+Train the Form Score Model
+Trains the RandomForest form-score model (biceps_model.pkl + scaler.pkl) on
+the 16 timeline features, replacing the training cells of
+scripts/video_angle_extractor.py with the same data layout, class weights,
+parameter grid and 5-fold stratified CV, and a faster search:
+
+  - successive halving with n_estimators as the resource: every
+    (max_depth, min_samples_split, min_samples_leaf, max_features) config
+    is scored at the smallest forest size, the best 1/eta go on to the next
+    size, and their forests grow with warm_start instead of being refit
+  - the fold matrices are scaled once and shared by every candidate
+  - the out-of-fold probabilities of the winning candidate come from the
+    search itself, so the decision threshold is tuned without another CV
+
+The test split is only used once, for the final metrics.
+
+Expected layout (as written by the extractor notebook):
+    <data_dir>/csv/{train,validation,test}/{true,false}/output_{true,false}_*.csv
+
+Usage:
+    python train_model.py <data_dir> [--out-dir DIR] [--eta 3] [--workers N]
+"""
+
+import os
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import StratifiedKFold
+from sklearn.metrics import accuracy_score, confusion_matrix, f1_score, recall_score
+
+from feature_extractor import FEATURE_ORDER, extract_features
+
+
+# Search space of the notebook's GridSearchCV (324 combinations)
+PARAM_GRID = {
+    'n_estimators': [50, 70, 100],
+    'max_depth': [5, 7, 10, 12],
+    'min_samples_split': [5, 8, 10],
+    'min_samples_leaf': [2, 4, 6],
+    'max_features': ['sqrt', 'log2', 0.5],
+}
+
+# False (bad form) samples weigh more, as in the notebook
+CLASS_WEIGHT = {0: 2.5, 1: 1}
+RANDOM_STATE = 42
+
+THRESHOLDS = np.arange(0.2, 0.8, 0.05)
+
+
+def load_split(data_dir, split, workers=None):
+    """
+    Features and labels of one split (TRUE = 1, FALSE = 0).
+
+    Returns:
+        (X, y, filenames)
+    """
+    csv_files, labels = [], []
+    for label, name in ((1, 'true'), (0, 'false')):
+        files = sorted(glob.glob(os.path.join(data_dir, 'csv', split, name, f'output_{name}_*.csv')))
+        csv_files += files
+        labels += [label] * len(files)
+    print(f"[+] {split.upper():10s}: {labels.count(1)} TRUE + {labels.count(0)} FALSE")
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(csv_files) or 1))
+    if workers == 1:
+        rows = [extract_features(path) for path in csv_files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(extract_features, csv_files, chunksize=max(1, len(csv_files) // (workers * 8))))
+    X = pd.DataFrame(rows, columns=FEATURE_ORDER).to_numpy(dtype=np.float64)
+    return X, np.array(labels, dtype=int), [os.path.basename(path) for path in csv_files]
+
+
+def scaled_folds(X, y, n_splits=5, seed=RANDOM_STATE):
+    """
+    Per-fold (train_idx, val_idx, X_train_scaled, X_val_scaled), with the
+    scaler fit on the fold's training part only.
+    """
+    folds = []
+    cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    for train_idx, val_idx in cv.split(X, y):
+        scaler = StandardScaler().fit(X[train_idx])
+        folds.append((train_idx, val_idx, scaler.transform(X[train_idx]), scaler.transform(X[val_idx])))
+    return folds
+
+
+def model_configs(grid=None):
+    """Every non-resource parameter combination of the grid, as dicts."""
+    grid = grid or PARAM_GRID
+    names = [name for name in grid if name != 'n_estimators']
+    return [dict(zip(names, values)) for values in product(*(grid[name] for name in names))]
+
+
+def new_model(config, n_estimators):
+    return RandomForestClassifier(n_estimators=n_estimators, random_state=RANDOM_STATE,
+                                  class_weight=CLASS_WEIGHT, warm_start=True, n_jobs=1, **config)
+
+
+# Search state of a worker process: y and the cached fold matrices
+_worker_data = None
+
+
+def _init_worker(y, folds):
+    global _worker_data
+    _worker_data = (y, folds)
+
+
+def _grow_and_score(config, n_estimators, models):
+    """
+    Grow one config's fold forests to n_estimators (warm_start keeps the
+    existing trees; with a fixed random_state the result equals a fresh fit
+    of that size) and score them on the validation folds.
+
+    Returns:
+        (models, oof_proba, scores)
+    """
+    y, folds = _worker_data
+    models = models or [new_model(config, n_estimators) for _ in folds]
+    oof_proba = np.zeros(len(y))
+    fold_scores = []
+    for model, (train_idx, val_idx, X_train, X_val) in zip(models, folds):
+        model.set_params(n_estimators=n_estimators)
+        model.fit(X_train, y[train_idx])
+        proba = model.predict_proba(X_val)[:, 1]
+        oof_proba[val_idx] = proba
+        preds = model.classes_[(proba > 0.5).astype(int)]
+        fold_scores.append((accuracy_score(y[val_idx], preds),
+                            f1_score(y[val_idx], preds, average='macro', zero_division=0),
+                            recall_score(y[val_idx], preds, pos_label=0, zero_division=0)))
+    accuracy, f1_macro, recall_false = np.mean(fold_scores, axis=0)
+    return models, oof_proba, {'accuracy': accuracy, 'f1_macro': f1_macro, 'recall_false': recall_false}
+
+
+def successive_halving(y, folds, grid=None, eta=3, workers=None):
+    """
+    Successive halving over the grid with n_estimators as the resource.
+
+    Returns:
+        list of evaluated candidates (dicts: params, scores, oof_proba, rung),
+        best first (by mean F1-macro, as the notebook's refit='f1_macro')
+    """
+    grid = grid or PARAM_GRID
+    sizes = sorted(grid['n_estimators'])
+    survivors = [(config, None) for config in model_configs(grid)]
+    evaluated = []
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(survivors)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(y, folds)) as pool:
+        for rung, n_estimators in enumerate(sizes):
+            started = time.perf_counter()
+            results = list(pool.map(_grow_and_score, [config for config, _ in survivors],
+                                    [n_estimators] * len(survivors), [models for _, models in survivors]))
+            rung_results = []
+            for (config, _), (models, oof_proba, scores) in zip(survivors, results):
+                candidate = {'params': {'n_estimators': n_estimators, **config}, 'scores': scores,
+                             'oof_proba': oof_proba, 'rung': rung}
+                evaluated.append(candidate)
+                rung_results.append((candidate, config, models))
+            rung_results.sort(key=lambda r: r[0]['scores']['f1_macro'], reverse=True)
+            best = rung_results[0][0]['scores']
+            print(f"[+] Rung {rung}: {len(survivors):3d} configs x {len(folds)} folds @ {n_estimators} trees "
+                  f"-> best F1-macro {best['f1_macro']:.4f} ({time.perf_counter() - started:.1f}s)")
+            if rung + 1 < len(sizes):
+                keep = max(1, int(np.ceil(len(rung_results) / eta)))
+                survivors = [(config, models) for _, config, models in rung_results[:keep]]
+
+    # Stable sort: on ties the earlier (smaller) forest wins
+    evaluated.sort(key=lambda c: c['scores']['f1_macro'], reverse=True)
+    return evaluated
+
+
+def tune_threshold(y, oof_proba, thresholds=THRESHOLDS):
+    """Decision threshold with the best out-of-fold F1-macro. Returns (threshold, f1, table)."""
+    table = []
+    for threshold in thresholds:
+        preds = (oof_proba >= threshold).astype(int)
+        table.append((threshold, f1_score(y, preds, average='macro', zero_division=0),
+                      recall_score(y, preds, pos_label=0, zero_division=0),
+                      recall_score(y, preds, pos_label=1, zero_division=0)))
+    best = max(table, key=lambda row: row[1])
+    return best[0], best[1], table
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the form-score RandomForest (successive halving search)')
+    parser.add_argument('data_dir', help='Folder with csv/{train,validation,test}/{true,false}/ timelines')
+    parser.add_argument('--out-dir', default=os.path.dirname(os.path.abspath(__file__)),
+                        help='Where biceps_model.pkl, scaler.pkl, best_threshold.txt go (default: this folder)')
+    parser.add_argument('--eta', type=int, default=3, help='Keep the best 1/eta configs per rung')
+    parser.add_argument('--folds', type=int, default=5, help='Stratified CV folds')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    print("="*70)
+    print(" "*20 + "FORM SCORE MODEL TRAINING")
+    print("="*70)
+    started = time.perf_counter()
+
+    # 1. Data: train + validation are tuned with CV, test is held out
+    X_train, y_train, _ = load_split(args.data_dir, 'train', args.workers)
+    X_val, y_val, _ = load_split(args.data_dir, 'validation', args.workers)
+    X_test, y_test, _ = load_split(args.data_dir, 'test', args.workers)
+    X_trainval = np.vstack([X_train, X_val])
+    y_trainval = np.concatenate([y_train, y_val])
+    if len(np.unique(y_trainval)) < 2 or np.bincount(y_trainval).min() < args.folds:
+        print(f"\n[X] ERROR: Need at least {args.folds} TRUE and {args.folds} FALSE train+validation samples")
+        return
+    load_seconds = time.perf_counter() - started
+
+    # 2. Search
+    configs = len(model_configs())
+    print(f"\n[+] Successive halving: {configs} configs, n_estimators {PARAM_GRID['n_estimators']}, "
+          f"eta={args.eta}, {args.folds}-fold CV")
+    search_started = time.perf_counter()
+    folds = scaled_folds(X_trainval, y_trainval, n_splits=args.folds)
+    evaluated = successive_halving(y_trainval, folds, eta=args.eta, workers=args.workers)
+    best = evaluated[0]
+    search_seconds = time.perf_counter() - search_started
+    print(f"[+] {len(evaluated)} candidate evaluations (grid search: "
+          f"{configs * len(PARAM_GRID['n_estimators'])}) in {search_seconds:.1f}s")
+
+    print(f"\nBest parameters:")
+    for param, value in best['params'].items():
+        print(f"  {param}: {value}")
+    print(f"CV scores: accuracy {best['scores']['accuracy']:.4f}  "
+          f"F1-macro {best['scores']['f1_macro']:.4f}  recall(0) {best['scores']['recall_false']:.4f}")
+
+    # 3. Threshold from the search's own out-of-fold probabilities
+    best_threshold, best_oof_f1, table = tune_threshold(y_trainval, best['oof_proba'])
+    print(f"\n{'Threshold':<12} {'F1-Macro':<12} {'Recall(0)':<12} {'Recall(1)':<12}")
+    print("-"*50)
+    for threshold, f1m, rec0, rec1 in table:
+        print(f"{threshold:<12.2f} {f1m:<12.4f} {rec0:<12.4f} {rec1:<12.4f}")
+    print(f"[+] Best threshold: {best_threshold:.2f} (OOF F1-macro {best_oof_f1:.4f})")
+
+    # 4. Final model on all of train + validation
+    scaler = StandardScaler()
+    X_trainval_scaled = scaler.fit_transform(X_trainval)
+    final_model = RandomForestClassifier(**best['params'], random_state=RANDOM_STATE,
+                                         class_weight=CLASS_WEIGHT, n_jobs=-1)
+    final_model.fit(X_trainval_scaled, y_trainval)
+    final_model.set_params(n_jobs=None)
+    train_seconds = time.perf_counter() - started
+
+    # 5. Test set, used once
+    print(f"\n{'='*70}")
+    print(f"FINAL METRICS")
+    print(f"{'='*70}")
+    if len(y_test):
+        X_test_scaled = scaler.transform(X_test)
+        test_proba = final_model.predict_proba(X_test_scaled)[:, 1]
+        for name, preds in (('Default (0.50)', final_model.predict(X_test_scaled)),
+                            (f'Tuned ({best_threshold:.2f})', (test_proba >= best_threshold).astype(int))):
+            print(f"  {name:16s} accuracy {accuracy_score(y_test, preds):.4f}  "
+                  f"F1-macro {f1_score(y_test, preds, average='macro', zero_division=0):.4f}")
+        cm = confusion_matrix(y_test, (test_proba >= best_threshold).astype(int), labels=[0, 1])
+        print(f"  Confusion matrix (rows: true 0/1, cols: predicted 0/1): {cm.tolist()}")
+    else:
+        print("  [X] No test samples")
+    print(f"  Training time: {train_seconds:.1f}s (features {load_seconds:.1f}s, search {search_seconds:.1f}s)")
+
+    # 6. Save
+    os.makedirs(args.out_dir, exist_ok=True)
+    model_path = os.path.join(args.out_dir, 'biceps_model.pkl')
+    scaler_path = os.path.join(args.out_dir, 'scaler.pkl')
+    threshold_path = os.path.join(args.out_dir, 'best_threshold.txt')
+    joblib.dump(final_model, model_path)
+    joblib.dump(scaler, scaler_path)
+    with open(threshold_path, 'w') as f:
+        f.write(str(round(float(best_threshold), 2)))
+    pd.DataFrame({'feature': FEATURE_ORDER, 'importance': final_model.feature_importances_}) \
+        .sort_values('importance', ascending=False) \
+        .to_csv(os.path.join(args.out_dir, 'feature_importance.csv'), index=False)
+    print(f"\n[+] Model: {model_path}")
+    print(f"[+] Scaler: {scaler_path}")
+    print(f"[+] Threshold: {threshold_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,6 @@ import sys
 import csv
 from typing import Dict, List, Tuple
 
-import cv2
 import numpy as np
 
 from pose_detection import PoseDetector
@@ -38,76 +37,13 @@ def get_torso_angle_elbow_shoulder_hip(pose: PoseDetector, image_shape, side: st
 
 
 def process_video(video_path: str, frame_stride: int = 1, max_dim: int = 1280) -> Dict[str, float]:
-    pose = PoseDetector()
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise RuntimeError(f"Could not open video: {video_path}")
-
-    frame_idx = 0
-    mins = {
-        'left_arm': np.inf,
-        'right_arm': np.inf,
-        'left_torso': np.inf,
-        'right_torso': np.inf,
-    }
-    maxs = {
-        'left_arm': -np.inf,
-        'right_arm': -np.inf,
-        'left_torso': -np.inf,
-        'right_torso': -np.inf,
-    }
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        frame_idx += 1
-        if frame_stride > 1 and (frame_idx - 1) % frame_stride != 0:
-            continue
-
-        # Resize for speed/consistency
-        h, w = frame.shape[:2]
-        if max(h, w) > max_dim:
-            if w > h:
-                new_w = max_dim
-                new_h = int(h * (max_dim / w))
-            else:
-                new_h = max_dim
-                new_w = int(w * (max_dim / h))
-            frame = cv2.resize(frame, (new_w, new_h))
-
-        frame, _ = pose.detect_pose(frame, draw=False)
-        if not pose.is_pose_detected():
-            continue
-
-        angles = pose.get_body_angles(frame.shape)
-        left_arm = angles.get('left_arm')
-        right_arm = angles.get('right_arm')
-        left_torso = get_torso_angle_elbow_shoulder_hip(pose, frame.shape, 'left')
-        right_torso = get_torso_angle_elbow_shoulder_hip(pose, frame.shape, 'right')
-
-        # Update mins/maxs if finite
-        for key, val in (
-            ('left_arm', left_arm), ('right_arm', right_arm),
-            ('left_torso', left_torso), ('right_torso', right_torso),
-        ):
-            if val is None or not np.isfinite(val):
-                continue
-            mins[key] = min(mins[key], float(val))
-            maxs[key] = max(maxs[key], float(val))
-
-    cap.release()
-    # Convert infs to NaNs if never updated
-    for k in list(mins.keys()):
-        if not np.isfinite(mins[k]):
-            mins[k] = np.nan
-        if not np.isfinite(maxs[k]):
-            maxs[k] = np.nan
+    from unified_extractor import AngleRangeAccumulator, run_accumulators
 
+    acc = AngleRangeAccumulator()
+    run_accumulators(video_path, [acc], frame_stride=frame_stride, max_dim=max_dim)
     return {
         'video': os.path.basename(video_path),
-        **{f"min_{k}": mins[k] for k in mins},
-        **{f"max_{k}": maxs[k] for k in maxs},
+        **acc.result(),
     }
 
 
@@ -1,125 +1,184 @@
 """
 Step 2: Batch process all renamed videos to generate CSV files with custom naming.
 Processes true_*.mp4 → output_true_*.csv and false_*.mp4 → output_false_*.csv
+
+Videos are analyzed in parallel (one PoseDetector per worker process) and
+each finished video is recorded in a manifest:
+
+    {sha256 of the video: {"video", "csv", "analyzer_version", "frames", "processed_at"}}
+
+On a rerun, videos whose content hash is already in the manifest with the
+current ANALYZER_VERSION and whose CSV still exists are skipped, so an
+interrupted batch resumes where it stopped and adding new videos only
+processes the new ones.
+
+Usage:
+  python batch_process_videos.py [--workers N] [--force]
 """
+import argparse
+import json
 import os
-import sys
 import re
+import sys
+import time
+from datetime import datetime
 from pathlib import Path
-from biceps_curl_video_analyzer import BicepsCurlVideoAnalyzer
+from biceps_curl_video_analyzer import ANALYZER_VERSION, BicepsCurlVideoAnalyzer
+from feature_cache import file_sha256
+from pose_pool import iter_pose_pool
+
+MANIFEST_NAME = "batch_manifest.json"
+
+_worker_detector = None
+
 
 def extract_number_from_filename(filename):
     """Extract the number from filenames like 'true_1.mp4' or 'false_5.mp4'"""
     match = re.search(r'_(\d+)', filename)
     return int(match.group(1)) if match else 0
 
-def process_videos_in_folder(input_folder, output_csv_folder, prefix, category_name):
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path):
+    # Write-then-rename so a crash never leaves a half-written manifest
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def collect_jobs(input_folder, output_csv_folder, prefix):
     """
-    Process all video files in a folder with custom CSV naming.
-    
+    List (video_path, csv_path) pairs for all videos with the given prefix.
+
     Args:
         input_folder: Path to folder containing videos
         output_csv_folder: Path to folder where CSV files will be saved
         prefix: Prefix for videos ('true' or 'false')
-        category_name: Name of category (for logging)
     """
-    # Create output folder if it doesn't exist
     os.makedirs(output_csv_folder, exist_ok=True)
-    
+
     # Get all video files matching the prefix
     video_extensions = ['.mp4', '.avi', '.mov', '.mkv', '.MOV']
     video_files = []
-    
     for ext in video_extensions:
-        pattern = f'{prefix}_*{ext}'
-        video_files.extend(list(Path(input_folder).glob(pattern)))
-    
+        video_files.extend(list(Path(input_folder).glob(f'{prefix}_*{ext}')))
+
     # Sort files by number
     video_files.sort(key=lambda x: extract_number_from_filename(x.stem))
-    
-    total_videos = len(video_files)
-    print(f"\n{'='*70}")
-    print(f"Processing {category_name} videos")
-    print(f"{'='*70}")
-    print(f"Found {total_videos} videos in {input_folder}")
-    print(f"Output CSV folder: {output_csv_folder}")
-    print(f"{'='*70}\n")
-    
-    successful = 0
-    failed = 0
-    
-    for idx, video_path in enumerate(video_files, 1):
-        # Extract the number from filename (e.g., 'true_5.mp4' → 5)
+
+    jobs = []
+    for video_path in video_files:
+        # 'true_5.mp4' → output_true_5.csv
         video_number = extract_number_from_filename(video_path.stem)
-        
-        print(f"\n[{idx}/{total_videos}] Processing: {video_path.name}")
-        print("-" * 70)
-        
-        try:
-            # Create a temporary directory for this video's output
-            temp_output_dir = Path(output_csv_folder) / f"temp_{prefix}_{video_number}"
-            temp_output_dir.mkdir(exist_ok=True)
-            
-            # Create analyzer with temporary output directory
-            analyzer = BicepsCurlVideoAnalyzer(
-                video_path=str(video_path),
-                visualize=False,  # Don't create annotated videos, only CSV
-                output_dir=str(temp_output_dir)
-            )
-            
-            # Analyze the video
-            analyzer.analyze()
-            
-            # The analyzer creates a file like "true_5__timeline.csv"
-            # We need to rename it to "output_true_5.csv"
-            temp_csv = temp_output_dir / f"{video_path.stem}__timeline.csv"
-            final_csv_name = f"output_{prefix}_{video_number}.csv"
-            final_csv_path = Path(output_csv_folder) / final_csv_name
-            
-            # Move the CSV to the final location with the correct name
-            if temp_csv.exists():
-                temp_csv.rename(final_csv_path)
-                # Remove temporary directory
-                temp_output_dir.rmdir()
-                print(f"✓ Successfully created: {final_csv_name}")
-                successful += 1
-            else:
-                print(f"✗ Failed to create CSV for: {video_path.name}")
-                failed += 1
-                
-        except Exception as e:
-            print(f"✗ Error processing {video_path.name}: {str(e)}")
-            failed += 1
-            # Try to clean up temp directory if it exists
-            try:
-                if temp_output_dir.exists():
-                    for file in temp_output_dir.iterdir():
-                        file.unlink()
-                    temp_output_dir.rmdir()
-            except:
-                pass
-    
-    print(f"\n{'='*70}")
-    print(f"{category_name} Processing Complete")
-    print(f"{'='*70}")
-    print(f"Total: {total_videos} videos")
-    print(f"Successful: {successful}")
-    print(f"Failed: {failed}")
-    print(f"{'='*70}\n")
-    
-    return successful, failed
+        csv_path = Path(output_csv_folder) / f"output_{prefix}_{video_number}.csv"
+        jobs.append((str(video_path), str(csv_path)))
+    return jobs
+
+
+def is_up_to_date(entry, csv_path):
+    return (entry is not None
+            and entry.get('analyzer_version') == ANALYZER_VERSION
+            and os.path.normpath(entry.get('csv', '')) == os.path.normpath(csv_path)
+            and os.path.exists(csv_path))
+
+
+def _init_worker():
+    global _worker_detector
+    # Imported here so the parent process never loads a MediaPipe graph
+    from pose_detection import PoseDetector
+    _worker_detector = PoseDetector()
+
+
+def _process_video(video_path, csv_path):
+    """Analyze one video in a worker and write its timeline CSV straight to csv_path."""
+    started = time.perf_counter()
+    _worker_detector.reset()
+    analyzer = BicepsCurlVideoAnalyzer(
+        video_path=video_path,
+        visualize=False,  # Don't create annotated videos, only CSV
+        output_dir=os.path.dirname(csv_path),
+        pose_detector=_worker_detector,
+        csv_path=csv_path
+    )
+    analyzer.rep_counter.debug_mode = False
+    analyzer.analyze()
+    if not os.path.exists(csv_path):
+        raise RuntimeError("no CSV was written (no frames decoded?)")
+    return len(analyzer._timeline_rows), time.perf_counter() - started
+
+
+def run_batch(jobs, manifest_path, workers=None, force=False):
+    """
+    Process (video_path, csv_path) jobs in a worker pool, skipping videos
+    already in the manifest.
+
+    Returns:
+        dict: {video_path: 'skipped' | 'ok' | 'failed'}, total frames, elapsed seconds
+    """
+    manifest = load_manifest(manifest_path)
+    outcome = {}
+    todo = []
+    for video_path, csv_path in jobs:
+        digest = file_sha256(video_path)
+        if not force and is_up_to_date(manifest.get(digest), csv_path):
+            outcome[video_path] = 'skipped'
+        else:
+            todo.append((video_path, csv_path, digest))
+
+    print(f"{len(jobs)} videos, {len(jobs) - len(todo)} up to date, {len(todo)} to process")
+
+    total_frames = 0
+    started = time.perf_counter()
+    if todo:
+        digests = {video_path: digest for video_path, _, digest in todo}
+        jobs = [(video_path, csv_path) for video_path, csv_path, _ in todo]
+        results = iter_pose_pool(_process_video, jobs, _init_worker, workers=workers)
+        for idx, ((video_path, csv_path), result, error) in enumerate(results, 1):
+            name = os.path.basename(video_path)
+            if error is not None:
+                print(f"[{idx}/{len(todo)}] ✗ Error processing {name}: {str(error)}")
+                outcome[video_path] = 'failed'
+                continue
+            frames, seconds = result
+            total_frames += frames
+            manifest[digests[video_path]] = {
+                'video': name,
+                'csv': csv_path,
+                'analyzer_version': ANALYZER_VERSION,
+                'frames': frames,
+                'processed_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            save_manifest(manifest, manifest_path)
+            outcome[video_path] = 'ok'
+            print(f"[{idx}/{len(todo)}] ✓ {name} → {os.path.basename(csv_path)} "
+                  f"({frames} frames, {frames / seconds:.1f} fps)")
+    return outcome, total_frames, time.perf_counter() - started
+
 
 def main():
+    parser = argparse.ArgumentParser(description='Batch-generate timeline CSVs for the training videos')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--force', action='store_true', help='Reprocess videos already in the manifest')
+    args = parser.parse_args()
+
     # Get the base directory (parent of scripts folder)
     base_dir = Path(__file__).parent.parent
-    
+
     # Define input and output paths
     dogru_input = base_dir / "normal_video" / "Doğru"
     yanlis_input = base_dir / "normal_video" / "Yanlış"
-    
+
     true_csv_output = base_dir / "model_training" / "videos" / "true" / "csv"
     false_csv_output = base_dir / "model_training" / "videos" / "false" / "csv"
-    
+    manifest_path = base_dir / "model_training" / "videos" / MANIFEST_NAME
+
     print("\n" + "="*70)
     print("BATCH VIDEO PROCESSING WITH CUSTOM CSV NAMING")
     print("="*70)
@@ -130,44 +189,40 @@ def main():
     print(f"\nOutput folders:")
     print(f"  True CSV: {true_csv_output}")
     print(f"  False CSV: {false_csv_output}")
+    print(f"  Manifest: {manifest_path} (analyzer version {ANALYZER_VERSION})")
     print(f"\nNaming scheme:")
     print(f"  Videos: true_1.mp4, true_2.mp4, ... / false_1.mp4, false_2.mp4, ...")
     print(f"  CSVs: output_true_1.csv, output_true_2.csv, ... / output_false_1.csv, output_false_2.csv, ...")
     print("="*70)
-    
-    # Process true videos (correct form)
-    print("\n\nSTEP 1: Processing CORRECT FORM videos (true_*)")
-    true_success, true_failed = process_videos_in_folder(
-        input_folder=str(dogru_input),
-        output_csv_folder=str(true_csv_output),
-        prefix="true",
-        category_name="CORRECT FORM (true_*)"
-    )
-    
-    # Process false videos (incorrect form)
-    print("\n\nSTEP 2: Processing INCORRECT FORM videos (false_*)")
-    false_success, false_failed = process_videos_in_folder(
-        input_folder=str(yanlis_input),
-        output_csv_folder=str(false_csv_output),
-        prefix="false",
-        category_name="INCORRECT FORM (false_*)"
-    )
-    
-    # Final summary
-    total_success = true_success + false_success
+
+    # Correct form (true_*) and incorrect form (false_*) share one worker pool
+    true_jobs = collect_jobs(str(dogru_input), str(true_csv_output), "true")
+    false_jobs = collect_jobs(str(yanlis_input), str(false_csv_output), "false")
+    outcome, total_frames, elapsed = run_batch(true_jobs + false_jobs, str(manifest_path),
+                                               workers=args.workers, force=args.force)
+
+    def tally(jobs):
+        states = [outcome.get(video_path) for video_path, _ in jobs]
+        return states.count('ok'), states.count('skipped'), states.count('failed')
+
+    true_ok, true_skipped, true_failed = tally(true_jobs)
+    false_ok, false_skipped, false_failed = tally(false_jobs)
     total_failed = true_failed + false_failed
-    total_videos = total_success + total_failed
-    
+    total_videos = len(true_jobs) + len(false_jobs)
+
+    # Final summary
     print("\n" + "="*70)
     print("FINAL SUMMARY")
     print("="*70)
-    print(f"Total videos processed: {total_videos}")
-    print(f"  Correct form (true_*): {true_success} successful, {true_failed} failed")
-    print(f"  Incorrect form (false_*): {false_success} successful, {false_failed} failed")
-    print(f"\nOverall: {total_success} successful, {total_failed} failed")
-    print(f"Success rate: {(total_success/total_videos*100):.1f}%" if total_videos > 0 else "N/A")
+    print(f"Total videos: {total_videos}")
+    print(f"  Correct form (true_*): {true_ok} processed, {true_skipped} up to date, {true_failed} failed")
+    print(f"  Incorrect form (false_*): {false_ok} processed, {false_skipped} up to date, {false_failed} failed")
+    if total_frames:
+        print(f"\nThroughput: {total_frames} frames in {elapsed:.1f}s ({total_frames / elapsed:.1f} frames/s, "
+              f"{args.workers} workers)")
+    print(f"Success rate: {((total_videos - total_failed)/total_videos*100):.1f}%" if total_videos > 0 else "N/A")
     print("="*70)
-    
+
     return 0 if total_failed == 0 else 1
 
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+"""
+Accuracy/speed benchmark for adaptive temporal decimation.
+
+Runs every video once at full rate and once per target rate with
+BicepsCurlVideoAnalyzer(target_pose_hz=...), then compares:
+  - rep counts (total / left / right) and correct/incorrect counts
+  - per-rep form flags (events matched by arm + rep number)
+  - pose inferences and wall-clock time
+
+Usage:
+  python benchmark_decimation.py <video_or_folder> [...] [--hz 15,20] [--complexity 2] [--csv out.csv]
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from biceps_curl_video_analyzer import BicepsCurlVideoAnalyzer
+from pose_detection import PoseDetector
+
+
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.webm', '.mkv'}
+
+
+def _collect_videos(inputs):
+    videos = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            videos.extend(sorted(p for p in path.rglob('*') if p.suffix.lower() in VIDEO_EXTENSIONS))
+        elif path.suffix.lower() in VIDEO_EXTENSIONS:
+            videos.append(path)
+    return videos
+
+
+def _run(video, target_hz, complexity):
+    analyzer = BicepsCurlVideoAnalyzer(
+        str(video), visualize=False, output_dir=os.path.join(os.getcwd(), '.benchmark_decimation'),
+        pose_detector=PoseDetector(model_complexity=complexity), target_pose_hz=target_hz
+    )
+    analyzer.rep_counter.debug_mode = False
+    os.makedirs(analyzer.output_dir, exist_ok=True)
+    t0 = time.perf_counter()
+    analyzer.analyze()
+    elapsed = time.perf_counter() - t0
+    status = analyzer.rep_counter.get_status()
+    flags = {(e['arm'], e['count']): e['correct'] for e in analyzer._events}
+    return status, flags, analyzer.pose_inferences, elapsed, len(analyzer._timeline_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark adaptive decimation against full-rate analysis')
+    parser.add_argument('inputs', nargs='+', help='Video files or folders')
+    parser.add_argument('--hz', default='15,20', help='Comma-separated target pose rates')
+    parser.add_argument('--complexity', type=int, default=2, help='MediaPipe model_complexity')
+    parser.add_argument('--csv', help='Optional path to write per-video results')
+    args = parser.parse_args()
+
+    videos = _collect_videos(args.inputs)
+    if not videos:
+        print("No videos found")
+        return 1
+    rates = [float(x) for x in args.hz.split(',') if x.strip()]
+
+    rows = []
+    for video in videos:
+        print(f"\n🎬 {video.name}")
+        base_status, base_flags, base_inf, base_time, n_frames = _run(video, None, args.complexity)
+        for hz in rates:
+            status, flags, inferences, elapsed, _ = _run(video, hz, args.complexity)
+            shared = set(base_flags) & set(flags)
+            rows.append({
+                'video': video.name,
+                'target_hz': hz,
+                'frames': n_frames,
+                'reps_full': base_status['total_reps'],
+                'reps_decimated': status['total_reps'],
+                'reps_match': all(base_status[k] == status[k] for k in ('total_reps', 'left_reps', 'right_reps')),
+                'correct_full': base_status['left_correct_reps'] + base_status['right_correct_reps'],
+                'correct_decimated': status['left_correct_reps'] + status['right_correct_reps'],
+                'flag_agreement': (sum(base_flags[k] == flags[k] for k in shared) / len(shared)) if shared else 1.0,
+                'inference_ratio': inferences / base_inf if base_inf else 0.0,
+                'speedup': base_time / elapsed if elapsed else 0.0,
+            })
+
+    df = pd.DataFrame(rows)
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print("\n" + df.round(3).to_string(index=False))
+
+    print("\nSummary by target rate:")
+    summary = df.groupby('target_hz').agg(
+        videos=('video', 'count'),
+        rep_count_exact=('reps_match', 'mean'),
+        mean_abs_rep_error=('reps_decimated', lambda s: (s - df.loc[s.index, 'reps_full']).abs().mean()),
+        flag_agreement=('flag_agreement', 'mean'),
+        inference_ratio=('inference_ratio', 'mean'),
+        speedup=('speedup', 'mean'),
+    )
+    print(summary.round(3).to_string())
+
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+        print(f"\n✅ Results written to {args.csv}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
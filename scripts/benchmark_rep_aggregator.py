@@ -0,0 +1,244 @@
+"""
+Benchmark and equivalence check for rep_aggregator._detect_reps_for_arm.
+
+Compares the run-length/segment-reduction implementation against the
+original loop-based one (kept below as the reference) on long synthetic
+timelines with noisy state sequences (flicker, unknown states, lost
+poses), and reports per-arm timings.
+
+Usage:
+  python benchmark_rep_aggregator.py [--frames 100000] [--noise 0.05] [--seeds 5]
+"""
+import argparse
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from rep_aggregator import _coerce_numeric, _detect_reps_for_arm
+
+
+def synthetic_timeline(frames: int, noise: float = 0.05, fps: float = 30.0, seed: int = 0) -> pd.DataFrame:
+    """Curl-like state/angle timeline for both arms with random state flicker and gaps."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(frames) / fps
+    data = {"time_s": t}
+    for arm, period in (("left", 2.5), ("right", 2.8)):
+        phase = (t % period) / period
+        angle = 160.0 - 120.0 * np.sin(np.pi * phase) + rng.normal(0.0, 3.0, frames)
+        states = np.where(angle > 140, "down", np.where(angle < 70, "up", "transition")).astype(object)
+        flicker = rng.random(frames) < noise
+        states[flicker] = rng.choice(["down", "up", "transition", "unknown"], flicker.sum())
+        lost = rng.random(frames) < noise / 2
+        angle[lost] = np.nan
+        states[lost & (rng.random(frames) < 0.5)] = np.nan
+        data[f"{arm}_state"] = states
+        data[f"{arm}_angle_raw_deg"] = angle
+        data[f"{arm}_aligned"] = (rng.random(frames) > 0.1).astype(float)
+        data[f"{arm}_torso_angle_deg"] = np.abs(rng.normal(20.0, 10.0, frames))
+        data[f"{arm}_shoulder_x"] = 0.4 + rng.normal(0.0, 0.01, frames)
+        height = 0.3 + rng.normal(0.0, 0.01, frames)
+        height[rng.random(frames) < 0.02] = np.nan
+        data[f"{arm}_torso_height"] = height
+    return pd.DataFrame(data)
+
+
+def same_reps(a: List[Dict], b: List[Dict]) -> bool:
+    if len(a) != len(b):
+        return False
+    for ra, rb in zip(a, b):
+        if ra.keys() != rb.keys():
+            return False
+        for key in ra:
+            va, vb = ra[key], rb[key]
+            if isinstance(va, float) and np.isnan(va) and isinstance(vb, float) and np.isnan(vb):
+                continue
+            if va != vb:
+                return False
+    return True
+
+
+def detect_reps_legacy(df: pd.DataFrame,
+                         arm_prefix: str,
+                         torso_threshold_deg: float = 30.0,
+                         epsilon: float = 1e-6) -> List[Dict]:
+    """Reference: the original loop-based rep_aggregator._detect_reps_for_arm."""
+    state_col = f"{arm_prefix}_state"
+    angle_raw_col = f"{arm_prefix}_angle_raw_deg"
+    aligned_col = f"{arm_prefix}_aligned"
+    torso_col = f"{arm_prefix}_torso_angle_deg"
+    shoulder_x_col = f"{arm_prefix}_shoulder_x"
+    torso_height_col = f"{arm_prefix}_torso_height"
+
+    # Prepare series
+    time_s = _coerce_numeric(df.get("time_s", pd.Series(index=df.index, dtype=float)))
+    states = df[state_col].astype(str).fillna("unknown").values
+    angle_raw = _coerce_numeric(df.get(angle_raw_col, pd.Series(index=df.index, dtype=float))).values
+    aligned = _coerce_numeric(df.get(aligned_col, pd.Series(index=df.index, dtype=float))).fillna(1).astype(int).values
+    torso = _coerce_numeric(df.get(torso_col, pd.Series(index=df.index, dtype=float))).values
+
+    # For torso violation percentage, compute rolling 3-frame average over entire sequence
+    torso_series = pd.Series(torso)
+    torso_rolling_avg = torso_series.rolling(window=3, min_periods=3).mean().values
+    torso_violation_mask = torso_rolling_avg > torso_threshold_deg
+
+    reps: List[Dict] = []
+
+    i = 0
+    n = len(df)
+    while i < n - 1:
+        # Look for leaving DOWN: current down and next not down
+        if states[i] == "down" and states[i + 1] in ("transition", "up"):
+            start_idx = i
+
+            # Find first UP after start
+            j = i + 1
+            first_up_idx: Optional[int] = None
+            while j < n and states[j] != "down":
+                if states[j] == "up" and first_up_idx is None:
+                    first_up_idx = j
+                # After seeing an UP, look for a transition then a down to close
+                j += 1
+
+            # If we exited loop because we hit a down, j points to first down after leaving down
+            if j < n and states[j] == "down":
+                end_idx = j
+            else:
+                # No closing down; incomplete cycle
+                i += 1
+                continue
+
+            # Validate ordered sequence: must have reached up, and there must be a transition between up and final down
+            if first_up_idx is None:
+                i = end_idx  # Skip ahead to after this segment
+                continue
+
+            had_transition_after_up = any(s == "transition" for s in states[first_up_idx:end_idx])
+            if not had_transition_after_up:
+                i = end_idx
+                continue
+
+            # Window for this rep [start_idx, end_idx]
+            idx_slice = slice(start_idx, end_idx + 1)
+            window_len = end_idx - start_idx + 1
+            if window_len <= 1:
+                i = end_idx
+                continue
+
+            # Metrics
+            angles_win = angle_raw[idx_slice]
+            times_win = time_s[idx_slice]
+            aligned_win = aligned[idx_slice]
+            torso_violation_win = torso_violation_mask[idx_slice]
+            lost_pose_mask = np.isnan(angles_win)
+            
+            # Shoulder drift calculation (normalized by body scale)
+            shoulder_x = _coerce_numeric(df.get(shoulder_x_col, pd.Series(index=df.index, dtype=float))).values
+            torso_height = _coerce_numeric(df.get(torso_height_col, pd.Series(index=df.index, dtype=float))).values
+            if shoulder_x is not None and len(shoulder_x) > 0 and torso_height is not None and len(torso_height) > 0:
+                shoulder_x_win = shoulder_x[idx_slice]
+                torso_height_win = torso_height[idx_slice]
+                valid_mask = ~(np.isnan(shoulder_x_win) | np.isnan(torso_height_win) | (torso_height_win <= 0))
+                if np.sum(valid_mask) > 1:
+                    valid_x = shoulder_x_win[valid_mask]
+                    valid_h = torso_height_win[valid_mask]
+                    # Normalize x drift by torso height to be scale-invariant
+                    x_normalized = valid_x / valid_h
+                    drift_px = float(np.std(x_normalized))
+                else:
+                    drift_px = float("nan")
+            else:
+                drift_px = float("nan")
+
+            # ROM
+            finite_angles = angles_win[~np.isnan(angles_win)]
+            if finite_angles.size:
+                rom_deg = float(np.nanmax(finite_angles) - np.nanmin(finite_angles))
+            else:
+                rom_deg = float("nan")
+
+            # Tempo up: from leaving down (start_idx) to first_up_idx
+            tempo_up_s = float(time_s[first_up_idx] - time_s[start_idx]) if first_up_idx is not None else float("nan")
+            # Tempo down: from last up (use last occurrence between start and end) to end_idx
+            up_indices = np.where(states[start_idx:end_idx + 1] == "up")[0]
+            if up_indices.size:
+                last_up_idx = start_idx + int(up_indices[-1])
+                tempo_down_s = float(time_s[end_idx] - time_s[last_up_idx])
+            else:
+                tempo_down_s = float("nan")
+
+            tempo_asymmetry = float(
+                abs((tempo_up_s if np.isfinite(tempo_up_s) else 0.0) - (tempo_down_s if np.isfinite(tempo_down_s) else 0.0)) /
+                ((tempo_up_s if np.isfinite(tempo_up_s) else 0.0) + (tempo_down_s if np.isfinite(tempo_down_s) else 0.0) + epsilon)
+            )
+
+            # Roughness: RMS of first differences of angle
+            diffs = np.diff(finite_angles) if finite_angles.size > 1 else np.array([])
+            roughness = float(np.sqrt(np.mean(diffs ** 2))) if diffs.size else float("nan")
+
+            # Percentages
+            torso_violation_pct = float(np.nanmean(torso_violation_win.astype(float))) if window_len else float("nan")
+            align_off_pct = float(np.mean((aligned_win == 0).astype(float))) if window_len else float("nan")
+            lost_pose_pct = float(np.mean(lost_pose_mask.astype(float))) if window_len else float("nan")
+
+            # Mean FPS in window
+            duration = float(time_s[end_idx] - time_s[start_idx])
+            mean_fps = float((window_len - 1) / max(duration, epsilon)) if duration > 0 else float("nan")
+
+            reps.append({
+                "arm": arm_prefix,
+                "rep_start_time": float(time_s[start_idx]),
+                "rep_end_time": float(time_s[end_idx]),
+                "rom_deg": rom_deg,
+                "torso_violation_pct": torso_violation_pct,
+                "align_off_pct": align_off_pct,
+                "tempo_up_s": tempo_up_s,
+                "tempo_down_s": tempo_down_s,
+                "tempo_asymmetry": tempo_asymmetry,
+                "roughness": roughness,
+                "lost_pose_pct": lost_pose_pct,
+                "mean_fps": mean_fps,
+                "shoulder_drift_px": drift_px,
+            })
+
+            # Advance index to end of this rep to avoid overlapping detection
+            i = end_idx
+        i += 1
+
+    return reps
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vectorized rep segmentation against the original loop")
+    parser.add_argument("--frames", type=int, default=100_000, help="Frames per synthetic timeline")
+    parser.add_argument("--noise", type=float, default=0.05, help="Fraction of frames with a random state")
+    parser.add_argument("--seeds", type=int, default=5, help="Number of timelines")
+    args = parser.parse_args()
+
+    all_same = True
+    legacy_total = vector_total = 0.0
+    for seed in range(args.seeds):
+        df = synthetic_timeline(args.frames, args.noise, seed=seed)
+        for arm in ("left", "right"):
+            t0 = time.perf_counter()
+            expected = detect_reps_legacy(df, arm)
+            t1 = time.perf_counter()
+            actual = _detect_reps_for_arm(df, arm)
+            t2 = time.perf_counter()
+            legacy_total += t1 - t0
+            vector_total += t2 - t1
+            same = same_reps(expected, actual)
+            all_same &= same
+            print(f"seed={seed} {arm:5s} reps={len(actual):5d} legacy={1000 * (t1 - t0):8.1f}ms "
+                  f"vectorized={1000 * (t2 - t1):7.1f}ms {'identical' if same else 'MISMATCH'}")
+
+    print(f"\nTotal: legacy {legacy_total:.2f}s, vectorized {vector_total:.2f}s "
+          f"({legacy_total / max(vector_total, 1e-9):.0f}x)")
+    print("All outputs identical" if all_same else "❌ Outputs differ")
+    return 0 if all_same else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+"""
+Latency benchmark: sklearn RandomForestClassifier vs. the flattened
+CompiledForest for every joblib model under models/.
+
+Usage:
+  python benchmark_rf_inference.py [models_dir] [--repeats N] [--batch N]
+
+For each model it:
+  - checks that predict_proba is bit-identical on random feature vectors
+    drawn around the model's own split thresholds (incl. NaNs)
+  - times single-row inference the way the analyzer used to do it
+    (one-row DataFrame + predict + predict_proba) vs. the compiled path
+  - times a batch of rows through both
+"""
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from rf_inference import CompiledForest
+
+
+def _sample_inputs(model, n_rows: int, seed: int = 0) -> np.ndarray:
+    """Random vectors whose columns land near the thresholds the trees split on."""
+    rng = np.random.default_rng(seed)
+    feats, thr = [], []
+    for est in model.estimators_:
+        t = est.tree_
+        internal = t.feature >= 0
+        feats.append(t.feature[internal])
+        thr.append(t.threshold[internal])
+    feats = np.concatenate(feats)
+    thr = np.concatenate(thr)
+
+    X = np.empty((n_rows, model.n_features_in_))
+    for j in range(model.n_features_in_):
+        t = thr[feats == j]
+        if t.size:
+            jitter = rng.normal(0.0, (t.std() or 1.0) * 0.05, n_rows)
+            X[:, j] = rng.choice(t, n_rows) + jitter
+        else:
+            X[:, j] = rng.normal(size=n_rows)
+    X[::11, rng.integers(0, model.n_features_in_)] = np.nan
+    return X
+
+
+def _time(fn, repeats: int) -> float:
+    """Median wall time per call in milliseconds."""
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return float(np.median(samples))
+
+
+def benchmark_model(path: Path, repeats: int = 200, batch: int = 256):
+    model = joblib.load(path)
+    compiled = CompiledForest.from_sklearn(model)
+    columns = list(model.feature_names_in_)
+
+    X_check = _sample_inputs(model, 5000)
+    identical = np.array_equal(model.predict_proba(X_check), compiled.predict_proba(X_check))
+    identical &= np.array_equal(model.predict(X_check), compiled.predict(X_check))
+
+    row = X_check[1]
+    X_batch = X_check[:batch]
+
+    def sklearn_single():
+        X = pd.DataFrame([dict(zip(columns, row))])[columns].fillna(0)
+        model.predict(X)
+        model.predict_proba(X)
+
+    def compiled_single():
+        compiled.predict_proba(row)
+
+    def sklearn_batch():
+        model.predict_proba(pd.DataFrame(X_batch, columns=columns))
+
+    def compiled_batch():
+        compiled.predict_proba(X_batch)
+
+    return {
+        'model': path.name,
+        'features': model.n_features_in_,
+        'trees': compiled.n_estimators,
+        'nodes': int(compiled.left.shape[0]),
+        'identical': bool(identical),
+        'sklearn_1_ms': _time(sklearn_single, repeats),
+        'compiled_1_ms': _time(compiled_single, repeats),
+        f'sklearn_{batch}_ms': _time(sklearn_batch, max(repeats // 10, 5)),
+        f'compiled_{batch}_ms': _time(compiled_batch, max(repeats // 10, 5)),
+    }
+
+
+def main(argv):
+    warnings.filterwarnings('ignore')  # sklearn version-mismatch warnings on unpickle
+    args = list(argv[1:])
+    repeats, batch = 200, 256
+    if '--repeats' in args:
+        i = args.index('--repeats')
+        repeats = int(args[i + 1])
+        del args[i:i + 2]
+    if '--batch' in args:
+        i = args.index('--batch')
+        batch = int(args[i + 1])
+        del args[i:i + 2]
+    models_dir = Path(args[0]) if args else Path(__file__).resolve().parent.parent / 'models'
+
+    paths = sorted(models_dir.glob('*.joblib'))
+    if not paths:
+        print(f"No .joblib models found in {models_dir}")
+        return 1
+
+    rows = []
+    for path in paths:
+        print(f"Benchmarking {path.name} ...")
+        rows.append(benchmark_model(path, repeats=repeats, batch=batch))
+
+    df = pd.DataFrame(rows)
+    df['speedup_1'] = (df['sklearn_1_ms'] / df['compiled_1_ms']).round(1)
+    df[f'speedup_{batch}'] = (df[f'sklearn_{batch}_ms'] / df[f'compiled_{batch}_ms']).round(1)
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(df.round(3).to_string(index=False))
+
+    if not df['identical'].all():
+        print("❌ Compiled probabilities differ from sklearn for:", ', '.join(df.loc[~df['identical'], 'model']))
+        return 1
+    print("✅ Compiled probabilities are identical to sklearn for all models")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,116 @@
+"""
+Replay check for stored exercise results.
+
+For every <results_dir>/<id>/timeline.csv, replays the timeline with the
+fps and perspective thresholds recorded in metadata.json (as the rescore
+endpoint does) and reports:
+  - the encoding the timeline was written in
+  - whether the replayed rep counts match the stored results
+  - whether the same timeline re-encoded as UTF-8 (with BOM) and cp1254
+    replays identically, so the reader does not depend on the platform
+    that wrote the file
+  - replay time
+
+Timelines written before the *_arm_visible columns may differ from the
+stored counts (see timeline_replay.py); decode failures and encoding
+mismatches are errors.
+
+Usage:
+  python benchmark_timeline_replay.py [results_dir] [--csv out.csv]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from rep_aggregator import _sniff_encoding
+from timeline_replay import load_timeline, replay_timeline
+
+
+COUNT_KEYS = ('totalReps', 'correctReps', 'leftReps', 'rightReps')
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'exerciseevaluation', 'results')
+
+
+def stored_replay_params(metadata_path):
+    """(params, fps, stored results) the rescore endpoint would start from."""
+    if not os.path.exists(metadata_path):
+        return {}, None, {}
+    with open(metadata_path, 'r') as f:
+        results = json.load(f).get('results', {})
+    thresholds = (results.get('perspective') or {}).get('thresholds', {})
+    params = {name: thresholds[key] for key, name in (
+        ('arm_up', 'angle_threshold_up'), ('arm_down', 'angle_threshold_down'),
+        ('torso', 'torso_angle_threshold'), ('min_hold_time', 'min_hold_time')) if key in thresholds}
+    return params, results.get('fps'), results
+
+
+def _counts(replayed):
+    return tuple(replayed[key] for key in COUNT_KEYS)
+
+
+def check_result(result_dir, tmp_dir):
+    csv_path = os.path.join(result_dir, 'timeline.csv')
+    params, fps, stored = stored_replay_params(os.path.join(result_dir, 'metadata.json'))
+    row = {'id': os.path.basename(result_dir), 'encoding': _sniff_encoding(csv_path)}
+    try:
+        df = load_timeline(csv_path)
+        replayed = replay_timeline(df, params, fps=fps)
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+        return row
+    row['frames'] = replayed['frames']
+    row['ms'] = replayed['elapsedMs']
+    row['reps'] = replayed['totalReps']
+    row['stored_reps'] = stored.get('totalReps')
+    row['counts_match'] = all(stored.get(key) == replayed[key] for key in COUNT_KEYS)
+
+    # Same rows written in each encoding the analyzer may have used
+    for encoding in ('utf-8-sig', 'cp1254'):
+        path = os.path.join(tmp_dir, f"{row['id']}.{encoding}.csv")
+        df.to_csv(path, index=False, encoding=encoding, errors='replace')
+        try:
+            same = _counts(replay_timeline(load_timeline(path), params, fps=fps)) == _counts(replayed)
+        except Exception as e:
+            row['error'] = f"{encoding} copy: {type(e).__name__}: {e}"
+            same = False
+        row[f'same_as_{encoding}'] = same
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay stored exercise results and check encodings/counts')
+    parser.add_argument('results_dir', nargs='?', default=DEFAULT_RESULTS_DIR)
+    parser.add_argument('--csv', default=None, help='Write the per-result table here')
+    args = parser.parse_args()
+
+    result_dirs = sorted(os.path.join(args.results_dir, name) for name in os.listdir(args.results_dir)
+                         if os.path.exists(os.path.join(args.results_dir, name, 'timeline.csv')))
+    if not result_dirs:
+        print(f"No timelines in {args.results_dir}")
+        return 1
+
+    # The counter prints every rep; keep the report readable
+    with tempfile.TemporaryDirectory() as tmp_dir, contextlib.redirect_stdout(io.StringIO()):
+        table = pd.DataFrame([check_result(result_dir, tmp_dir) for result_dir in result_dirs])
+    for column in ('error', 'same_as_utf-8-sig', 'same_as_cp1254', 'counts_match', 'ms'):
+        if column not in table.columns:
+            table[column] = None
+    print(table.to_string(index=False))
+
+    failed = table['error'].notna() | ~table[['same_as_utf-8-sig', 'same_as_cp1254']].fillna(False).all(axis=1)
+    ok = table[table['error'].isna()]
+    print(f"\n{len(table)} timelines: {int(failed.sum())} failed, "
+          f"{int(ok['counts_match'].sum())}/{len(ok)} match the stored counts, "
+          f"encodings {table['encoding'].value_counts().to_dict()}, "
+          f"median replay {ok['ms'].median():.1f} ms")
+    if args.csv:
+        table.to_csv(args.csv, index=False)
+    return 1 if failed.any() else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
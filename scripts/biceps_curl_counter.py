@@ -7,6 +7,15 @@ import os
 from datetime import datetime
 
 
+# Column order of a rep record (see BicepsCurlCounter._rep_record); names and
+# units match the per-rep table of rep_aggregator (fractions are 0-1)
+REP_RECORD_FIELDS = [
+    'rep', 'arm', 'arm_rep', 'correct', 'rep_start_time', 'rep_end_time',
+    'rom_deg', 'min_angle_deg', 'max_angle_deg', 'tempo_up_s', 'tempo_down_s',
+    'torso_violation_pct', 'align_off_pct', 'max_torso_angle_deg', 'frames', 'reasons',
+]
+
+
 class BicepsCurlCounter:
     """
     Biceps curl repetition counter using pose detection
@@ -136,6 +145,12 @@ class BicepsCurlCounter:
         # Rep cycle index tracking (which rep cycle is this frame part of)
         self.left_cycle_index = 0
         self.right_cycle_index = 0
+
+        # One summary record per counted rep, built at _increment_rep time
+        self.rep_records = []
+        # Per-rep accumulators from the DOWN->TRANSITION/UP start to the return to DOWN
+        self.left_rep_tracker = None
+        self.right_rep_tracker = None
         
         # Debug mode
         self.debug_mode = True
@@ -148,8 +163,11 @@ class BicepsCurlCounter:
                left_alignment=True, right_alignment=True,
                left_torso_angle=0, right_torso_angle=0,
                left_arm_visible=True, right_arm_visible=True,
-               left_confidence=1.0, right_confidence=1.0):
-        current_time = time.time()
+               left_confidence=1.0, right_confidence=1.0,
+               timestamp=None):
+        # Dwell (min_hold_time) is measured on `timestamp` when given (video/stream
+        # time in seconds) so replays faster or slower than real time behave the same
+        current_time = time.time() if timestamp is None else timestamp
 
         # Store visibility information
         self.left_arm_visible = left_arm_visible
@@ -267,6 +285,17 @@ class BicepsCurlCounter:
             if angle >= (self.angle_threshold_down - self.hysteresis):
                 self.right_hit_down = True
 
+        # Per-rep torso/alignment frame counts for the rep record
+        tracker = self.left_rep_tracker if arm == 'left' else self.right_rep_tracker
+        if tracker is not None:
+            tracker['frames'] += 1
+            if torso_angle is not None:
+                tracker['max_torso'] = max(tracker['max_torso'], torso_angle)
+                if torso_angle > self.torso_angle_threshold:
+                    tracker['torso_frames'] += 1
+            if not is_aligned:
+                tracker['misaligned_frames'] += 1
+
         # Simple state determination based on RAW angle thresholds:
         # - > 160°: DOWN
         # - 50° - 160°: TRANSITION
@@ -335,6 +364,14 @@ class BicepsCurlCounter:
                 if state == "up" and new_state == "transition" and self.right_reached_up_in_cycle:
                     self.right_descending_to_down = True
 
+            # Tempo marks: first arrival at UP, last departure from UP
+            tracker = self.left_rep_tracker if arm == 'left' else self.right_rep_tracker
+            if tracker is not None:
+                if new_state == "up" and tracker['first_up'] is None:
+                    tracker['first_up'] = current_time
+                if state == "up" and new_state != "up":
+                    tracker['last_up'] = current_time
+
             # Rep-valid başlangıç noktası: DOWN->TRANSITION or DOWN->UP (start of new rep cycle)
             if state == "down" and new_state in ("transition", "up"):
                 if arm == 'left':
@@ -351,6 +388,7 @@ class BicepsCurlCounter:
                     self.left_torso_violation_during_transition = False
                     # Reset torso angles sliding window for new cycle
                     self.left_torso_angles = []
+                    self.left_rep_tracker = self._new_rep_tracker(current_time)
                     # Do not increment cycle index here; increment only when cycle completes (return to DOWN)
                 else:
                     self.right_rep_is_valid = True
@@ -366,6 +404,7 @@ class BicepsCurlCounter:
                     self.right_torso_violation_during_transition = False
                     # Reset torso angles sliding window for new cycle
                     self.right_torso_angles = []
+                    self.right_rep_tracker = self._new_rep_tracker(current_time)
                     # Do not increment cycle index here; increment only when cycle completes (return to DOWN)
 
             # Rep tamamlama: UP->DOWN (DOWN'a kilitlenince say)
@@ -450,7 +489,7 @@ class BicepsCurlCounter:
                         should_count = True
 
                 if should_count:
-                    self._increment_rep(arm)
+                    self._increment_rep(arm, current_time)
                     if arm == 'left':
                         self.left_cycle_index += 1
                     else:
@@ -470,9 +509,11 @@ class BicepsCurlCounter:
                 if arm == 'left':
                     self.left_angle_history = []
                     self.left_torso_angles = []
+                    self.left_rep_tracker = None
                 else:
                     self.right_angle_history = []
                     self.right_torso_angles = []
+                    self.right_rep_tracker = None
 
                 # Console summary (ALWAYS prints one line)
                 if arm == 'left':
@@ -513,13 +554,14 @@ class BicepsCurlCounter:
             else:
                 self.right_pending_state, self.right_pending_since = pending_state, pending_since
     
-    def _increment_rep(self, arm):
+    def _increment_rep(self, arm, end_time=None):
         """
-        Increment rep count for specified arm
+        Increment rep count for specified arm and append its rep record
         Note: Total reps always increments, correct reps only increment if form is valid
         
         Args:
             arm: 'left' or 'right'
+            end_time: time the arm returned to DOWN (same clock as update())
         """
         # Always increment total reps (both correct and incorrect)
         self.total_reps += 1
@@ -537,10 +579,61 @@ class BicepsCurlCounter:
             else:
                 self.right_incorrect_reps += 1
         
+        self.rep_records.append(self._rep_record(arm, end_time))
+
         # Print rep summary
         status = "CORRECT" if (arm == 'left' and self.left_rep_is_valid) or (arm == 'right' and self.right_rep_is_valid) else "INCORRECT"
         #print(f"🎯 Rep {self.total_reps} ({status}): {arm.capitalize()} arm 🎯")
     
+    @staticmethod
+    def _new_rep_tracker(start_time):
+        return {'start': start_time, 'first_up': None, 'last_up': None,
+                'frames': 0, 'torso_frames': 0, 'misaligned_frames': 0, 'max_torso': 0.0}
+
+    def _rep_record(self, arm, end_time):
+        """
+        Summary of the rep that just completed on `arm` (fields: REP_RECORD_FIELDS).
+
+        Tempo up is rep start -> first UP, tempo down is last UP -> DOWN; torso
+        and alignment are the fraction of the rep's frames over the torso
+        threshold / misaligned. Unavailable values are None.
+        """
+        if arm == 'left':
+            tracker = self.left_rep_tracker
+            min_angle, max_angle = self.left_min_angle_in_rep, self.left_max_angle_in_rep
+            valid, reasons, arm_rep = self.left_rep_is_valid, self.left_last_rep_reasons, self.left_reps
+        else:
+            tracker = self.right_rep_tracker
+            min_angle, max_angle = self.right_min_angle_in_rep, self.right_max_angle_in_rep
+            valid, reasons, arm_rep = self.right_rep_is_valid, self.right_last_rep_reasons, self.right_reps
+        tracker = tracker or self._new_rep_tracker(None)
+
+        def elapsed(start, end):
+            return round(end - start, 3) if start is not None and end is not None else None
+
+        def fraction(count):
+            return round(count / tracker['frames'], 4) if tracker['frames'] else None
+
+        has_rom = min_angle is not None and max_angle is not None
+        return {
+            'rep': self.total_reps,
+            'arm': arm,
+            'arm_rep': arm_rep,
+            'correct': bool(valid),
+            'rep_start_time': round(tracker['start'], 3) if tracker['start'] is not None else None,
+            'rep_end_time': round(end_time, 3) if end_time is not None else None,
+            'rom_deg': round(max_angle - min_angle, 2) if has_rom else None,
+            'min_angle_deg': round(min_angle, 2) if has_rom else None,
+            'max_angle_deg': round(max_angle, 2) if has_rom else None,
+            'tempo_up_s': elapsed(tracker['start'], tracker['first_up']),
+            'tempo_down_s': elapsed(tracker['last_up'], end_time),
+            'torso_violation_pct': fraction(tracker['torso_frames']),
+            'align_off_pct': fraction(tracker['misaligned_frames']),
+            'max_torso_angle_deg': round(float(tracker['max_torso']), 2),
+            'frames': tracker['frames'],
+            'reasons': list(reasons),
+        }
+
     def get_status(self):
         """
         Get current status of rep counter
@@ -638,6 +731,10 @@ class BicepsCurlCounter:
         # Reset cycle indices
         self.left_cycle_index = 0
         self.right_cycle_index = 0
+        # Reset rep records
+        self.rep_records = []
+        self.left_rep_tracker = None
+        self.right_rep_tracker = None
 
         print("Rep counter reset!")
 
@@ -16,6 +16,7 @@ Usage:
 
 import os
 import sys
+import time
 import argparse
 import cv2
 import numpy as np
@@ -24,6 +25,37 @@ import joblib
 import mediapipe as mp
 from pathlib import Path
 
+from pose_pool import iter_pose_pool
+from rf_inference import CompiledForest
+
+
+# Bump when extract_features_from_video changes so cached features are recomputed
+EXTRACTOR_VERSION = "1"
+
+# MediaPipe Pose settings used for feature extraction (training used the same)
+POSE_OPTIONS = dict(
+    static_image_mode=False,
+    model_complexity=1,
+    smooth_landmarks=True,
+    enable_segmentation=False,
+    min_detection_confidence=0.5,
+    min_tracking_confidence=0.5
+)
+
+# Landmark indices
+LEFT_SHOULDER = mp.solutions.pose.PoseLandmark.LEFT_SHOULDER.value
+LEFT_ELBOW = mp.solutions.pose.PoseLandmark.LEFT_ELBOW.value
+LEFT_WRIST = mp.solutions.pose.PoseLandmark.LEFT_WRIST.value
+LEFT_HIP = mp.solutions.pose.PoseLandmark.LEFT_HIP.value
+
+RIGHT_SHOULDER = mp.solutions.pose.PoseLandmark.RIGHT_SHOULDER.value
+RIGHT_ELBOW = mp.solutions.pose.PoseLandmark.RIGHT_ELBOW.value
+RIGHT_WRIST = mp.solutions.pose.PoseLandmark.RIGHT_WRIST.value
+RIGHT_HIP = mp.solutions.pose.PoseLandmark.RIGHT_HIP.value
+
+# One Pose graph per batch worker process, created by _init_worker
+_worker_pose = None
+
 
 class BicepsCurlFormPredictor:
     """Predicts biceps curl form quality using a trained RandomForest model."""
@@ -53,6 +85,7 @@ class BicepsCurlFormPredictor:
         print(f"Loading model from: {self.model_path}")
         self.model = joblib.load(self.model_path)
         print(f"✅ Model loaded successfully!")
+        self._forest = None  # CompiledForest for per-tree probabilities, built on first use
         
         # Expected feature columns (from the augmented model)
         # Uses 17 separate left/right features for better generalization
@@ -126,7 +159,7 @@ class BicepsCurlFormPredictor:
         
         return BicepsCurlFormPredictor.calculate_angle(vertical_point, shoulder, hip)
     
-    def extract_features_from_video(self, video_path, frame_skip=2, max_frames=None, min_frames=10):
+    def extract_features_from_video(self, video_path, frame_skip=2, max_frames=None, min_frames=10, pose=None):
         """
         Extract features from a biceps curl video.
         
@@ -135,219 +168,13 @@ class BicepsCurlFormPredictor:
             frame_skip (int): Process every Nth frame (for performance)
             max_frames (int, optional): Maximum frames to process (None = all)
             min_frames (int): Minimum frames required (returns None if less)
+            pose (optional): MediaPipe Pose graph to reuse (created per call if None)
         
         Returns:
             dict: Feature dictionary or None (if error)
         """
-        # Open video
-        cap = cv2.VideoCapture(str(video_path))
-        
-        if not cap.isOpened():
-            print(f"⚠️ Could not open video: {video_path}")
-            return None
-        
-        # Video properties
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        if fps <= 0:
-            fps = 30.0  # Default FPS
-        
-        # Frame-based measurements
-        elbow_left_angles = []
-        elbow_right_angles = []
-        
-        shoulder_left_x = []
-        shoulder_left_y = []
-        shoulder_right_x = []
-        shoulder_right_y = []
-        
-        shoulder_left_angles = []  # Shoulder angle (elbow-shoulder-hip)
-        shoulder_right_angles = []
-        
-        torso_angles = []  # Torso angle (relative to vertical)
-        
-        frame_count = 0
-        processed_frames = 0
-        
-        # Landmark indices
-        LEFT_SHOULDER = self.mp_pose.PoseLandmark.LEFT_SHOULDER.value
-        LEFT_ELBOW = self.mp_pose.PoseLandmark.LEFT_ELBOW.value
-        LEFT_WRIST = self.mp_pose.PoseLandmark.LEFT_WRIST.value
-        LEFT_HIP = self.mp_pose.PoseLandmark.LEFT_HIP.value
-        
-        RIGHT_SHOULDER = self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value
-        RIGHT_ELBOW = self.mp_pose.PoseLandmark.RIGHT_ELBOW.value
-        RIGHT_WRIST = self.mp_pose.PoseLandmark.RIGHT_WRIST.value
-        RIGHT_HIP = self.mp_pose.PoseLandmark.RIGHT_HIP.value
-        
-        with self.mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=1,
-            smooth_landmarks=True,
-            enable_segmentation=False,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        ) as pose:
-            
-            while cap.isOpened():
-                ret, frame = cap.read()
-                
-                if not ret:
-                    break
-                
-                frame_count += 1
-                
-                # Apply frame skip
-                if frame_count % frame_skip != 0:
-                    continue
-                
-                # Check max frames
-                if max_frames and processed_frames >= max_frames:
-                    break
-                
-                # Convert to RGB (MediaPipe expects RGB)
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Pose detection
-                results = pose.process(frame_rgb)
-                
-                if results.pose_landmarks:
-                    landmarks = results.pose_landmarks.landmark
-                    
-                    # Get landmark coordinates
-                    # Left side
-                    l_shoulder = [landmarks[LEFT_SHOULDER].x, landmarks[LEFT_SHOULDER].y]
-                    l_elbow = [landmarks[LEFT_ELBOW].x, landmarks[LEFT_ELBOW].y]
-                    l_wrist = [landmarks[LEFT_WRIST].x, landmarks[LEFT_WRIST].y]
-                    l_hip = [landmarks[LEFT_HIP].x, landmarks[LEFT_HIP].y]
-                    
-                    # Right side
-                    r_shoulder = [landmarks[RIGHT_SHOULDER].x, landmarks[RIGHT_SHOULDER].y]
-                    r_elbow = [landmarks[RIGHT_ELBOW].x, landmarks[RIGHT_ELBOW].y]
-                    r_wrist = [landmarks[RIGHT_WRIST].x, landmarks[RIGHT_WRIST].y]
-                    r_hip = [landmarks[RIGHT_HIP].x, landmarks[RIGHT_HIP].y]
-                    
-                    # === ELBOW ANGLES ===
-                    left_elbow_angle = self.calculate_angle(l_shoulder, l_elbow, l_wrist)
-                    elbow_left_angles.append(left_elbow_angle)
-                    
-                    right_elbow_angle = self.calculate_angle(r_shoulder, r_elbow, r_wrist)
-                    elbow_right_angles.append(right_elbow_angle)
-                    
-                    # === SHOULDER COORDINATES ===
-                    shoulder_left_x.append(landmarks[LEFT_SHOULDER].x)
-                    shoulder_left_y.append(landmarks[LEFT_SHOULDER].y)
-                    shoulder_right_x.append(landmarks[RIGHT_SHOULDER].x)
-                    shoulder_right_y.append(landmarks[RIGHT_SHOULDER].y)
-                    
-                    # === SHOULDER ANGLES (elbow-shoulder-hip) ===
-                    left_shoulder_angle = self.calculate_angle(l_elbow, l_shoulder, l_hip)
-                    shoulder_left_angles.append(left_shoulder_angle)
-                    
-                    right_shoulder_angle = self.calculate_angle(r_elbow, r_shoulder, r_hip)
-                    shoulder_right_angles.append(right_shoulder_angle)
-                    
-                    # === TORSO ANGLE ===
-                    mid_shoulder = [
-                        (l_shoulder[0] + r_shoulder[0]) / 2,
-                        (l_shoulder[1] + r_shoulder[1]) / 2
-                    ]
-                    mid_hip = [
-                        (l_hip[0] + r_hip[0]) / 2,
-                        (l_hip[1] + r_hip[1]) / 2
-                    ]
-                    
-                    torso_angle = self.calculate_vertical_angle(mid_shoulder, mid_hip)
-                    torso_angles.append(torso_angle)
-                    
-                    processed_frames += 1
-        
-        cap.release()
-        
-        # Check minimum frames
-        if processed_frames < min_frames:
-            print(f"⚠️ Insufficient frames ({processed_frames}): {video_path}")
-            return None
-        
-        # === CALCULATE FEATURES ===
-        features = {}
-        
-        # --- Video duration ---
-        features['video_duration'] = total_frames / fps
-        features['processed_frames'] = processed_frames
-        
-        # --- Elbow Angle Features ---
-        # Left elbow
-        features['elbow_left_min'] = np.min(elbow_left_angles)
-        features['elbow_left_max'] = np.max(elbow_left_angles)
-        features['elbow_left_range'] = features['elbow_left_max'] - features['elbow_left_min']
-        features['elbow_left_mean'] = np.mean(elbow_left_angles)
-        features['elbow_left_std'] = np.std(elbow_left_angles)
-        
-        # Right elbow
-        features['elbow_right_min'] = np.min(elbow_right_angles)
-        features['elbow_right_max'] = np.max(elbow_right_angles)
-        features['elbow_right_range'] = features['elbow_right_max'] - features['elbow_right_min']
-        features['elbow_right_mean'] = np.mean(elbow_right_angles)
-        features['elbow_right_std'] = np.std(elbow_right_angles)
-        
-        # Elbow symmetry
-        elbow_diffs = np.abs(np.array(elbow_left_angles) - np.array(elbow_right_angles))
-        features['elbow_lr_diff_mean'] = np.mean(elbow_diffs)
-        features['elbow_lr_diff_max'] = np.max(elbow_diffs)
-        
-        # --- Shoulder Stability Features ---
-        features['shoulder_left_x_std'] = np.std(shoulder_left_x)
-        features['shoulder_left_y_std'] = np.std(shoulder_left_y)
-        features['shoulder_right_x_std'] = np.std(shoulder_right_x)
-        features['shoulder_right_y_std'] = np.std(shoulder_right_y)
-        
-        # Shoulder angle features
-        features['shoulder_left_angle_min'] = np.min(shoulder_left_angles)
-        features['shoulder_left_angle_max'] = np.max(shoulder_left_angles)
-        features['shoulder_left_angle_range'] = features['shoulder_left_angle_max'] - features['shoulder_left_angle_min']
-        features['shoulder_left_angle_std'] = np.std(shoulder_left_angles)
-        
-        features['shoulder_right_angle_min'] = np.min(shoulder_right_angles)
-        features['shoulder_right_angle_max'] = np.max(shoulder_right_angles)
-        features['shoulder_right_angle_range'] = features['shoulder_right_angle_max'] - features['shoulder_right_angle_min']
-        features['shoulder_right_angle_std'] = np.std(shoulder_right_angles)
-        
-        # Shoulder symmetry
-        shoulder_angle_diffs = np.abs(np.array(shoulder_left_angles) - np.array(shoulder_right_angles))
-        features['shoulder_lr_diff_mean'] = np.mean(shoulder_angle_diffs)
-        
-        # --- Torso Stability Features ---
-        features['torso_angle_mean'] = np.mean(torso_angles)
-        features['torso_angle_std'] = np.std(torso_angles)
-        features['torso_angle_range'] = np.max(torso_angles) - np.min(torso_angles)
-        features['torso_angle_min'] = np.min(torso_angles)
-        features['torso_angle_max'] = np.max(torso_angles)
-        
-        # --- Angular Velocity Features (Kinematics) ---
-        # Left elbow angular velocity (frame-based derivative)
-        elbow_left_vel = np.diff(elbow_left_angles)
-        features['elbow_left_ang_vel_max'] = np.max(np.abs(elbow_left_vel)) if len(elbow_left_vel) > 0 else 0
-        features['elbow_left_ang_vel_std'] = np.std(elbow_left_vel) if len(elbow_left_vel) > 0 else 0
-        features['elbow_left_ang_vel_mean'] = np.mean(np.abs(elbow_left_vel)) if len(elbow_left_vel) > 0 else 0
-        
-        # Right elbow angular velocity
-        elbow_right_vel = np.diff(elbow_right_angles)
-        features['elbow_right_ang_vel_max'] = np.max(np.abs(elbow_right_vel)) if len(elbow_right_vel) > 0 else 0
-        features['elbow_right_ang_vel_std'] = np.std(elbow_right_vel) if len(elbow_right_vel) > 0 else 0
-        features['elbow_right_ang_vel_mean'] = np.mean(np.abs(elbow_right_vel)) if len(elbow_right_vel) > 0 else 0
-        
-        # --- Symmetric/Averaged Features (for symmetric_mean model) ---
-        # These features average left and right measurements
-        features['elbow_min_mean'] = (features['elbow_left_min'] + features['elbow_right_min']) / 2
-        features['elbow_max_mean'] = (features['elbow_left_max'] + features['elbow_right_max']) / 2
-        features['elbow_range_mean'] = (features['elbow_left_range'] + features['elbow_right_range']) / 2
-        features['elbow_mean_mean'] = (features['elbow_left_mean'] + features['elbow_right_mean']) / 2
-        features['elbow_std_mean'] = (features['elbow_left_std'] + features['elbow_right_std']) / 2
-        features['shoulder_y_std_mean'] = (features['shoulder_left_y_std'] + features['shoulder_right_y_std']) / 2
-        
-        return features
+        return extract_features_from_video(video_path, frame_skip=frame_skip, max_frames=max_frames,
+                                           min_frames=min_frames, pose=pose)
     
     def predict(self, video_path, frame_skip=2):
         """
@@ -382,17 +209,10 @@ class BicepsCurlFormPredictor:
         X = X.fillna(0)
         
         # Make prediction
-        prediction = self.model.predict(X)[0]
         probabilities = self.model.predict_proba(X)[0]
         
         # Prepare results
-        result = {
-            'prediction': int(prediction),
-            'label': 'Good Form ✅' if prediction == 1 else 'Bad Form ❌',
-            'confidence_good': float(probabilities[1]),
-            'confidence_bad': float(probabilities[0]),
-            'features': features
-        }
+        result = self._make_result(probabilities, features)
         
         # Print results
         print(f"\n📊 PREDICTION RESULTS:")
@@ -411,31 +231,204 @@ class BicepsCurlFormPredictor:
         
         return result
     
-    def predict_batch(self, video_paths, frame_skip=2):
+    def _probability_interval(self, features):
+        """
+        Good-form probability and its 95% confidence interval from the
+        spread of the individual tree votes.
+        
+        Returns:
+            tuple: (probability, low, high)
+        """
+        if self._forest is None:
+            self._forest = CompiledForest.from_sklearn(self.model)
+        X = pd.DataFrame([features])[self.feature_columns].fillna(0)
+        per_tree = self._forest.predict_tree_proba(X)[0, :, 1]
+        probability = float(per_tree.mean())
+        half_width = 1.96 * float(per_tree.std(ddof=1)) / np.sqrt(len(per_tree)) if len(per_tree) > 1 else 0.0
+        return probability, float(max(0.0, probability - half_width)), float(min(1.0, probability + half_width))
+    
+    def predict_anytime(self, video_path, time_budget_s=5.0, frame_skip=2, levels=4, tolerance=0.05,
+                        min_frames=5, pose=None):
+        """
+        Budgeted prediction: process the video coarse-to-fine and stop early
+        once the prediction settles.
+        
+        Pass k (of `levels`) runs pose on every (frame_skip * 2**(levels-1-k))th
+        frame, skipping frames earlier passes already measured, so the final
+        pass covers the same frames as extract_features_from_video. After
+        each pass the features and the good-form probability (with a
+        confidence interval from the per-tree votes) are re-estimated. The
+        loop stops when both interval bounds move less than `tolerance`
+        without the decision flipping, or when `time_budget_s` runs out (the
+        last completed pass is then used).
+        
+        Args:
+            video_path (str): Path to video file
+            time_budget_s (float): Wall-clock budget in seconds
+            frame_skip (int): Finest stride (as in predict)
+            levels (int): Number of stride halvings
+            tolerance (float): Max change of the interval bounds between passes
+            min_frames (int): Minimum frames with a pose for an estimate
+            pose (optional): MediaPipe Pose graph to reuse
+        
+        Returns:
+            dict: predict() fields plus probability_interval, fraction_used
+                (frames analysed / frames a full extraction analyses),
+                stride, passes, stopped ('stable' | 'budget' | 'complete')
+                and seconds; None if no estimate could be made
+        """
+        started = time.perf_counter()
+        deadline = started + time_budget_s
+        
+        cap = cv2.VideoCapture(str(video_path))
+        if not cap.isOpened():
+            print(f"⚠️ Could not open video: {video_path}")
+            return None
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if fps <= 0:
+            fps = 30.0  # Default FPS
+        
+        strides = [frame_skip * 2 ** k for k in range(levels - 1, -1, -1)
+                   if total_frames // (frame_skip * 2 ** k) >= min_frames] or [frame_skip]
+        
+        own_pose = pose is None
+        if own_pose:
+            pose = mp.solutions.pose.Pose(**POSE_OPTIONS)
+        
+        measured = {}  # frame number -> (33, 3) landmarks, or None without a pose
+        estimate = None
+        stopped = 'complete'
+        passes = 0
+        try:
+            for stride in strides:
+                pose.reset()
+                finished = _measure_frames(video_path, pose, stride, measured, deadline)
+                passes += 1
+                if not finished:
+                    stopped = 'budget'
+                    if estimate is not None:
+                        break
+                
+                attempted = [n for n in sorted(measured) if n % stride == 0]
+                samples = [measured[n] for n in attempted if measured[n] is not None]
+                if len(samples) < min_frames:
+                    if not finished:
+                        break
+                    continue
+                
+                features = compute_features_from_landmarks(np.stack(samples), total_frames, fps)
+                # Velocities are per processed-frame step; express them per frame_skip step
+                scale = stride / frame_skip
+                for name in features:
+                    if '_ang_vel_' in name:
+                        features[name] /= scale
+                features['processed_frames'] = len(samples) * scale
+                
+                interval = self._probability_interval(features)
+                previous = estimate
+                estimate = {'features': features, 'interval': interval, 'stride': stride,
+                            'frames': len(attempted)}
+                if not finished:
+                    break
+                if previous is not None:
+                    (p0, lo0, hi0), (p1, lo1, hi1) = previous['interval'], interval
+                    if (p0 >= 0.5) == (p1 >= 0.5) and abs(lo1 - lo0) <= tolerance and abs(hi1 - hi0) <= tolerance:
+                        stopped = 'stable' if stride != strides[-1] else 'complete'
+                        break
+        finally:
+            if own_pose:
+                pose.close()
+        
+        if estimate is None:
+            print(f"⚠️ Insufficient frames within the budget: {video_path}")
+            return None
+        
+        probability, low, high = estimate['interval']
+        result = self._make_result([1.0 - probability, probability], estimate['features'])
+        result.update({
+            'probability_interval': (low, high),
+            'fraction_used': min(1.0, estimate['frames'] / max(total_frames // frame_skip, 1)),
+            'stride': estimate['stride'],
+            'passes': passes,
+            'stopped': stopped,
+            'seconds': time.perf_counter() - started,
+        })
+        return result
+    
+    def _make_result(self, probabilities, features):
+        """Result dict for one video from its predict_proba row."""
+        prediction = self.model.classes_[int(np.argmax(probabilities))]
+        return {
+            'prediction': int(prediction),
+            'label': 'Good Form ✅' if prediction == 1 else 'Bad Form ❌',
+            'confidence_good': float(probabilities[1]),
+            'confidence_bad': float(probabilities[0]),
+            'features': features
+        }
+    
+    def iter_predict_batch(self, video_paths, frame_skip=2, workers=None):
+        """
+        Predict form quality for multiple videos in parallel, yielding each
+        result as soon as its video finishes (in completion order).
+        
+        Args:
+            video_paths (list): List of video file paths
+            frame_skip (int): Process every Nth frame
+            workers (int, optional): Worker processes (default: CPU count)
+        
+        Yields:
+            dict: video_path, video_name, seconds (extraction time) and the
+                prediction fields of predict(), or 'error' if the video failed
+        """
+        for video_path, features, seconds in iter_extract_features(video_paths, frame_skip, workers=workers):
+            result = {'video_path': str(video_path), 'video_name': Path(video_path).name, 'seconds': seconds}
+            if features is None:
+                result['error'] = 'Could not extract features'
+            else:
+                X = pd.DataFrame([features])[self.feature_columns].fillna(0)
+                result.update(self._make_result(self.model.predict_proba(X)[0], features))
+            yield result
+    
+    def predict_batch(self, video_paths, frame_skip=2, workers=None):
         """
         Predict form quality for multiple videos.
         
+        Features are extracted in parallel (one Pose graph per worker) and
+        all videos are scored with a single predict_proba call.
+        
         Args:
             video_paths (list): List of video file paths
             frame_skip (int): Process every Nth frame
+            workers (int, optional): Worker processes (default: CPU count)
         
         Returns:
-            list: List of prediction results
+            list: List of prediction results (input order, failed videos left out)
         """
-        results = []
-        
         print(f"\n🎯 Processing {len(video_paths)} videos...")
         print("=" * 60)
         
-        for i, video_path in enumerate(video_paths, 1):
-            print(f"\n[{i}/{len(video_paths)}] Processing: {Path(video_path).name}")
-            result = self.predict(video_path, frame_skip=frame_skip)
-            
-            if result:
+        extracted = {}
+        started = time.perf_counter()
+        for i, (video_path, features, seconds) in enumerate(
+                iter_extract_features(video_paths, frame_skip, workers=workers), 1):
+            status = '✅' if features is not None else '❌'
+            print(f"[{i}/{len(video_paths)}] {status} {Path(video_path).name} ({seconds:.1f}s)")
+            if features is not None:
+                extracted[str(video_path)] = (features, seconds)
+        
+        results = []
+        if extracted:
+            ordered = [str(v) for v in video_paths if str(v) in extracted]
+            X = pd.DataFrame([extracted[v][0] for v in ordered])[self.feature_columns].fillna(0)
+            for video_path, probabilities in zip(ordered, self.model.predict_proba(X)):
+                features, seconds = extracted[video_path]
                 results.append({
-                    'video_path': str(video_path),
+                    'video_path': video_path,
                     'video_name': Path(video_path).name,
-                    **result
+                    'seconds': seconds,
+                    **self._make_result(probabilities, features)
                 })
         
         # Print summary
@@ -450,12 +443,311 @@ class BicepsCurlFormPredictor:
             print(f"Total Videos: {len(results)}")
             print(f"Good Form: {good_count} ({good_count/len(results)*100:.1f}%)")
             print(f"Bad Form: {bad_count} ({bad_count/len(results)*100:.1f}%)")
+            print(f"Wall Time: {time.perf_counter() - started:.1f}s")
         else:
             print("No videos were successfully processed.")
         
         return results
 
 
+def extract_landmarks_from_video(video_path, frame_skip=2, max_frames=None, pose=None):
+    """
+    Run pose over the sampled frames of one video.
+    
+    Args:
+        video_path (str): Path to video file
+        frame_skip (int): Process every Nth frame (for performance)
+        max_frames (int, optional): Maximum frames to process (None = all)
+        pose (optional): MediaPipe Pose graph to reuse; the caller resets it
+            between videos. A new graph is created (and closed) if None.
+    
+    Returns:
+        dict: 'landmarks' (N, 33, 3) of the frames with a pose, 'total_frames',
+            'fps', 'width', 'height'; None if the video cannot be opened
+    """
+    mp_pose = mp.solutions.pose
+    
+    # Open video
+    cap = cv2.VideoCapture(str(video_path))
+
+    if not cap.isOpened():
+        print(f"⚠️ Could not open video: {video_path}")
+        return None
+
+    # Video properties
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    if fps <= 0:
+        fps = 30.0  # Default FPS
+
+    # Landmarks (x, y, z) of every frame with a pose; sized for all sampled frames
+    capacity = max_frames or (max(total_frames, 0) // frame_skip + 1)
+    landmarks = np.empty((capacity, 33, 3), dtype=np.float64)
+
+    frame_count = 0
+    processed_frames = 0
+
+    own_pose = pose is None
+    if own_pose:
+        pose = mp_pose.Pose(**POSE_OPTIONS)
+
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read()
+
+            if not ret:
+                break
+
+            frame_count += 1
+
+            # Apply frame skip
+            if frame_count % frame_skip != 0:
+                continue
+
+            # Check max frames
+            if max_frames and processed_frames >= max_frames:
+                break
+
+            # Convert to RGB (MediaPipe expects RGB)
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+            # Pose detection
+            results = pose.process(frame_rgb)
+
+            if results.pose_landmarks:
+                if processed_frames == len(landmarks):
+                    # CAP_PROP_FRAME_COUNT can under-report; grow geometrically
+                    landmarks = np.concatenate([landmarks, np.empty_like(landmarks)])
+                landmarks[processed_frames] = _landmark_array(results.pose_landmarks.landmark)
+                processed_frames += 1
+    finally:
+        if own_pose:
+            pose.close()
+
+    cap.release()
+
+    return {
+        'landmarks': landmarks[:processed_frames],
+        'total_frames': total_frames,
+        'fps': fps,
+        'width': width,
+        'height': height,
+    }
+
+
+def extract_features_from_video(video_path, frame_skip=2, max_frames=None, min_frames=10, pose=None):
+    """
+    Extract the form features of one video (no model needed, so worker
+    processes and feature caches can call it directly).
+    
+    Args:
+        video_path (str): Path to video file
+        frame_skip (int): Process every Nth frame (for performance)
+        max_frames (int, optional): Maximum frames to process (None = all)
+        min_frames (int): Minimum frames required (returns None if less)
+        pose (optional): MediaPipe Pose graph to reuse; the caller resets it
+            between videos. A new graph is created (and closed) if None.
+    
+    Returns:
+        dict: Feature dictionary or None (if error)
+    """
+    extracted = extract_landmarks_from_video(video_path, frame_skip=frame_skip, max_frames=max_frames, pose=pose)
+    if extracted is None:
+        return None
+
+    # Check minimum frames
+    processed_frames = len(extracted['landmarks'])
+    if processed_frames < min_frames:
+        print(f"⚠️ Insufficient frames ({processed_frames}): {video_path}")
+        return None
+
+    return compute_features_from_landmarks(extracted['landmarks'], extracted['total_frames'], extracted['fps'])
+
+
+def _measure_frames(video_path, pose, stride, measured, deadline):
+    """
+    Run pose on every stride-th frame not already in `measured` (frame
+    number -> (33, 3) landmarks or None), in time order.
+    
+    Returns:
+        bool: True if the end of the video was reached, False if the
+            deadline (time.perf_counter value) passed first
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    frame_count = 0
+    try:
+        while True:
+            frame_count += 1
+            if frame_count % stride != 0 or frame_count in measured:
+                # grab() skips the retrieve/colour conversion of unused frames
+                if not cap.grab():
+                    return True
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                return True
+            if time.perf_counter() > deadline:
+                return False
+            results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            measured[frame_count] = _landmark_array(results.pose_landmarks.landmark) if results.pose_landmarks else None
+    finally:
+        cap.release()
+
+
+def _landmark_array(landmarks):
+    """MediaPipe landmark list -> 33 (x, y, z) rows of normalized coordinates."""
+    return [(lm.x, lm.y, lm.z) for lm in landmarks]
+
+
+def _angles(point_a, point_b, point_c):
+    """BicepsCurlFormPredictor.calculate_angle over (N, 2) point arrays."""
+    ba = point_a - point_b
+    bc = point_c - point_b
+    cosine_angle = (ba * bc).sum(axis=1) / (np.linalg.norm(ba, axis=1) * np.linalg.norm(bc, axis=1) + 1e-8)
+    return np.degrees(np.arccos(np.clip(cosine_angle, -1.0, 1.0)))
+
+
+def compute_features_from_landmarks(landmarks, total_frames, fps):
+    """
+    Feature dictionary (the contract every stored model was trained on) from
+    the landmarks of the processed frames.
+    
+    Args:
+        landmarks: (N, 33, 3) MediaPipe landmarks (normalized x, y, z) of the
+            frames with a detected pose, in time order
+        total_frames (int): Frames in the video
+        fps (float): Video frame rate
+    
+    Returns:
+        dict: Feature dictionary
+
+    Values equal the former per-frame loop only to within float rounding
+    (differences up to ~4e-11 from summation order), so compare cached or
+    recomputed features with a tolerance, not bitwise.
+    """
+    xy = np.asarray(landmarks, dtype=np.float64)[:, :, :2]
+    processed_frames = len(xy)
+    l_shoulder, l_elbow, l_wrist, l_hip = (xy[:, i] for i in (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST, LEFT_HIP))
+    r_shoulder, r_elbow, r_wrist, r_hip = (xy[:, i] for i in (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST, RIGHT_HIP))
+    
+    # Rows: left, right
+    elbow = np.stack([_angles(l_shoulder, l_elbow, l_wrist), _angles(r_shoulder, r_elbow, r_wrist)])
+    shoulder_angle = np.stack([_angles(l_elbow, l_shoulder, l_hip), _angles(r_elbow, r_shoulder, r_hip)])
+    # Rows: left x, left y, right x, right y
+    shoulder_xy = np.ascontiguousarray(np.concatenate([l_shoulder, r_shoulder], axis=1).T)
+    
+    # Torso angle: mid-shoulder -> mid-hip line against the vertical
+    mid_shoulder = (l_shoulder + r_shoulder) / 2
+    mid_hip = (l_hip + r_hip) / 2
+    vertical_point = np.column_stack([mid_shoulder[:, 0], mid_shoulder[:, 1] - 1.0])
+    torso = _angles(vertical_point, mid_shoulder, mid_hip)
+    
+    elbow_min, elbow_max = elbow.min(axis=1), elbow.max(axis=1)
+    elbow_mean, elbow_std = elbow.mean(axis=1), elbow.std(axis=1)
+    elbow_diffs = np.abs(elbow[0] - elbow[1])
+    shoulder_xy_std = shoulder_xy.std(axis=1)
+    shoulder_min, shoulder_max = shoulder_angle.min(axis=1), shoulder_angle.max(axis=1)
+    shoulder_std = shoulder_angle.std(axis=1)
+    torso_min, torso_max = torso.min(), torso.max()
+    
+    # Angular velocity (frame-based derivative)
+    velocity = np.diff(elbow, axis=1)
+    if velocity.shape[1] > 0:
+        abs_velocity = np.abs(velocity)
+        vel_max, vel_std, vel_mean = abs_velocity.max(axis=1), velocity.std(axis=1), abs_velocity.mean(axis=1)
+    else:
+        vel_max = vel_std = vel_mean = (0, 0)
+    
+    features = {
+        'video_duration': total_frames / fps,
+        'processed_frames': processed_frames,
+    }
+    for side, i in (('left', 0), ('right', 1)):
+        features[f'elbow_{side}_min'] = elbow_min[i]
+        features[f'elbow_{side}_max'] = elbow_max[i]
+        features[f'elbow_{side}_range'] = elbow_max[i] - elbow_min[i]
+        features[f'elbow_{side}_mean'] = elbow_mean[i]
+        features[f'elbow_{side}_std'] = elbow_std[i]
+    features['elbow_lr_diff_mean'] = elbow_diffs.mean()
+    features['elbow_lr_diff_max'] = elbow_diffs.max()
+    
+    features['shoulder_left_x_std'] = shoulder_xy_std[0]
+    features['shoulder_left_y_std'] = shoulder_xy_std[1]
+    features['shoulder_right_x_std'] = shoulder_xy_std[2]
+    features['shoulder_right_y_std'] = shoulder_xy_std[3]
+    for side, i in (('left', 0), ('right', 1)):
+        features[f'shoulder_{side}_angle_min'] = shoulder_min[i]
+        features[f'shoulder_{side}_angle_max'] = shoulder_max[i]
+        features[f'shoulder_{side}_angle_range'] = shoulder_max[i] - shoulder_min[i]
+        features[f'shoulder_{side}_angle_std'] = shoulder_std[i]
+    features['shoulder_lr_diff_mean'] = np.abs(shoulder_angle[0] - shoulder_angle[1]).mean()
+    
+    features['torso_angle_mean'] = torso.mean()
+    features['torso_angle_std'] = torso.std()
+    features['torso_angle_range'] = torso_max - torso_min
+    features['torso_angle_min'] = torso_min
+    features['torso_angle_max'] = torso_max
+    
+    for side, i in (('left', 0), ('right', 1)):
+        features[f'elbow_{side}_ang_vel_max'] = vel_max[i]
+        features[f'elbow_{side}_ang_vel_std'] = vel_std[i]
+        features[f'elbow_{side}_ang_vel_mean'] = vel_mean[i]
+    
+    # --- Symmetric/Averaged Features (for symmetric_mean model) ---
+    features['elbow_min_mean'] = (features['elbow_left_min'] + features['elbow_right_min']) / 2
+    features['elbow_max_mean'] = (features['elbow_left_max'] + features['elbow_right_max']) / 2
+    features['elbow_range_mean'] = (features['elbow_left_range'] + features['elbow_right_range']) / 2
+    features['elbow_mean_mean'] = (features['elbow_left_mean'] + features['elbow_right_mean']) / 2
+    features['elbow_std_mean'] = (features['elbow_left_std'] + features['elbow_right_std']) / 2
+    features['shoulder_y_std_mean'] = (features['shoulder_left_y_std'] + features['shoulder_right_y_std']) / 2
+    
+    return features
+
+
+def _init_worker():
+    global _worker_pose
+    _worker_pose = mp.solutions.pose.Pose(**POSE_OPTIONS)
+
+
+def _extract_in_worker(video_path, frame_skip, min_frames):
+    """Extract one video with the worker's Pose graph. Returns (features, seconds)."""
+    started = time.perf_counter()
+    # Drop tracking state from the previous video
+    _worker_pose.reset()
+    features = extract_features_from_video(video_path, frame_skip=frame_skip, max_frames=None,
+                                           min_frames=min_frames, pose=_worker_pose)
+    return features, time.perf_counter() - started
+
+
+def _extract_landmarks_in_worker(video_path, frame_skip):
+    """extract_landmarks_from_video with the worker's Pose graph. Returns (landmarks dict, seconds)."""
+    started = time.perf_counter()
+    _worker_pose.reset()
+    extracted = extract_landmarks_from_video(video_path, frame_skip=frame_skip, pose=_worker_pose)
+    return extracted, time.perf_counter() - started
+
+
+def iter_extract_features(video_paths, frame_skip=2, min_frames=5, workers=None):
+    """
+    Extract features for many videos in a pool of worker processes, each
+    reusing one Pose graph.
+    
+    Yields:
+        (video_path, features or None, seconds) in completion order
+    """
+    video_paths = {str(video_path): video_path for video_path in video_paths}
+    jobs = [(path, frame_skip, min_frames) for path in video_paths]
+    for (path, _, _), result, error in iter_pose_pool(_extract_in_worker, jobs, _init_worker, workers=workers):
+        if error is not None:
+            print(f"⚠️ Feature extraction failed for {Path(path).name}: {error}")
+            result = (None, 0.0)
+        features, seconds = result
+        yield video_paths[path], features, seconds
+
+
 def main():
     """Main entry point for the script."""
     parser = argparse.ArgumentParser(
@@ -497,6 +789,20 @@ Examples:
         help='Process every Nth frame (default: 2, higher = faster but less accurate)'
     )
     
+    parser.add_argument(
+        '--time-budget', '-t',
+        type=float,
+        default=None,
+        help='Single video: stop early once the prediction settles or after this many seconds'
+    )
+    
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=None,
+        help='Worker processes for multiple videos (default: CPU count)'
+    )
+    
     parser.add_argument(
         '--output', '-o',
         default=None,
@@ -512,7 +818,16 @@ Examples:
         # Process videos
         if len(args.video) == 1:
             # Single video
-            result = predictor.predict(args.video[0], frame_skip=args.frame_skip)
+            if args.time_budget:
+                result = predictor.predict_anytime(args.video[0], time_budget_s=args.time_budget,
+                                                   frame_skip=args.frame_skip)
+                if result:
+                    low, high = result['probability_interval']
+                    print(f"\n📊 {result['label']}: {result['confidence_good']*100:.1f}% good "
+                          f"[{low*100:.1f}-{high*100:.1f}%] using {result['fraction_used']*100:.0f}% of the video "
+                          f"in {result['seconds']:.1f}s ({result['stopped']})")
+            else:
+                result = predictor.predict(args.video[0], frame_skip=args.frame_skip)
             
             if result and args.output:
                 df = pd.DataFrame([{
@@ -524,7 +839,7 @@ Examples:
                 print(f"\n💾 Results saved to: {args.output}")
         else:
             # Multiple videos
-            results = predictor.predict_batch(args.video, frame_skip=args.frame_skip)
+            results = predictor.predict_batch(args.video, frame_skip=args.frame_skip, workers=args.workers)
             
             if results and args.output:
                 df = pd.DataFrame(results)
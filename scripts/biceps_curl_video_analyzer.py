@@ -1,13 +1,165 @@
 import cv2
 import os
+import sys
 import csv
 import math
+from functools import lru_cache
 import numpy as np
-import joblib
 import pandas as pd
-from pathlib import Path
 from pose_detection import PoseDetector
 from biceps_curl_counter import BicepsCurlCounter
+from model_registry import get_registry
+
+# Bump when the timeline CSV contents change so batch outputs get regenerated
+ANALYZER_VERSION = "2.1"
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_ROOT)  # for utils/
+from utils.perspective_thresholds import load_thresholds, pick_thresholds_for_video, validate_counter_thresholds
+
+# Tuned per-perspective counter thresholds (threshold_tuner.py output); skipped when absent.
+# perspective_threshold_fitter.py output (angle statistics, no min_hold_time) is rejected.
+PERSPECTIVE_THRESHOLDS_PATH = os.getenv(
+    'PERSPECTIVE_THRESHOLDS_PATH', os.path.join(REPO_ROOT, 'models', 'thresholds_perspective.json'))
+
+def resize_frame(frame, max_dim=1280):
+    """Downscale so the longer side is at most max_dim (keeps aspect ratio)."""
+    h, w = frame.shape[:2]
+    if max(h, w) > max_dim:
+        if w > h:
+            new_w = max_dim
+            new_h = int(h * (max_dim / w))
+        else:
+            new_h = max_dim
+            new_w = int(w * (max_dim / h))
+        frame = cv2.resize(frame, (new_w, new_h))
+    return frame
+
+
+def shoulder_torso_size(pose_detector, image_shape):
+    """
+    Shoulder width and torso height in pixels for the current pose (either may
+    be None), measured like perspective_features_extractor.py. The ratio of
+    their medians is the width_to_height_med perspective feature.
+    """
+    ls = pose_detector.get_landmark_position(11, image_shape)
+    rs = pose_detector.get_landmark_position(12, image_shape)
+    lh = pose_detector.get_landmark_position(23, image_shape)
+    rh = pose_detector.get_landmark_position(24, image_shape)
+    width = abs(rs[0] - ls[0]) if ls is not None and rs is not None else None
+    heights = [abs(h[1] - sh[1]) for sh, h in ((ls, lh), (rs, rh)) if sh is not None and h is not None]
+    return width, (float(np.mean(heights)) if heights else None)
+
+
+@lru_cache(maxsize=4)
+def _load_perspective_model(path):
+    return load_thresholds(path) if os.path.exists(path) else None
+
+
+def ml_form_score(df):
+    """
+    Compute ML-based form score from timeline data (rows as written to the CSV).
+    Uses the augmented model (17 features) without re-processing the video.
+    
+    Args:
+        df: timeline DataFrame (needs the smoothed angle, true torso and aligned columns)
+    
+    Returns:
+        tuple: (form_score, form_label) or (None, None) on error
+    """
+    if df.empty:
+        print("⚠️ No timeline data available for ML scoring")
+        return None, None
+    
+    # Extract raw angle data from timeline
+    left_angles = pd.to_numeric(df['left_angle_smoothed_deg'], errors='coerce').dropna().tolist()
+    right_angles = pd.to_numeric(df['right_angle_smoothed_deg'], errors='coerce').dropna().tolist()
+    left_torso = pd.to_numeric(df['left_true_torso_angle_deg'], errors='coerce').dropna().tolist()
+    right_torso = pd.to_numeric(df['right_true_torso_angle_deg'], errors='coerce').dropna().tolist()
+    
+    # Need minimum frames for reliable feature extraction
+    min_frames = 10
+    if len(left_angles) < min_frames and len(right_angles) < min_frames:
+        print(f"⚠️ Insufficient angle data for ML scoring (left: {len(left_angles)}, right: {len(right_angles)})")
+        return None, None
+    
+    # --- Extract 17 features for the augmented model ---
+    features = {}
+    
+    # Elbow angle features (left)
+    if len(left_angles) >= min_frames:
+        features['elbow_left_min'] = np.min(left_angles)
+        features['elbow_left_max'] = np.max(left_angles)
+        features['elbow_left_range'] = features['elbow_left_max'] - features['elbow_left_min']
+        features['elbow_left_mean'] = np.mean(left_angles)
+        features['elbow_left_std'] = np.std(left_angles)
+    else:
+        # Use right arm data as fallback
+        features['elbow_left_min'] = np.min(right_angles) if right_angles else 0
+        features['elbow_left_max'] = np.max(right_angles) if right_angles else 0
+        features['elbow_left_range'] = features['elbow_left_max'] - features['elbow_left_min']
+        features['elbow_left_mean'] = np.mean(right_angles) if right_angles else 0
+        features['elbow_left_std'] = np.std(right_angles) if right_angles else 0
+    
+    # Elbow angle features (right)
+    if len(right_angles) >= min_frames:
+        features['elbow_right_min'] = np.min(right_angles)
+        features['elbow_right_max'] = np.max(right_angles)
+        features['elbow_right_range'] = features['elbow_right_max'] - features['elbow_right_min']
+        features['elbow_right_mean'] = np.mean(right_angles)
+        features['elbow_right_std'] = np.std(right_angles)
+    else:
+        # Use left arm data as fallback
+        features['elbow_right_min'] = np.min(left_angles) if left_angles else 0
+        features['elbow_right_max'] = np.max(left_angles) if left_angles else 0
+        features['elbow_right_range'] = features['elbow_right_max'] - features['elbow_right_min']
+        features['elbow_right_mean'] = np.mean(left_angles) if left_angles else 0
+        features['elbow_right_std'] = np.std(left_angles) if left_angles else 0
+    
+    # Shoulder Y stability (using aligned data from timeline)
+    left_aligned = df['left_aligned'].tolist()
+    right_aligned = df['right_aligned'].tolist()
+    
+    # Approximate shoulder stability from alignment variation
+    # Higher variation in alignment = less stable shoulders
+    features['shoulder_left_y_std'] = np.std(left_aligned) if left_aligned else 0
+    features['shoulder_right_y_std'] = np.std(right_aligned) if right_aligned else 0
+    
+    # Torso angle features
+    torso_angles = left_torso + right_torso if left_torso or right_torso else [0]
+    # Filter out invalid values (999.0 was used for invalid)
+    torso_angles = [a for a in torso_angles if a < 900]
+    if not torso_angles:
+        torso_angles = [0]
+    
+    features['torso_angle_min'] = np.min(torso_angles)
+    features['torso_angle_max'] = np.max(torso_angles)
+    features['torso_angle_range'] = features['torso_angle_max'] - features['torso_angle_min']
+    features['torso_angle_mean'] = np.mean(torso_angles)
+    features['torso_angle_std'] = np.std(torso_angles)
+    
+    # --- Predict with the cached augmented model ---
+    try:
+        entry = get_registry().get('biceps_curl_rf_augmented.joblib')
+    except FileNotFoundError as e:
+        print(f"⚠️ Model not found: {e.filename}")
+        return None, None
+
+    # Feature order comes from the model's own schema (feature_names_in_)
+    features = {k: (0 if pd.isna(v) else v) for k, v in features.items()}
+    X = np.asarray([entry.build_vector(features)], dtype=np.float64)
+
+    # Make prediction (compiled forest, identical probabilities to sklearn)
+    probabilities = entry.predict_proba(X)[0]
+    prediction = entry.model.classes_[int(np.argmax(probabilities))]
+    
+    form_score = float(probabilities[1]) * 100  # Good form probability as percentage
+    form_label = 'Good Form ✅' if prediction == 1 else 'Bad Form ❌'
+    
+    print(f"✅ ML Form Score: {form_score:.1f}% ({form_label})")
+    
+    return form_score, form_label
+
 
 class BicepsCurlVideoAnalyzer:
     """
@@ -17,17 +169,70 @@ class BicepsCurlVideoAnalyzer:
       - CSV timeline (frame-by-frame metrics)
       - printed summary + rep event table
     """
-    def __init__(self, video_path, visualize=True, output_dir=None, fourcc="mp4v", progress_callback=None):
+    def __init__(self, video_path, visualize=True, output_dir=None, fourcc="mp4v", progress_callback=None,
+                 pose_detector=None, keep_timeline=True, event_callback=None, workers=1,
+                 target_pose_hz=None, motion_gating=False, perspective_thresholds=None, csv_path=None):
         self.video_path = video_path
-        self.pose_detector = PoseDetector()
+        self.pose_detector = pose_detector or PoseDetector()
         self.rep_counter = BicepsCurlCounter()
         self.frame_count = 0
         self.fps = 0
         self.duration = 0
         self.visualize = visualize
         self.output_dir = output_dir or os.path.dirname(os.path.abspath(video_path))
+        self.csv_path = csv_path  # timeline CSV location (default: <output_dir>/<base>__timeline.csv)
         self.fourcc = fourcc
         self.progress_callback = progress_callback  # Callback for progress updates
+        self.keep_timeline = keep_timeline  # False for unbounded live streams
+        self.event_callback = event_callback  # Called with each rep event as it is detected
+        self.workers = workers or 1  # >1: pose extraction split across processes (long videos)
+        if self.workers > 1 and (target_pose_hz or motion_gating):
+            # Chunk workers run pose on every frame; silently dropping these would change the cost model
+            message = "workers > 1 cannot be combined with target_pose_hz or motion_gating"
+            print(f"❌ {message}")
+            raise ValueError(message)
+
+        # Adaptive temporal decimation: run pose at ~target_pose_hz and interpolate
+        # landmarks in between, going back to every frame near rep turning points
+        self.target_pose_hz = target_pose_hz
+        self.full_rate_velocity = 150.0   # deg/s elbow angular speed that forces full rate
+        self.full_rate_margin = 20.0      # deg distance to the up/down thresholds that forces full rate
+        self.pose_inferences = 0
+        self._angle_samples = []          # last two (t, left, right) elbow angles at inferred frames
+
+        # Perspective-aware thresholds: width_to_height_med is measured over the first
+        # perspective_window_s of detected poses, then the tuned bucket thresholds are
+        # applied to the counter. perspective_thresholds: tuned model dict, JSON path,
+        # or False to keep the counter defaults.
+        if perspective_thresholds is None:
+            perspective_thresholds = PERSPECTIVE_THRESHOLDS_PATH
+        if isinstance(perspective_thresholds, str):
+            perspective_thresholds = _load_perspective_model(perspective_thresholds)
+        if perspective_thresholds:
+            try:
+                validate_counter_thresholds(perspective_thresholds)
+            except ValueError as e:
+                print(f"⚠️ Ignoring perspective thresholds: {e}")
+                perspective_thresholds = None
+        self._perspective_model = perspective_thresholds or None
+        self.perspective_window_s = 2.0
+        self.perspective = None           # {'widthToHeight', 'thresholds'} once decided
+        self._shoulder_widths = []
+        self._torso_heights = []
+        self._perspective_start_t = None
+
+        # Motion gating: when the picture is static or nobody has been detected for
+        # idle_after_s, run pose only at idle_pose_hz until motion returns
+        self.motion_gating = motion_gating
+        self.idle_pose_hz = 2.0
+        self.idle_after_s = 1.0
+        self.motion_threshold = 2.0       # mean abs gray-level difference of 64px-wide thumbnails
+        self.skipped_frames = 0
+        self._prev_thumb = None
+        self._last_motion_t = 0.0
+        self._last_pose_t = 0.0
+        self._last_inference_idx = None
+        self._was_still = False
 
         # runtime/bookkeeping
         self._timeline_rows = []     # per-frame row dicts for CSV
@@ -38,6 +243,10 @@ class BicepsCurlVideoAnalyzer:
         self._out_path_video = None
         self._out_path_csv = None
 
+    def _set_output_paths(self, base):
+        self._out_path_video = os.path.join(self.output_dir, f"{base}__annotated.mp4")
+        self._out_path_csv = self.csv_path or os.path.join(self.output_dir, f"{base}__timeline.csv")
+
     def analyze(self):
         cap = cv2.VideoCapture(self.video_path)
         if not cap.isOpened():
@@ -48,16 +257,25 @@ class BicepsCurlVideoAnalyzer:
         self.fps = cap.get(cv2.CAP_PROP_FPS)
         self.duration = self.frame_count / self.fps if self.fps else 0
 
-        base = os.path.splitext(os.path.basename(self.video_path))[0]
-        self._out_path_video = os.path.join(self.output_dir, f"{base}__annotated.mp4")
-        self._out_path_csv = os.path.join(self.output_dir, f"{base}__timeline.csv")
+        self._set_output_paths(os.path.splitext(os.path.basename(self.video_path))[0])
 
         print(f"Video loaded: {self.video_path}")
         print(f"Frames: {self.frame_count}, FPS: {self.fps:.2f}, Duration: {self.duration:.1f}s")
-        frame_idx = 0
 
-        # Prepare writer lazily after we know frame size (post-resize)
-        writer_ready = False
+        if self.workers > 1:
+            cap.release()
+            self._analyze_parallel()
+            self._write_csv()
+            self._show_summary()
+            return
+
+        frame_idx = 0
+        decimating = bool(self.target_pose_hz) and self.fps > self.target_pose_hz
+        stride = max(1, int(round(self.fps / self.target_pose_hz))) if decimating else 1
+        if decimating:
+            print(f"Pose inference at ~{self.fps / stride:.1f} Hz (every {stride} frames, full rate near turning points)")
+        pending = []      # skipped frames waiting for the next inference: (frame_idx, t_sec, frame, shape)
+        last = None       # (frame_idx, landmarks or None) of the last inferred frame
 
         while True:
             ret, frame = cap.read()
@@ -66,136 +284,30 @@ class BicepsCurlVideoAnalyzer:
             frame_idx += 1
 
             # Resize for consistency and performance
-            h, w = frame.shape[:2]
-            max_dim = 1280
-            if max(h, w) > max_dim:
-                if w > h:
-                    new_w = max_dim
-                    new_h = int(h * (max_dim / w))
-                else:
-                    new_h = max_dim
-                    new_w = int(w * (max_dim / h))
-                frame = cv2.resize(frame, (new_w, new_h))
-
-            # Pose detection (ask PoseDetector to draw if it can)
-            draw_pose = self.visualize
-            frame, results = self.pose_detector.detect_pose(frame, draw=draw_pose)
-
-            left_arm_angle = right_arm_angle = None
-            left_elbow_alignment_angle = right_elbow_alignment_angle = None
-            left_true_torso_angle = right_true_torso_angle = None
-            left_alignment = right_alignment = True
-
-            if self.pose_detector.is_pose_detected():
-                angles = self.pose_detector.get_body_angles(frame.shape)
-                left_arm_angle = angles.get('left_arm')
-                right_arm_angle = angles.get('right_arm')
-                
-                # Get arm visibility status with depth filtering
-                visibility_status = self.pose_detector.get_arms_visibility_with_depth(
-                    min_confidence=self.rep_counter.min_landmark_confidence,
-                    depth_threshold=self.rep_counter.depth_threshold,
-                    depth_filter_enabled=self.rep_counter.depth_filter_enabled
-                )
-                
-                left_arm_visible = visibility_status['left']['visible']
-                right_arm_visible = visibility_status['right']['visible']
-                left_confidence = visibility_status['left']['confidence']
-                right_confidence = visibility_status['right']['confidence']
-                left_depth = visibility_status['left']['depth']
-                right_depth = visibility_status['right']['depth']
-                
-                # Calculate elbow alignment angles (elbow-shoulder-hip, measures arm position relative to torso)
-                left_elbow_alignment_angle = self._get_elbow_alignment_angle(frame.shape, 'left')
-                right_elbow_alignment_angle = self._get_elbow_alignment_angle(frame.shape, 'right')
-                
-                # Calculate true torso angles (hip-shoulder-vertical, measures actual body stability)
-                left_true_torso_angle = self._get_true_torso_angle(frame.shape, 'left')
-                right_true_torso_angle = self._get_true_torso_angle(frame.shape, 'right')
-
-                left_alignment = self._check_arm_alignment(frame.shape, 'left')
-                right_alignment = self._check_arm_alignment(frame.shape, 'right')
-
-                # Update rep counter with visibility info (still using elbow alignment angle for form checks)
-                self.rep_counter.update(
-                    left_arm_angle, right_arm_angle, 
-                    left_alignment, right_alignment, 
-                    left_elbow_alignment_angle, right_elbow_alignment_angle,
-                    left_arm_visible=left_arm_visible,
-                    right_arm_visible=right_arm_visible,
-                    left_confidence=left_confidence,
-                    right_confidence=right_confidence
-                )
-
-            status = self.rep_counter.get_status()
-            left_reps = status.get('left_reps', 0)
-            right_reps = status.get('right_reps', 0)
-            total_reps = status.get('total_reps', 0)
-
-            # Detect rep events (count increments)
+            frame = resize_frame(frame)
             t_sec = frame_idx / self.fps if self.fps else 0
-            if left_reps > self._last_left_reps:
-                self._events.append({
-                    "time_s": t_sec, "frame": frame_idx, "arm": "left",
-                    "angle": left_arm_angle, "aligned": left_alignment, "count": left_reps
-                })
-            if right_reps > self._last_right_reps:
-                self._events.append({
-                    "time_s": t_sec, "frame": frame_idx, "arm": "right",
-                    "angle": right_arm_angle, "aligned": right_alignment, "count": right_reps
-                })
-            self._last_left_reps, self._last_right_reps = left_reps, right_reps
-
-            # Overlay visualization
-            if self.visualize:
-                self._draw_overlay(
-                    frame=frame,
-                    frame_idx=frame_idx,
-                    fps=self.fps,
-                    left_angle=left_arm_angle,
-                    right_angle=right_arm_angle,
-                    left_aligned=left_alignment,
-                    right_aligned=right_alignment,
-                    status=status
-                )
-
-                # Initialize writer once, from actual frame shape
-                if not writer_ready:
-                    h, w = frame.shape[:2]
-                    fourcc = cv2.VideoWriter_fourcc(*self.fourcc)
-                    self._video_writer = cv2.VideoWriter(self._out_path_video, fourcc, self.fps if self.fps else 30.0, (w, h))
-                    writer_ready = True
-
-                self._video_writer.write(frame)
-
-            # Save timeline row with both raw and smoothed angles
-            self._timeline_rows.append({
-                "frame": frame_idx,
-                "time_s": round(t_sec, 3),
-                "left_cycle_index": status.get('left_cycle_index', 0),
-                "right_cycle_index": status.get('right_cycle_index', 0),
-                "left_state": status.get('left_state', 'unknown'),
-                "right_state": status.get('right_state', 'unknown'),
-                "left_angle_raw_deg": round(status.get('left_raw_angle'), 2) if status.get('left_raw_angle') is not None else "",
-                "right_angle_raw_deg": round(status.get('right_raw_angle'), 2) if status.get('right_raw_angle') is not None else "",
-                "left_angle_smoothed_deg": round(status.get('left_smoothed_angle'), 2) if status.get('left_smoothed_angle') is not None else "",
-                "right_angle_smoothed_deg": round(status.get('right_smoothed_angle'), 2) if status.get('right_smoothed_angle') is not None else "",
-                "left_elbow_alignment_angle_deg": round(left_elbow_alignment_angle, 2) if left_elbow_alignment_angle is not None else "",
-                "right_elbow_alignment_angle_deg": round(right_elbow_alignment_angle, 2) if right_elbow_alignment_angle is not None else "",
-                "left_true_torso_angle_deg": round(left_true_torso_angle, 2) if left_true_torso_angle is not None else "",
-                "right_true_torso_angle_deg": round(right_true_torso_angle, 2) if right_true_torso_angle is not None else "",
-                "left_aligned": int(bool(left_alignment)),
-                "right_aligned": int(bool(right_alignment)),
-                "left_reps": status.get('left_reps', 0),
-                "right_reps": status.get('right_reps', 0),
-                "left_correct_reps": status.get('left_correct_reps', 0),
-                "right_correct_reps": status.get('right_correct_reps', 0),
-                "left_incorrect_reps": status.get('left_incorrect_reps', 0),
-                "right_incorrect_reps": status.get('right_incorrect_reps', 0),
-                "total_reps": total_reps,
-                "left_last_rep_reasons": '; '.join(status.get('left_last_rep_reasons', [])),
-                "right_last_rep_reasons": '; '.join(status.get('right_last_rep_reasons', []))
-            })
+
+            if self.motion_gating and self._is_idle_frame(frame, frame_idx, t_sec):
+                if pending:
+                    # Close the interpolation window before going idle
+                    last = self._infer_and_flush(frame_idx, t_sec, frame, last, pending)
+                    self._note_inference(frame_idx, t_sec)
+                else:
+                    self.skipped_frames += 1
+                    self.pose_detector.set_landmarks(None)
+                    self._process_frame(frame_idx, t_sec, frame.shape, frame, pose_source='skipped')
+            elif not decimating:
+                # Pose detection (ask PoseDetector to draw if it can)
+                draw_pose = self.visualize
+                frame, results = self.pose_detector.detect_pose(frame, draw=draw_pose)
+                self.pose_inferences += 1
+                self._note_inference(frame_idx, t_sec)
+                self._process_frame(frame_idx, t_sec, frame.shape, frame)
+            elif last is not None and frame_idx - last[0] < stride and not self._needs_full_rate():
+                pending.append((frame_idx, t_sec, frame if self.visualize else None, frame.shape))
+            else:
+                last = self._infer_and_flush(frame_idx, t_sec, frame, last, pending)
+                self._note_inference(frame_idx, t_sec)
 
             # Progress reporting (every frame or every ~1s)
             if self.progress_callback:
@@ -205,13 +317,369 @@ class BicepsCurlVideoAnalyzer:
                 # Fallback to console logging if no callback
                 print(f"Processed {frame_idx}/{self.frame_count} frames...")
 
+        if pending:
+            # Video ended between inferences: infer on the last buffered frame
+            # (re-read it when frames were not kept) and interpolate up to it
+            f_idx, t_sec, frame, shape = pending.pop()
+            if frame is None:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, f_idx - 1)
+                ret, frame = cap.read()
+                frame = resize_frame(frame) if ret else np.zeros(shape, dtype=np.uint8)
+            self._infer_and_flush(f_idx, t_sec, frame, last, pending)
+
         cap.release()
         if self._video_writer is not None:
             self._video_writer.release()
 
+        if decimating or self.motion_gating:
+            print(f"Pose inferences: {self.pose_inferences}/{frame_idx} frames "
+                  f"({self.skipped_frames} skipped as idle)")
+
         self._write_csv()
         self._show_summary()
 
+    def _is_idle_frame(self, frame, frame_idx, t_sec):
+        """
+        Motion gate. Compares a small grayscale thumbnail with the previous
+        frame's; the frame is idle (pose can be skipped) when nothing has moved
+        for idle_after_s or no pose has been found for idle_after_s. While idle,
+        pose still runs every 1/idle_pose_hz seconds, and full rate resumes as
+        soon as motion follows a still stretch or a pose is found again.
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        h, w = gray.shape
+        thumb = cv2.resize(gray, (64, max(1, int(64 * h / w))), interpolation=cv2.INTER_AREA).astype(np.int16)
+        moving = self._prev_thumb is None or float(np.mean(np.abs(thumb - self._prev_thumb))) > self.motion_threshold
+        self._prev_thumb = thumb
+
+        if moving:
+            if self._was_still:
+                # Motion is back after a still stretch: look again at full rate
+                self._was_still = False
+                self._last_motion_t = self._last_pose_t = t_sec
+                return False
+            self._last_motion_t = t_sec
+
+        still = t_sec - self._last_motion_t >= self.idle_after_s
+        self._was_still = still
+        idle = still or t_sec - self._last_pose_t >= self.idle_after_s
+        if not idle or self._last_inference_idx is None:
+            return False
+        idle_stride = max(1, int(round((self.fps or 30.0) / self.idle_pose_hz)))
+        return frame_idx - self._last_inference_idx < idle_stride
+
+    def _note_inference(self, frame_idx, t_sec):
+        self._last_inference_idx = frame_idx
+        if self.pose_detector.is_pose_detected():
+            self._last_pose_t = t_sec
+
+    def _infer_and_flush(self, frame_idx, t_sec, frame, last, pending):
+        """
+        Run pose on this frame, then process the buffered skipped frames with
+        landmarks linearly interpolated between the previous inferred frame
+        and this one, and finally this frame itself.
+
+        Returns:
+            (frame_idx, landmarks or None) for this inferred frame
+        """
+        frame, _ = self.pose_detector.detect_pose(frame, draw=False)
+        self.pose_inferences += 1
+        current = self.pose_detector.get_landmarks_array()
+
+        prev_idx, prev_lm = last if last is not None else (None, None)
+        for f_idx, f_t, f_frame, f_shape in pending:
+            if prev_lm is not None and current is not None:
+                w = (f_idx - prev_idx) / float(frame_idx - prev_idx)
+                self.pose_detector.set_landmarks(prev_lm + (current - prev_lm) * w)
+                source = 'interpolated'
+            else:
+                self.pose_detector.set_landmarks(None)
+                source = 'none'
+            if f_frame is not None and self.visualize:
+                self.pose_detector.draw_landmarks(f_frame)
+            self._process_frame(f_idx, f_t, f_shape, f_frame, pose_source=source)
+        pending.clear()
+
+        self.pose_detector.set_landmarks(current)
+        if self.visualize:
+            self.pose_detector.draw_landmarks(frame)
+        self._process_frame(frame_idx, t_sec, frame.shape, frame)
+
+        if current is not None:
+            angles = self.pose_detector.get_body_angles(frame.shape)
+            self._angle_samples = (self._angle_samples + [(t_sec, angles.get('left_arm'), angles.get('right_arm'))])[-2:]
+        else:
+            self._angle_samples = []
+        return frame_idx, current
+
+    def _needs_full_rate(self):
+        """
+        True around rep turning points: an elbow angle close to the up/down
+        thresholds (where state changes are decided) or moving fast.
+        """
+        if not self._angle_samples:
+            return True  # no pose yet / pose just lost: keep looking every frame
+        up = self.rep_counter.angle_threshold_up
+        down = self.rep_counter.angle_threshold_down
+        t1, *latest = self._angle_samples[-1]
+        for angle in latest:
+            if angle is not None and min(abs(angle - up), abs(angle - down)) < self.full_rate_margin:
+                return True
+        if len(self._angle_samples) == 2:
+            t0, *previous = self._angle_samples[0]
+            dt = t1 - t0
+            for a0, a1 in zip(previous, latest):
+                if a0 is not None and a1 is not None and dt > 0 and abs(a1 - a0) / dt > self.full_rate_velocity:
+                    return True
+        return False
+
+    def _analyze_parallel(self):
+        """
+        Extract landmarks for time segments in parallel processes, then replay
+        the stitched stream through the single rep counter in frame order.
+        With visualize, the video is decoded once more to draw the overlay.
+        Every frame is inferred (no decimation or motion gating), and the
+        tracker restarts at each segment after a warm-up overlap, so rep
+        counts can differ slightly from a sequential run; check a video with
+        `parallel_video_analysis.py --compare` before relying on it.
+        """
+        from parallel_video_analysis import extract_landmarks_parallel
+
+        landmarks, image_shape = extract_landmarks_parallel(
+            self.video_path,
+            workers=self.workers,
+            pose_config=self.pose_detector._pose_config,
+            progress_callback=self.progress_callback
+        )
+        print(f"Extracted {len(landmarks)} frames with {self.workers} workers")
+
+        cap = cv2.VideoCapture(self.video_path) if self.visualize else None
+        for i in range(len(landmarks)):
+            frame = None
+            if cap is not None:
+                ret, frame = cap.read()
+                frame = resize_frame(frame) if ret else None
+
+            lm = landmarks[i]
+            self.pose_detector.set_landmarks(None if np.isnan(lm).any() else lm)
+            if frame is not None and self.visualize:
+                self.pose_detector.draw_landmarks(frame)
+
+            frame_idx = i + 1
+            t_sec = frame_idx / self.fps if self.fps else 0
+            self._process_frame(frame_idx, t_sec, frame.shape if frame is not None else image_shape, frame)
+
+        if cap is not None:
+            cap.release()
+        if self._video_writer is not None:
+            self._video_writer.release()
+        if self.progress_callback:
+            self.progress_callback(len(landmarks), max(self.frame_count, len(landmarks)))
+
+    def analyze_landmarks(self, sequence, name=None):
+        """
+        Run the same counting, form checks and timeline as analyze() on
+        pre-computed landmarks (no video decode, no pose inference).
+
+        Args:
+            sequence: LandmarkSequence (see landmark_payload.py)
+            name: base name for the timeline CSV (defaults to the video_path stem)
+        """
+        self.frame_count = len(sequence)
+        self.fps = sequence.fps
+        self.duration = sequence.duration
+        self._set_output_paths(name or os.path.splitext(os.path.basename(self.video_path))[0])
+
+        image_shape = sequence.image_shape
+        t0 = float(sequence.timestamps[0])
+        for i in range(len(sequence)):
+            self.pose_detector.set_landmarks(sequence.frame_landmarks(i))
+            self._process_frame(i + 1, float(sequence.timestamps[i]) - t0, image_shape)
+
+            if self.progress_callback:
+                self.progress_callback(i + 1, self.frame_count)
+
+        self._write_csv()
+        self._show_summary()
+
+    def _process_frame(self, frame_idx, t_sec, image_shape, frame=None, pose_source=None):
+        """
+        Per-frame analysis on the pose currently held by self.pose_detector:
+        angles, visibility, alignment, counter update, rep events, overlay
+        (when a frame image is given) and the timeline row.
+
+        pose_source is recorded in the timeline: 'detected', 'interpolated',
+        'skipped' (motion gate, no inference) or 'none' (defaults from
+        whether a pose is present).
+
+        Returns:
+            dict: counter status after this frame
+        """
+        left_arm_angle = right_arm_angle = None
+        left_arm_visible = right_arm_visible = False
+        left_elbow_alignment_angle = right_elbow_alignment_angle = None
+        left_true_torso_angle = right_true_torso_angle = None
+        left_alignment = right_alignment = True
+
+        if self.pose_detector.is_pose_detected():
+            if self._perspective_model is not None and self.perspective is None:
+                self._sample_perspective(image_shape, t_sec)
+
+            angles = self.pose_detector.get_body_angles(image_shape)
+            left_arm_angle = angles.get('left_arm')
+            right_arm_angle = angles.get('right_arm')
+            
+            # Get arm visibility status with depth filtering
+            visibility_status = self.pose_detector.get_arms_visibility_with_depth(
+                min_confidence=self.rep_counter.min_landmark_confidence,
+                depth_threshold=self.rep_counter.depth_threshold,
+                depth_filter_enabled=self.rep_counter.depth_filter_enabled
+            )
+            
+            left_arm_visible = visibility_status['left']['visible']
+            right_arm_visible = visibility_status['right']['visible']
+            left_confidence = visibility_status['left']['confidence']
+            right_confidence = visibility_status['right']['confidence']
+            
+            # Calculate elbow alignment angles (elbow-shoulder-hip, measures arm position relative to torso)
+            left_elbow_alignment_angle = self._get_elbow_alignment_angle(image_shape, 'left')
+            right_elbow_alignment_angle = self._get_elbow_alignment_angle(image_shape, 'right')
+            
+            # Calculate true torso angles (hip-shoulder-vertical, measures actual body stability)
+            left_true_torso_angle = self._get_true_torso_angle(image_shape, 'left')
+            right_true_torso_angle = self._get_true_torso_angle(image_shape, 'right')
+
+            left_alignment = self._check_arm_alignment(image_shape, 'left')
+            right_alignment = self._check_arm_alignment(image_shape, 'right')
+
+            # Update rep counter with visibility info (still using elbow alignment angle for form checks).
+            # Dwell is measured in video time so results don't depend on processing speed.
+            self.rep_counter.update(
+                left_arm_angle, right_arm_angle, 
+                left_alignment, right_alignment, 
+                left_elbow_alignment_angle, right_elbow_alignment_angle,
+                left_arm_visible=left_arm_visible,
+                right_arm_visible=right_arm_visible,
+                left_confidence=left_confidence,
+                right_confidence=right_confidence,
+                timestamp=t_sec
+            )
+
+        status = self.rep_counter.get_status()
+        left_reps = status.get('left_reps', 0)
+        right_reps = status.get('right_reps', 0)
+        total_reps = status.get('total_reps', 0)
+
+        # Detect rep events (count increments)
+        if left_reps > self._last_left_reps:
+            self._record_rep_event('left', frame_idx, t_sec, left_arm_angle, left_alignment, status)
+        if right_reps > self._last_right_reps:
+            self._record_rep_event('right', frame_idx, t_sec, right_arm_angle, right_alignment, status)
+        self._last_left_reps, self._last_right_reps = left_reps, right_reps
+
+        # Overlay visualization
+        if self.visualize and frame is not None:
+            self._draw_overlay(
+                frame=frame,
+                frame_idx=frame_idx,
+                fps=self.fps,
+                left_angle=left_arm_angle,
+                right_angle=right_arm_angle,
+                left_aligned=left_alignment,
+                right_aligned=right_alignment,
+                status=status
+            )
+
+            # Initialize writer once, from actual frame shape
+            if self._video_writer is None:
+                h, w = frame.shape[:2]
+                fourcc = cv2.VideoWriter_fourcc(*self.fourcc)
+                self._video_writer = cv2.VideoWriter(self._out_path_video, fourcc, self.fps if self.fps else 30.0, (w, h))
+
+            self._video_writer.write(frame)
+
+        # Save timeline row with both raw and smoothed angles
+        if not self.keep_timeline:
+            return status
+        self._timeline_rows.append({
+            "frame": frame_idx,
+            "time_s": round(t_sec, 3),
+            "left_cycle_index": status.get('left_cycle_index', 0),
+            "right_cycle_index": status.get('right_cycle_index', 0),
+            "left_state": status.get('left_state', 'unknown'),
+            "right_state": status.get('right_state', 'unknown'),
+            "left_angle_raw_deg": round(status.get('left_raw_angle'), 2) if status.get('left_raw_angle') is not None else "",
+            "right_angle_raw_deg": round(status.get('right_raw_angle'), 2) if status.get('right_raw_angle') is not None else "",
+            "left_angle_smoothed_deg": round(status.get('left_smoothed_angle'), 2) if status.get('left_smoothed_angle') is not None else "",
+            "right_angle_smoothed_deg": round(status.get('right_smoothed_angle'), 2) if status.get('right_smoothed_angle') is not None else "",
+            "left_elbow_alignment_angle_deg": round(left_elbow_alignment_angle, 2) if left_elbow_alignment_angle is not None else "",
+            "right_elbow_alignment_angle_deg": round(right_elbow_alignment_angle, 2) if right_elbow_alignment_angle is not None else "",
+            "left_true_torso_angle_deg": round(left_true_torso_angle, 2) if left_true_torso_angle is not None else "",
+            "right_true_torso_angle_deg": round(right_true_torso_angle, 2) if right_true_torso_angle is not None else "",
+            "left_aligned": int(bool(left_alignment)),
+            "right_aligned": int(bool(right_alignment)),
+            "left_arm_visible": int(bool(left_arm_visible)),
+            "right_arm_visible": int(bool(right_arm_visible)),
+            "left_reps": status.get('left_reps', 0),
+            "right_reps": status.get('right_reps', 0),
+            "left_correct_reps": status.get('left_correct_reps', 0),
+            "right_correct_reps": status.get('right_correct_reps', 0),
+            "left_incorrect_reps": status.get('left_incorrect_reps', 0),
+            "right_incorrect_reps": status.get('right_incorrect_reps', 0),
+            "total_reps": total_reps,
+            "left_last_rep_reasons": '; '.join(status.get('left_last_rep_reasons', [])),
+            "right_last_rep_reasons": '; '.join(status.get('right_last_rep_reasons', [])),
+            "pose_source": pose_source or ('detected' if self.pose_detector.is_pose_detected() else 'none')
+        })
+        return status
+
+    def _sample_perspective(self, image_shape, t_sec):
+        """
+        Collect shoulder width / torso height until perspective_window_s of poses
+        has been seen, then pick and apply the bucket thresholds.
+        """
+        width, height = shoulder_torso_size(self.pose_detector, image_shape)
+        if width is not None:
+            self._shoulder_widths.append(width)
+        if height is not None:
+            self._torso_heights.append(height)
+        if self._perspective_start_t is None:
+            self._perspective_start_t = t_sec
+        if t_sec - self._perspective_start_t < self.perspective_window_s:
+            return
+        if len(self._shoulder_widths) < 5 or len(self._torso_heights) < 5:
+            return
+
+        torso_h = float(np.median(self._torso_heights))
+        if torso_h <= 0:
+            return
+        width_to_height = float(np.median(self._shoulder_widths)) / torso_h
+        thresholds = pick_thresholds_for_video(self._perspective_model, width_to_height)
+        applied = {}
+        for key, attr in (('arm_up', 'angle_threshold_up'), ('arm_down', 'angle_threshold_down'),
+                          ('torso', 'torso_angle_threshold'), ('min_hold_time', 'min_hold_time')):
+            value = thresholds.get(key)
+            if value is not None and math.isfinite(value):
+                applied[key] = round(float(value), 1)
+                setattr(self.rep_counter, attr, applied[key])
+        self.perspective = {'widthToHeight': round(width_to_height, 3), 'thresholds': applied}
+        print(f"Perspective width/height {width_to_height:.2f} at {t_sec:.1f}s -> thresholds {applied}")
+
+    def _record_rep_event(self, arm, frame_idx, t_sec, angle, aligned, status):
+        """Append a rep event (the rep just completed on this frame) and notify listeners."""
+        reasons = list(status.get(f'{arm}_last_rep_reasons', []))
+        record = next((r for r in reversed(self.rep_counter.rep_records) if r['arm'] == arm), None)
+        event = {
+            "time_s": round(t_sec, 3), "frame": frame_idx, "arm": arm,
+            "angle": round(float(angle), 2) if angle is not None else None,
+            "aligned": bool(aligned), "count": status.get(f'{arm}_reps', 0),
+            "correct": not reasons, "reasons": reasons,
+            "rep_record": record
+        }
+        self._events.append(event)
+        if self.event_callback:
+            self.event_callback(event)
+
     # ---- helpers ----
 
     def _get_elbow_alignment_angle(self, image_shape, side):
@@ -451,7 +919,8 @@ class BicepsCurlVideoAnalyzer:
             print("  (no discrete rep events detected)")
         else:
             for e in self._events:
-                print(f"  t={e['time_s']:.2f}s  frame={e['frame']:>5}  {e['arm'].upper()}  count={e['count']}  angle≈{e['angle']:.0f}°  aligned={bool(e['aligned'])}")
+                angle = f"{e['angle']:.0f}°" if e['angle'] is not None else "--"
+                print(f"  t={e['time_s']:.2f}s  frame={e['frame']:>5}  {e['arm'].upper()}  count={e['count']}  angle≈{angle}  aligned={bool(e['aligned'])}  {'CORRECT' if e['correct'] else 'INCORRECT'}")
         print("-"*60)
         if self.visualize:
             print(f"Annotated video: {self._out_path_video}")
@@ -476,12 +945,14 @@ class BicepsCurlVideoAnalyzer:
             form_feedback.extend([f"Right: {reason}" for reason in status['right_last_rep_reasons']])
         
         # --- ML-based Form Score (using cached timeline data) ---
+        # Without a kept timeline (live streams) there is nothing to score
         form_score = None
         form_label = None
-        try:
-            form_score, form_label = self._compute_ml_form_score()
-        except Exception as e:
-            print(f"⚠️ ML form prediction failed: {e}")
+        if self.keep_timeline:
+            try:
+                form_score, form_label = self._compute_ml_form_score()
+            except Exception as e:
+                print(f"⚠️ ML form prediction failed: {e}")
         
         return {
             'totalReps': status.get('total_reps', 0),
@@ -497,122 +968,18 @@ class BicepsCurlVideoAnalyzer:
             'formScore': round(form_score, 1) if form_score is not None else None,
             'formLabel': form_label,
             'timeline': self._timeline_rows,  # Full frame-by-frame data
+            'reps': list(self.rep_counter.rep_records),  # One summary row per counted rep
             'duration': round(self.duration, 2),
             'fps': round(self.fps, 2),
             'frameCount': self.frame_count,
+            'perspective': self.perspective,
         }
     
     def _compute_ml_form_score(self):
         """
         Compute ML-based form score from cached timeline data.
-        Uses the augmented model (17 features) without re-processing the video.
         
         Returns:
             tuple: (form_score, form_label) or (None, None) on error
         """
-        if not self._timeline_rows:
-            print("⚠️ No timeline data available for ML scoring")
-            return None, None
-        
-        # Convert timeline rows to DataFrame for feature extraction
-        df = pd.DataFrame(self._timeline_rows)
-        
-        # Extract raw angle data from timeline
-        left_angles = pd.to_numeric(df['left_angle_smoothed_deg'], errors='coerce').dropna().tolist()
-        right_angles = pd.to_numeric(df['right_angle_smoothed_deg'], errors='coerce').dropna().tolist()
-        left_torso = pd.to_numeric(df['left_true_torso_angle_deg'], errors='coerce').dropna().tolist()
-        right_torso = pd.to_numeric(df['right_true_torso_angle_deg'], errors='coerce').dropna().tolist()
-        
-        # Need minimum frames for reliable feature extraction
-        min_frames = 10
-        if len(left_angles) < min_frames and len(right_angles) < min_frames:
-            print(f"⚠️ Insufficient angle data for ML scoring (left: {len(left_angles)}, right: {len(right_angles)})")
-            return None, None
-        
-        # --- Extract 17 features for the augmented model ---
-        features = {}
-        
-        # Elbow angle features (left)
-        if len(left_angles) >= min_frames:
-            features['elbow_left_min'] = np.min(left_angles)
-            features['elbow_left_max'] = np.max(left_angles)
-            features['elbow_left_range'] = features['elbow_left_max'] - features['elbow_left_min']
-            features['elbow_left_mean'] = np.mean(left_angles)
-            features['elbow_left_std'] = np.std(left_angles)
-        else:
-            # Use right arm data as fallback
-            features['elbow_left_min'] = np.min(right_angles) if right_angles else 0
-            features['elbow_left_max'] = np.max(right_angles) if right_angles else 0
-            features['elbow_left_range'] = features['elbow_left_max'] - features['elbow_left_min']
-            features['elbow_left_mean'] = np.mean(right_angles) if right_angles else 0
-            features['elbow_left_std'] = np.std(right_angles) if right_angles else 0
-        
-        # Elbow angle features (right)
-        if len(right_angles) >= min_frames:
-            features['elbow_right_min'] = np.min(right_angles)
-            features['elbow_right_max'] = np.max(right_angles)
-            features['elbow_right_range'] = features['elbow_right_max'] - features['elbow_right_min']
-            features['elbow_right_mean'] = np.mean(right_angles)
-            features['elbow_right_std'] = np.std(right_angles)
-        else:
-            # Use left arm data as fallback
-            features['elbow_right_min'] = np.min(left_angles) if left_angles else 0
-            features['elbow_right_max'] = np.max(left_angles) if left_angles else 0
-            features['elbow_right_range'] = features['elbow_right_max'] - features['elbow_right_min']
-            features['elbow_right_mean'] = np.mean(left_angles) if left_angles else 0
-            features['elbow_right_std'] = np.std(left_angles) if left_angles else 0
-        
-        # Shoulder Y stability (using aligned data from timeline)
-        left_aligned = df['left_aligned'].tolist()
-        right_aligned = df['right_aligned'].tolist()
-        
-        # Approximate shoulder stability from alignment variation
-        # Higher variation in alignment = less stable shoulders
-        features['shoulder_left_y_std'] = np.std(left_aligned) if left_aligned else 0
-        features['shoulder_right_y_std'] = np.std(right_aligned) if right_aligned else 0
-        
-        # Torso angle features
-        torso_angles = left_torso + right_torso if left_torso or right_torso else [0]
-        # Filter out invalid values (999.0 was used for invalid)
-        torso_angles = [a for a in torso_angles if a < 900]
-        if not torso_angles:
-            torso_angles = [0]
-        
-        features['torso_angle_min'] = np.min(torso_angles)
-        features['torso_angle_max'] = np.max(torso_angles)
-        features['torso_angle_range'] = features['torso_angle_max'] - features['torso_angle_min']
-        features['torso_angle_mean'] = np.mean(torso_angles)
-        features['torso_angle_std'] = np.std(torso_angles)
-        
-        # --- Load the augmented model and predict ---
-        script_dir = Path(__file__).parent
-        model_path = script_dir.parent / 'models' / 'biceps_curl_rf_augmented.joblib'
-        
-        if not model_path.exists():
-            print(f"⚠️ Model not found: {model_path}")
-            return None, None
-        
-        model = joblib.load(model_path)
-        
-        # Feature columns in order expected by augmented model
-        feature_columns = [
-            'elbow_left_min', 'elbow_left_max', 'elbow_left_range', 'elbow_left_mean', 'elbow_left_std',
-            'elbow_right_min', 'elbow_right_max', 'elbow_right_range', 'elbow_right_mean', 'elbow_right_std',
-            'shoulder_left_y_std', 'shoulder_right_y_std',
-            'torso_angle_min', 'torso_angle_max', 'torso_angle_range', 'torso_angle_mean', 'torso_angle_std'
-        ]
-        
-        # Build feature vector
-        X = pd.DataFrame([features])[feature_columns]
-        X = X.fillna(0)
-        
-        # Make prediction
-        prediction = model.predict(X)[0]
-        probabilities = model.predict_proba(X)[0]
-        
-        form_score = float(probabilities[1]) * 100  # Good form probability as percentage
-        form_label = 'Good Form ✅' if prediction == 1 else 'Bad Form ❌'
-        
-        print(f"✅ ML Form Score: {form_score:.1f}% ({form_label})")
-        
-        return form_score, form_label
+        return ml_form_score(pd.DataFrame(self._timeline_rows))
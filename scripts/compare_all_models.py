@@ -23,22 +23,28 @@ import json
 
 # Import the predictor with custom feature extraction
 sys.path.insert(0, str(Path(__file__).parent))
-from biceps_curl_form_predictor import BicepsCurlFormPredictor
+from feature_cache import FeatureCache, get_features
+from model_registry import get_registry
 
 
 class ModelComparator:
     """Compares multiple trained models on test videos."""
     
-    def __init__(self, models_dir='../models', test_videos_dir='../models/testvideos'):
+    def __init__(self, models_dir='../models', test_videos_dir='../models/testvideos', workers=None,
+                 cache_dir=None):
         """
         Initialize the comparator.
         
         Args:
             models_dir: Directory containing model files
             test_videos_dir: Directory containing test videos
+            workers: Processes used to extract features (default: CPU count)
+            cache_dir: Feature cache directory (default: feature_cache.DEFAULT_CACHE_DIR)
         """
         self.models_dir = Path(models_dir)
         self.test_videos_dir = Path(test_videos_dir)
+        self.workers = workers
+        self.feature_cache = FeatureCache(cache_dir)
         self.results = []
         
         # Model metadata (based on training approach)
@@ -108,36 +114,34 @@ class ModelComparator:
         features = list(model.feature_names_in_)
         return model, features
     
-    def test_model_on_video(self, model_path, video_path, model_name):
-        """Test a single model on a single video."""
+    def score_model(self, model_path, model_name, features):
+        """
+        Score one model on every video with usable features in a single
+        vectorized predict_proba call.
+        
+        Args:
+            features: {video_path: feature dict or None} from get_features
+        """
         try:
-            print(f"\n    Testing {model_name} on {video_path.name}...")
-            
-            # Load model and get features
-            model, expected_features = self.load_model_features(model_path)
+            entry = get_registry().get(str(model_path))
+            expected_features = entry.feature_names
             
-            # Create predictor instance (it will extract features)
-            predictor = BicepsCurlFormPredictor(model_path=str(model_path))
-            
-            # Extract features from video
-            features = predictor.extract_features_from_video(
-                video_path=str(video_path),
-                frame_skip=2,
-                max_frames=None,
-                min_frames=5
-            )
-            
-            if features is None:
-                return None
+            scored = [Path(v) for v, f in features.items() if f is not None]
+            if not scored:
+                return []
             
             # Select only the features this model needs (in correct order)
-            X = pd.DataFrame([features])[expected_features]
-            X = X.fillna(0)
-            
-            # Make prediction
-            prediction = model.predict(X)[0]
-            probabilities = model.predict_proba(X)[0]
+            X = pd.DataFrame([features[str(v)] for v in scored])[expected_features]
+            X = X.fillna(0).to_numpy(dtype=np.float64)
             
+            probabilities = entry.predict_proba(X)
+            predictions = entry.model.classes_[np.argmax(probabilities, axis=1)]
+        except Exception as e:
+            print(f"      ❌ Error: {e}")
+            return []
+        
+        results = []
+        for video_path, prediction, proba in zip(scored, predictions, probabilities):
             result = {
                 'model_name': model_name,
                 'model_file': model_path.name,
@@ -145,18 +149,14 @@ class ModelComparator:
                 'video_path': str(video_path),
                 'prediction': int(prediction),
                 'prediction_label': 'Good Form' if prediction == 1 else 'Bad Form',
-                'confidence_good': float(probabilities[1]),
-                'confidence_bad': float(probabilities[0]),
+                'confidence_good': float(proba[1]),
+                'confidence_bad': float(proba[0]),
                 'features_used': len(expected_features)
             }
-            
-            print(f"      → {result['prediction_label']} ({result['confidence_good']*100:.1f}% confidence)")
-            
-            return result
-            
-        except Exception as e:
-            print(f"      ❌ Error: {e}")
-            return None
+            print(f"    {video_path.name}: {result['prediction_label']} "
+                  f"({result['confidence_good']*100:.1f}% confidence)")
+            results.append(result)
+        return results
     
     def run_comparison(self):
         """Run full comparison of all models on all videos."""
@@ -177,6 +177,10 @@ class ModelComparator:
         
         print(f"\n🔬 Running {len(models)} models × {len(videos)} videos = {len(models) * len(videos)} predictions\n")
         
+        # Each video is decoded and run through pose once, whatever the number of models
+        features = get_features(videos, cache=self.feature_cache, workers=self.workers,
+                                frame_skip=2, min_frames=5)
+        
         results = []
         
         for model_path in models:
@@ -184,10 +188,7 @@ class ModelComparator:
             print(f"\n📊 Testing Model: {model_name}")
             print(f"   File: {model_path.name}")
             
-            for video_path in videos:
-                result = self.test_model_on_video(model_path, video_path, model_name)
-                if result:
-                    results.append(result)
+            results.extend(self.score_model(model_path, model_name, features))
         
         self.results = results
         print(f"\n✅ Completed {len(results)} successful predictions")
@@ -0,0 +1,200 @@
+"""
+On-disk cache of per-video form features.
+
+extract_features_from_video (biceps_curl_form_predictor.py) runs MediaPipe
+over a whole video, which dominates any tool that scores several models on
+the same videos. Results are stored as JSON files keyed by
+
+    sha256(video bytes) + EXTRACTOR_VERSION + extraction settings
+
+so renaming or copying a video still hits the cache, while re-encoding it or
+bumping EXTRACTOR_VERSION recomputes. Videos that yield no features are
+cached too (as null) so they are not re-decoded on every run.
+
+LandmarkCache keeps the raw pose landmarks under the same key scheme (one
+.landmarks.npz per video) for tools that derive their own features from
+them, e.g. landmark_augmentation.py.
+
+Usage:
+    from feature_cache import get_features
+    features = get_features(video_paths, workers=4)  # {str(path): dict | None}
+
+    from feature_cache import get_landmarks
+    landmarks = get_landmarks(video_paths, workers=4)  # {str(path): dict | None}
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from biceps_curl_form_predictor import (EXTRACTOR_VERSION, _extract_in_worker, _extract_landmarks_in_worker,
+                                       _init_worker)
+from pose_pool import iter_pose_pool
+
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('GYMBUDDY_FEATURE_CACHE',
+                                        Path(tempfile.gettempdir()) / 'gymbuddy_feature_cache'))
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """JSON file per (video content, extractor version, settings)."""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+
+    @staticmethod
+    def key(video_path, frame_skip=2, min_frames=5):
+        return f"{file_sha256(video_path)}-v{EXTRACTOR_VERSION}-s{frame_skip}-m{min_frames}"
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key):
+        """
+        Returns:
+            (hit, features): features is None for videos cached as unusable
+        """
+        path = self._path(key)
+        if not path.exists():
+            return False, None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return True, json.load(f)['features']
+        except (OSError, ValueError, KeyError):
+            # Corrupt entry: treat as a miss, it gets rewritten
+            return False, None
+
+    def put(self, key, features):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if features is not None:
+            features = {name: float(value) for name, value in features.items()}
+        # Write-then-rename so concurrent readers never see a partial file
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'extractor_version': EXTRACTOR_VERSION, 'features': features}, f)
+        os.replace(tmp, path)
+
+
+def get_features(video_paths, cache=None, workers=None, frame_skip=2, min_frames=5):
+    """
+    Features for every video, extracting only cache misses (in parallel).
+
+    Args:
+        video_paths: iterable of video paths
+        cache: FeatureCache (default: DEFAULT_CACHE_DIR)
+        workers: worker processes for the misses (default: CPU count)
+        frame_skip, min_frames: passed to extract_features_from_video
+
+    Returns:
+        dict: {str(video_path): feature dict or None}
+    """
+    return _get_cached(cache or FeatureCache(), video_paths, (frame_skip, min_frames), _extract_in_worker,
+                       'Features', workers)
+
+
+def _get_cached(cache, video_paths, settings, worker, what, workers):
+    """
+    {str(video_path): cache entry} for every video, running worker(video_path, *settings)
+    in a pose pool for the cache misses (keyed by cache.key(video_path, *settings)).
+    """
+    entries = {}
+    misses = {}
+    for video_path in map(str, video_paths):
+        key = cache.key(video_path, *settings)
+        hit, cached = cache.get(key)
+        if hit:
+            entries[video_path] = cached
+        else:
+            misses[video_path] = key
+
+    print(f"{what}: {len(entries)} cached, {len(misses)} to extract")
+    jobs = [(video_path, *settings) for video_path in misses]
+    for (video_path, *_), result, error in iter_pose_pool(worker, jobs, _init_worker, workers=workers):
+        if error is not None:
+            # Not cached: a crash may be transient (e.g. out of memory)
+            print(f"⚠️ Extraction failed for {Path(video_path).name}: {error}")
+            entries[video_path] = None
+            continue
+        cache.put(misses[video_path], result[0])
+        entries[video_path] = cache.get(misses[video_path])[1]
+    return entries
+
+
+class LandmarkCache(FeatureCache):
+    """
+    .landmarks.npz file per (video content, extractor version, frame_skip):
+    landmarks (N, 33, 3) float32, total_frames, fps, width, height.
+    """
+
+    @staticmethod
+    def key(video_path, frame_skip=2):
+        return f"{file_sha256(video_path)}-v{EXTRACTOR_VERSION}-s{frame_skip}"
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.landmarks.npz"
+
+    def get(self, key):
+        """
+        Returns:
+            (hit, landmarks): dict with the npz fields, None for videos cached as unreadable
+        """
+        path = self._path(key)
+        if not path.exists():
+            return False, None
+        try:
+            with np.load(path) as data:
+                if not data['readable']:
+                    return True, None
+                return True, {
+                    'landmarks': data['landmarks'],
+                    'total_frames': int(data['total_frames']),
+                    'fps': float(data['fps']),
+                    'width': int(data['width']),
+                    'height': int(data['height']),
+                }
+        except (OSError, ValueError, KeyError):
+            return False, None
+
+    def put(self, key, extracted):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        if extracted is None:
+            fields = {'readable': False}
+        else:
+            # MediaPipe landmarks are float32 already, so this is lossless
+            fields = {'readable': True,
+                      'landmarks': np.asarray(extracted['landmarks'], dtype=np.float32),
+                      'total_frames': extracted['total_frames'], 'fps': extracted['fps'],
+                      'width': extracted['width'], 'height': extracted['height']}
+        path = self._path(key)
+        tmp = path.with_name(f"{key}.{os.getpid()}.tmp.npz")
+        np.savez_compressed(tmp, **fields)
+        os.replace(tmp, path)
+
+
+def get_landmarks(video_paths, cache=None, workers=None, frame_skip=2):
+    """
+    Pose landmarks for every video, extracting only cache misses (in parallel).
+
+    Args:
+        video_paths: iterable of video paths
+        cache: LandmarkCache (default: DEFAULT_CACHE_DIR)
+        workers: worker processes for the misses (default: CPU count)
+        frame_skip: passed to extract_landmarks_from_video
+
+    Returns:
+        dict: {str(video_path): LandmarkCache entry or None}
+    """
+    return _get_cached(cache or LandmarkCache(), video_paths, (frame_skip,), _extract_landmarks_in_worker,
+                       'Landmarks', workers)
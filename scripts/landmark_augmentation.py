@@ -0,0 +1,380 @@
+"""
+Landmark-level data augmentation for the form classifier.
+
+The feature model (compute_features_from_landmarks in
+biceps_curl_form_predictor.py) only sees pose landmarks, so new training
+samples can be made from the cached landmark sequences of the labeled
+videos instead of filming or re-running MediaPipe. Each synthetic sample
+is the source sequence with:
+
+  - mirroring:     x -> 1 - x and left/right landmarks swapped
+  - camera roll:   rotation about the frame centre (in pixel space, so the
+                   frame aspect ratio is respected)
+  - scale jitter:  zoom about the frame centre
+  - time-warping:  a global speed change plus a smooth monotonic warp,
+                   resampled by linear interpolation
+  - landmark noise: Gaussian jitter on x/y
+
+Augmentations of one video are generated as a (n, T, 33, 3) batch and their
+features computed with masked array reductions (batch_features), which
+matches compute_features_from_landmarks value for value on unaugmented
+input. Landmarks come from feature_cache.LandmarkCache, so MediaPipe runs
+once per video across experiments.
+
+Labels follow the training layout: a 'true' / 'false' folder or an
+[output_]true_* / [output_]false_* file name (1 = correct form).
+
+Usage:
+  python landmark_augmentation.py <video_dir> [--per-video 100] [--out augmented_features.csv]
+                                  [--seed 0] [--workers N] [--frame-skip 2] [--min-frames 5]
+"""
+import argparse
+import os
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from biceps_curl_form_predictor import (LEFT_ELBOW, LEFT_HIP, LEFT_SHOULDER, LEFT_WRIST, RIGHT_ELBOW, RIGHT_HIP,
+                                        RIGHT_SHOULDER, RIGHT_WRIST, compute_features_from_landmarks)
+from feature_cache import LandmarkCache, get_landmarks
+
+
+VIDEO_EXTS = {".mp4", ".mov", ".mkv", ".avi", ".m4v"}
+
+# MediaPipe Pose index of each landmark's mirror image (nose stays, left/right pairs swap)
+MIRROR_INDEX = np.array([0, 4, 5, 6, 1, 2, 3, 8, 7, 10, 9, 12, 11, 14, 13, 16, 15,
+                         18, 17, 20, 19, 22, 21, 24, 23, 26, 25, 28, 27, 30, 29, 32, 31])
+
+AUGMENT_DEFAULTS = dict(
+    mirror_prob=0.5,         # chance of a left/right mirrored sample
+    max_rotation_deg=8.0,    # camera roll, uniform in +/- this
+    scale_jitter=0.1,        # zoom factor uniform in 1 +/- this
+    speed_range=(0.8, 1.25), # playback speed (length = frames / speed)
+    warp_strength=0.3,       # local speed variation of the time warp (< 1 keeps it monotonic)
+    noise_std=0.004,         # landmark jitter (normalized coordinates)
+)
+
+# Landmarks compute_features_from_landmarks reads (closed under mirroring)
+FEATURE_LANDMARKS = np.array([LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW,
+                              LEFT_WRIST, RIGHT_WRIST, LEFT_HIP, RIGHT_HIP])
+
+_WARP_HARMONICS = 3
+
+
+def label_from_path(path):
+    """1 / 0 from a true/false folder or file name prefix; None if unlabeled."""
+    path = Path(path)
+    stem = path.stem.lower()
+    if stem.startswith('output_'):
+        stem = stem[len('output_'):]
+    for label, name in ((1, 'true'), (0, 'false')):
+        if stem.startswith(f'{name}_') or name in (part.lower() for part in path.parent.parts):
+            return label
+    return None
+
+
+def list_labeled_videos(folder):
+    """(video path, label) for every labeled video under folder, sorted."""
+    videos = []
+    for path in sorted(Path(folder).rglob('*')):
+        if path.is_file() and path.suffix.lower() in VIDEO_EXTS:
+            label = label_from_path(path)
+            if label is None:
+                print(f"⚠️ Skipping unlabeled video: {path.name}")
+                continue
+            videos.append((path, label))
+    return videos
+
+
+def augment_landmarks(landmarks, n, rng, aspect=1.0, mirror_prob=0.5, max_rotation_deg=8.0, scale_jitter=0.1,
+                      speed_range=(0.8, 1.25), warp_strength=0.3, noise_std=0.004, landmark_ids=None):
+    """
+    n augmented copies of one landmark sequence.
+
+    Args:
+        landmarks: (N, 33, 3) normalized landmarks of the frames with a pose
+        n: number of copies
+        rng: numpy Generator
+        aspect: frame width / height of the source video
+        landmark_ids: only augment these landmarks (the rest are NaN), e.g.
+            FEATURE_LANDMARKS; must contain the mirror of every id
+        remaining args: see AUGMENT_DEFAULTS
+
+    Returns:
+        (sequences, lengths): (n, T, 33, 3) array padded to the longest copy
+        (rows past a copy's length repeat its last frame) and (n,) lengths
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+    frames = len(landmarks)
+    ids = np.arange(landmarks.shape[1]) if landmark_ids is None else np.asarray(landmark_ids)
+    source = landmarks[:, ids]
+    # Mirror permutation within the selected landmarks
+    mirror = np.searchsorted(ids, MIRROR_INDEX[ids], sorter=np.argsort(ids))
+    mirror = np.argsort(ids)[mirror]
+
+    # Time warp: output frame j of a copy samples source position warp(u_j) * (frames - 1)
+    speed = rng.uniform(speed_range[0], speed_range[1], n)
+    lengths = np.maximum(np.rint(frames / speed).astype(int), 2)
+    u = np.minimum(np.arange(lengths.max())[None, :] / (lengths[:, None] - 1), 1.0)
+    k = np.arange(1, _WARP_HARMONICS + 1)
+    # sum |c_k| * pi * k <= warp_strength bounds the warp's slope deviation, endpoints stay fixed
+    coeffs = rng.uniform(-1.0, 1.0, (n, _WARP_HARMONICS)) * warp_strength / (np.pi * k * _WARP_HARMONICS)
+    warped = u + np.einsum('nk,ntk->nt', coeffs, np.sin(np.pi * u[:, :, None] * k))
+    position = np.clip(warped, 0.0, 1.0) * (frames - 1)
+    i0 = np.floor(position).astype(int)
+    i1 = np.minimum(i0 + 1, frames - 1)
+    frac = (position - i0)[:, :, None, None]
+    sequences = source[i0] * (1.0 - frac) + source[i1] * frac
+
+    mirrored = rng.random(n) < mirror_prob
+    if mirrored.any():
+        flipped = sequences[mirrored][:, :, mirror]
+        flipped[..., 0] = 1.0 - flipped[..., 0]
+        sequences[mirrored] = flipped
+
+    # Camera roll + zoom about the frame centre, in pixel-proportional units
+    theta = np.radians(rng.uniform(-max_rotation_deg, max_rotation_deg, n))
+    scale = rng.uniform(1.0 - scale_jitter, 1.0 + scale_jitter, n)
+    cos, sin = (scale * np.cos(theta))[:, None, None], (scale * np.sin(theta))[:, None, None]
+    x = (sequences[..., 0] - 0.5) * aspect
+    y = sequences[..., 1] - 0.5
+    sequences[..., 0] = (cos * x - sin * y) / aspect + 0.5
+    sequences[..., 1] = sin * x + cos * y + 0.5
+    sequences[..., 2] *= scale[:, None, None]
+
+    if noise_std > 0:
+        sequences[..., :2] += rng.normal(0.0, noise_std, sequences[..., :2].shape)
+    if landmark_ids is None:
+        return sequences, lengths
+    full = np.full(sequences.shape[:2] + landmarks.shape[1:], np.nan)
+    full[:, :, ids] = sequences
+    return full, lengths
+
+
+def _angles(point_a, point_b, point_c):
+    """biceps_curl_form_predictor._angles over (..., 2) point arrays."""
+    ba = point_a - point_b
+    bc = point_c - point_b
+    cosine_angle = (ba * bc).sum(axis=-1) / (np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1) + 1e-8)
+    return np.degrees(np.arccos(np.clip(cosine_angle, -1.0, 1.0)))
+
+
+def _masked_stats(values, mask, count):
+    """min, max, mean, std over the last axis where mask is set (count set entries per row)."""
+    vmin = np.where(mask, values, np.inf).min(axis=-1)
+    vmax = np.where(mask, values, -np.inf).max(axis=-1)
+    mean = np.where(mask, values, 0.0).sum(axis=-1) / count
+    std = np.sqrt(np.where(mask, (values - mean[..., None]) ** 2, 0.0).sum(axis=-1) / count)
+    return vmin, vmax, mean, std
+
+
+def batch_features(sequences, lengths, total_frames, fps):
+    """
+    compute_features_from_landmarks for a padded batch of sequences.
+
+    Args:
+        sequences: (B, T, 33, 3) landmarks, valid up to lengths[b]
+        lengths: (B,) processed frames per sequence
+        total_frames: (B,) video frames each sequence stands for
+        fps: video frame rate
+
+    Returns:
+        dict: {feature name: (B,) array}, in compute_features_from_landmarks order
+    """
+    lengths = np.asarray(lengths)
+    xy = sequences[..., :2]
+    steps = np.arange(sequences.shape[1])
+    mask = (steps[None, :] < lengths[:, None])[:, None, :]
+    count = lengths[:, None].astype(np.float64)
+
+    l_shoulder, l_elbow, l_wrist, l_hip = (xy[:, :, i] for i in (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST, LEFT_HIP))
+    r_shoulder, r_elbow, r_wrist, r_hip = (xy[:, :, i] for i in (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST, RIGHT_HIP))
+
+    # (B, 2, T), rows: left, right
+    elbow = np.stack([_angles(l_shoulder, l_elbow, l_wrist), _angles(r_shoulder, r_elbow, r_wrist)], axis=1)
+    shoulder_angle = np.stack([_angles(l_elbow, l_shoulder, l_hip), _angles(r_elbow, r_shoulder, r_hip)], axis=1)
+    # (B, 4, T), rows: left x, left y, right x, right y
+    shoulder_xy = np.concatenate([l_shoulder, r_shoulder], axis=-1).transpose(0, 2, 1)
+
+    mid_shoulder = (l_shoulder + r_shoulder) / 2
+    mid_hip = (l_hip + r_hip) / 2
+    vertical_point = np.stack([mid_shoulder[..., 0], mid_shoulder[..., 1] - 1.0], axis=-1)
+    torso = _angles(vertical_point, mid_shoulder, mid_hip)
+
+    elbow_min, elbow_max, elbow_mean, elbow_std = _masked_stats(elbow, mask, count)
+    elbow_diffs = np.abs(elbow[:, 0] - elbow[:, 1])
+    _, diff_max, diff_mean, _ = _masked_stats(elbow_diffs, mask[:, 0], count[:, 0])
+    shoulder_xy_std = _masked_stats(shoulder_xy, mask, count)[3]
+    shoulder_min, shoulder_max, _, shoulder_std = _masked_stats(shoulder_angle, mask, count)
+    shoulder_lr_diff_mean = _masked_stats(np.abs(shoulder_angle[:, 0] - shoulder_angle[:, 1]),
+                                          mask[:, 0], count[:, 0])[2]
+    torso_min, torso_max, torso_mean, torso_std = _masked_stats(torso, mask[:, 0], count[:, 0])
+
+    # Angular velocity over the valid frame pairs; zero for single-frame sequences
+    # (and for a batch padded to one frame, where there are no pairs to reduce over)
+    if sequences.shape[1] > 1:
+        velocity = np.diff(elbow, axis=-1)
+        has_velocity = (lengths > 1)[:, None]
+        velocity_mask = mask[:, :, 1:]
+        velocity_count = np.maximum(count - 1, 1)
+        _, vel_max, vel_mean, _ = _masked_stats(np.abs(velocity), velocity_mask, velocity_count)
+        vel_std = _masked_stats(velocity, velocity_mask, velocity_count)[3]
+        vel_max, vel_mean, vel_std = (np.where(has_velocity, v, 0.0) for v in (vel_max, vel_mean, vel_std))
+    else:
+        vel_max = vel_mean = vel_std = np.zeros(elbow.shape[:2])
+
+    features = {
+        'video_duration': np.asarray(total_frames, dtype=np.float64) / fps,
+        'processed_frames': lengths.astype(np.float64),
+    }
+    for side, i in (('left', 0), ('right', 1)):
+        features[f'elbow_{side}_min'] = elbow_min[:, i]
+        features[f'elbow_{side}_max'] = elbow_max[:, i]
+        features[f'elbow_{side}_range'] = elbow_max[:, i] - elbow_min[:, i]
+        features[f'elbow_{side}_mean'] = elbow_mean[:, i]
+        features[f'elbow_{side}_std'] = elbow_std[:, i]
+    features['elbow_lr_diff_mean'] = diff_mean
+    features['elbow_lr_diff_max'] = diff_max
+
+    features['shoulder_left_x_std'] = shoulder_xy_std[:, 0]
+    features['shoulder_left_y_std'] = shoulder_xy_std[:, 1]
+    features['shoulder_right_x_std'] = shoulder_xy_std[:, 2]
+    features['shoulder_right_y_std'] = shoulder_xy_std[:, 3]
+    for side, i in (('left', 0), ('right', 1)):
+        features[f'shoulder_{side}_angle_min'] = shoulder_min[:, i]
+        features[f'shoulder_{side}_angle_max'] = shoulder_max[:, i]
+        features[f'shoulder_{side}_angle_range'] = shoulder_max[:, i] - shoulder_min[:, i]
+        features[f'shoulder_{side}_angle_std'] = shoulder_std[:, i]
+    features['shoulder_lr_diff_mean'] = shoulder_lr_diff_mean
+
+    features['torso_angle_mean'] = torso_mean
+    features['torso_angle_std'] = torso_std
+    features['torso_angle_range'] = torso_max - torso_min
+    features['torso_angle_min'] = torso_min
+    features['torso_angle_max'] = torso_max
+
+    for side, i in (('left', 0), ('right', 1)):
+        features[f'elbow_{side}_ang_vel_max'] = vel_max[:, i]
+        features[f'elbow_{side}_ang_vel_std'] = vel_std[:, i]
+        features[f'elbow_{side}_ang_vel_mean'] = vel_mean[:, i]
+
+    features['elbow_min_mean'] = (features['elbow_left_min'] + features['elbow_right_min']) / 2
+    features['elbow_max_mean'] = (features['elbow_left_max'] + features['elbow_right_max']) / 2
+    features['elbow_range_mean'] = (features['elbow_left_range'] + features['elbow_right_range']) / 2
+    features['elbow_mean_mean'] = (features['elbow_left_mean'] + features['elbow_right_mean']) / 2
+    features['elbow_std_mean'] = (features['elbow_left_std'] + features['elbow_right_std']) / 2
+    features['shoulder_y_std_mean'] = (features['shoulder_left_y_std'] + features['shoulder_right_y_std']) / 2
+    return features
+
+
+def augment_features(entry, n, rng, batch_size=64, **params):
+    """
+    Features of n augmented copies of one cached video.
+
+    Args:
+        entry: LandmarkCache entry ('landmarks', 'total_frames', 'fps', 'width', 'height')
+        n: number of copies
+        rng: numpy Generator
+        batch_size: copies generated per array batch (bounds memory)
+        params: overrides for AUGMENT_DEFAULTS
+
+    Returns:
+        DataFrame: one row per copy, compute_features_from_landmarks columns
+    """
+    options = {**AUGMENT_DEFAULTS, **params}
+    landmarks = np.asarray(entry['landmarks'], dtype=np.float64)
+    aspect = entry['width'] / entry['height'] if entry.get('width') and entry.get('height') else 1.0
+    chunks = []
+    for start in range(0, n, batch_size):
+        sequences, lengths = augment_landmarks(landmarks, min(batch_size, n - start), rng, aspect=aspect,
+                                               landmark_ids=FEATURE_LANDMARKS, **options)
+        # Time-warped copies stand for a proportionally longer / shorter video
+        total_frames = entry['total_frames'] * lengths / len(landmarks)
+        chunks.append(pd.DataFrame(batch_features(sequences, lengths, total_frames, entry['fps'])))
+    return pd.concat(chunks, ignore_index=True)
+
+
+def build_augmented_dataset(labeled_videos, landmarks, per_video=100, seed=0, include_original=True,
+                            min_frames=5, **params):
+    """
+    Augmented feature table for a set of labeled videos.
+
+    Args:
+        labeled_videos: [(video path, label)]
+        landmarks: {str(video path): LandmarkCache entry or None} (get_landmarks)
+        per_video: augmented copies per video
+        seed: base seed; each video gets its own stream, so results do not
+            depend on the video order
+        include_original: also emit the unaugmented features (augmentation 0)
+        min_frames: videos with fewer pose frames are skipped
+        params: overrides for AUGMENT_DEFAULTS
+
+    Returns:
+        DataFrame: video, label, augmentation (0 = original), then the features
+    """
+    tables = []
+    for video_path, label in labeled_videos:
+        entry = landmarks.get(str(video_path))
+        if entry is None or len(entry['landmarks']) < min_frames:
+            print(f"⚠️ Skipping {Path(video_path).name}: not enough pose frames")
+            continue
+        rng = np.random.default_rng([seed, zlib.crc32(Path(video_path).name.encode())])
+        table = augment_features(entry, per_video, rng, **params)
+        table.insert(0, 'augmentation', np.arange(1, per_video + 1))
+        if include_original:
+            original = compute_features_from_landmarks(entry['landmarks'], entry['total_frames'], entry['fps'])
+            table = pd.concat([pd.DataFrame([{'augmentation': 0, **original}]), table], ignore_index=True)
+        table.insert(0, 'label', label)
+        table.insert(0, 'video', Path(video_path).name)
+        tables.append(table)
+    if not tables:
+        return pd.DataFrame()
+    return pd.concat(tables, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate augmented form features from cached pose landmarks')
+    parser.add_argument('video_dir', help='Folder with labeled videos (true/false folders or file prefixes)')
+    parser.add_argument('--per-video', type=int, default=100, help='Augmented samples per video')
+    parser.add_argument('--out', default='augmented_features.csv', help='Output CSV')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='Landmark extraction processes')
+    parser.add_argument('--cache-dir', default=None, help='Landmark cache folder')
+    parser.add_argument('--frame-skip', type=int, default=2)
+    parser.add_argument('--min-frames', type=int, default=5)
+    parser.add_argument('--no-original', action='store_true', help='Leave out the unaugmented rows')
+    args = parser.parse_args()
+
+    labeled = list_labeled_videos(args.video_dir)
+    if not labeled:
+        print(f"❌ No labeled videos in {args.video_dir}")
+        return
+    landmarks = get_landmarks([path for path, _ in labeled], cache=LandmarkCache(args.cache_dir),
+                              workers=args.workers, frame_skip=args.frame_skip)
+
+    started = time.perf_counter()
+    dataset = build_augmented_dataset(labeled, landmarks, per_video=args.per_video, seed=args.seed,
+                                      include_original=not args.no_original, min_frames=args.min_frames)
+    elapsed = time.perf_counter() - started
+    if dataset.empty:
+        print("❌ No usable videos")
+        return
+
+    out_dir = os.path.dirname(os.path.abspath(args.out))
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = f"{args.out}.{os.getpid()}.tmp"
+    dataset.to_csv(tmp, index=False)
+    os.replace(tmp, args.out)
+
+    synthetic = int((dataset['augmentation'] > 0).sum())
+    print(f"✅ {len(dataset)} rows ({synthetic} augmented) from {dataset['video'].nunique()} videos "
+          f"in {elapsed:.1f}s ({synthetic / max(elapsed, 1e-9):.0f} samples/s)")
+    print(f"   TRUE: {int((dataset['label'] == 1).sum())}  FALSE: {int((dataset['label'] == 0).sum())}")
+    print(f"Saved: {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Compact landmark-sequence format for clients that run pose estimation
+on-device and upload poses instead of video.
+
+JSON form (application/json):
+    {
+      "width": 720, "height": 1280,          # frame size the poses came from
+      "fps": 30,                             # optional, estimated from t if absent
+      "frames": [
+        {"t": 0.000, "landmarks": [[x, y, z, visibility], ... 33 rows]},
+        {"t": 0.033, "landmarks": null},     # no pose in this frame
+        ...
+      ]
+    }
+  x/y are normalized to [0, 1] like MediaPipe's NormalizedLandmark;
+  visibility may be omitted (3 values per row), defaulting to 1.0.
+
+Binary form (application/octet-stream), little-endian:
+    4s   magic  b"GBL1"
+    I    n_frames
+    H    width
+    H    height
+    f    fps (0 if unknown)
+    f32  timestamps[n_frames]
+    f32  landmarks[n_frames, 33, 4]   (rows of NaN = no pose)
+  which is ~530 bytes per frame, ~16 KB per second at 30 fps.
+"""
+import json
+import struct
+from typing import Optional
+
+import numpy as np
+
+
+NUM_LANDMARKS = 33
+MAGIC = b"GBL1"
+_HEADER = struct.Struct("<4sIHHf")
+MAX_FRAMES = 60 * 60 * 15  # 15 minutes at 60 fps
+
+
+class LandmarkSequence:
+    """
+    A timed sequence of pose landmarks.
+
+    Attributes:
+        timestamps: float64 array (N,) in seconds, non-decreasing
+        landmarks: float32 array (N, 33, 4) [x, y, z, visibility]; NaN rows mean no pose
+        width, height: frame size in pixels the normalized coordinates refer to
+        fps: nominal frame rate
+    """
+    def __init__(self, timestamps, landmarks, width, height, fps: Optional[float] = None):
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self.landmarks = np.asarray(landmarks, dtype=np.float32)
+        self.width = int(width)
+        self.height = int(height)
+        self._validate()
+        self.fps = float(fps) if fps else self._estimate_fps()
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def duration(self) -> float:
+        return float(self.timestamps[-1] - self.timestamps[0]) if len(self) else 0.0
+
+    @property
+    def image_shape(self):
+        return (self.height, self.width, 3)
+
+    def has_pose(self) -> np.ndarray:
+        """Boolean mask (N,) of frames that carry a pose."""
+        return ~np.isnan(self.landmarks).any(axis=(1, 2))
+
+    def frame_landmarks(self, i: int):
+        """Landmarks for frame i as (33, 4), or None when no pose was detected."""
+        lm = self.landmarks[i]
+        return None if np.isnan(lm).any() else lm
+
+    def _validate(self):
+        n = len(self.timestamps)
+        if n == 0:
+            raise ValueError("Landmark sequence is empty")
+        if n > MAX_FRAMES:
+            raise ValueError(f"Too many frames ({n} > {MAX_FRAMES})")
+        if self.landmarks.shape != (n, NUM_LANDMARKS, 4):
+            raise ValueError(f"Expected landmarks of shape ({n}, {NUM_LANDMARKS}, 4), got {self.landmarks.shape}")
+        if self.width <= 0 or self.height <= 0:
+            raise ValueError("width and height must be positive")
+        if not np.isfinite(self.timestamps).all():
+            raise ValueError("Timestamps must be finite")
+        if n > 1 and np.any(np.diff(self.timestamps) < 0):
+            raise ValueError("Timestamps must be non-decreasing")
+
+    def _estimate_fps(self) -> float:
+        if len(self) < 2:
+            return 30.0
+        dt = np.median(np.diff(self.timestamps))
+        return float(1.0 / dt) if dt > 0 else 30.0
+
+    # ---- decoding ----
+
+    @classmethod
+    def from_json(cls, payload) -> "LandmarkSequence":
+        if isinstance(payload, (bytes, str)):
+            payload = json.loads(payload)
+        if not isinstance(payload, dict) or 'frames' not in payload:
+            raise ValueError("JSON payload must be an object with a 'frames' list")
+        frames = payload['frames']
+        if not isinstance(frames, list):
+            raise ValueError("'frames' must be a list")
+
+        n = len(frames)
+        timestamps = np.empty(n, dtype=np.float64)
+        landmarks = np.full((n, NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+        for i, frame in enumerate(frames):
+            try:
+                timestamps[i] = float(frame['t'])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Frame {i} is missing a numeric 't'")
+            lm = frame.get('landmarks')
+            if lm is None:
+                continue
+            try:
+                lm = np.asarray(lm, dtype=np.float32)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Frame {i}: landmarks must be numeric ({e})")
+            if lm.shape == (NUM_LANDMARKS, 3):
+                landmarks[i, :, :3] = lm
+                landmarks[i, :, 3] = 1.0
+            elif lm.shape == (NUM_LANDMARKS, 4):
+                landmarks[i] = lm
+            else:
+                raise ValueError(f"Frame {i}: landmarks must be {NUM_LANDMARKS}x3 or {NUM_LANDMARKS}x4, got {lm.shape}")
+
+        try:
+            width, height = int(payload['width']), int(payload['height'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("JSON payload requires integer 'width' and 'height'")
+        return cls(timestamps, landmarks, width, height, payload.get('fps'))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "LandmarkSequence":
+        if len(data) < _HEADER.size:
+            raise ValueError("Binary payload too short")
+        magic, n, width, height, fps = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("Bad magic; expected GBL1 landmark payload")
+        if n > MAX_FRAMES:
+            raise ValueError(f"Too many frames ({n} > {MAX_FRAMES})")
+        expected = _HEADER.size + 4 * n + 4 * n * NUM_LANDMARKS * 4
+        if len(data) != expected:
+            raise ValueError(f"Binary payload size {len(data)} does not match {n} frames ({expected} bytes)")
+        offset = _HEADER.size
+        timestamps = np.frombuffer(data, dtype='<f4', count=n, offset=offset)
+        offset += 4 * n
+        landmarks = np.frombuffer(data, dtype='<f4', count=n * NUM_LANDMARKS * 4, offset=offset)
+        return cls(timestamps, landmarks.reshape(n, NUM_LANDMARKS, 4), width, height, fps or None)
+
+    @classmethod
+    def from_request_body(cls, data: bytes, content_type: str = '') -> "LandmarkSequence":
+        """Decode either form, using the content type and falling back to the magic bytes."""
+        content_type = (content_type or '').lower()
+        if data[:4] == MAGIC or 'octet-stream' in content_type:
+            return cls.from_bytes(data)
+        try:
+            return cls.from_json(data)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON landmark payload: {e}")
+
+    # ---- encoding ----
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(MAGIC, len(self), self.width, self.height, float(self.fps or 0.0))
+        return (header
+                + self.timestamps.astype('<f4').tobytes()
+                + self.landmarks.astype('<f4').tobytes())
+
+    def to_json(self) -> dict:
+        frames = []
+        for i, t in enumerate(self.timestamps):
+            lm = self.frame_landmarks(i)
+            frames.append({'t': round(float(t), 4),
+                           'landmarks': lm.round(5).tolist() if lm is not None else None})
+        return {'width': self.width, 'height': self.height, 'fps': self.fps, 'frames': frames}
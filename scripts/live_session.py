@@ -0,0 +1,187 @@
+"""
+Server-side live rep counting over a stream of per-frame poses.
+
+A LiveCurlSession wraps the same per-frame analysis the video analyzer uses
+(BicepsCurlVideoAnalyzer._process_frame) so live counts, form checks and
+rep events match an offline analysis of the same poses. Dwell timing uses
+the client's frame timestamps (video time), not the server clock, so
+network jitter does not change what gets counted.
+
+Packets (one per frame):
+  - JSON text:  {"t": 1.23, "landmarks": [[x, y, z, visibility] x 33] | null, "seq": 17?}
+                {"t": 1.23, "frame": "<base64 JPEG>"}   (low-res frame; server runs pose)
+  - binary:     float32 t followed by float32[33, 4] landmarks (little-endian, 532 bytes);
+                NaN landmarks mean no pose
+
+Messages pushed back:
+  {"type": "rep", "arm", "count", "totalReps", "time_s", "angle", "aligned", ...}
+  {"type": "warning", "arm", "code", "message", "active"}   (edge-triggered)
+  {"type": "ack", "seq", "processingMs"}                     (only if the packet had "seq")
+"""
+import base64
+import time
+
+import numpy as np
+
+from biceps_curl_video_analyzer import BicepsCurlVideoAnalyzer
+from landmark_payload import NUM_LANDMARKS
+from pose_detection import PoseDetector
+
+
+BINARY_PACKET_SIZE = 4 + NUM_LANDMARKS * 4 * 4
+
+
+class LiveCurlSession:
+    """
+    Per-connection counter state for a live curl session.
+
+    Args:
+        width, height: frame size the normalized landmarks refer to
+        fps: nominal client frame rate (only used for reporting)
+    """
+    def __init__(self, width, height, fps=30.0):
+        self.image_shape = (int(height), int(width), 3)
+        self.analyzer = BicepsCurlVideoAnalyzer(
+            video_path='live',
+            visualize=False,
+            output_dir='.',
+            keep_timeline=False
+        )
+        self.analyzer.fps = float(fps or 30.0)
+        self.analyzer.rep_counter.debug_mode = False
+        self.frames = 0
+        self.t0 = None
+        self.last_t = 0.0
+        self._events_sent = 0
+        self._active_warnings = {}
+
+    @property
+    def pose_detector(self) -> PoseDetector:
+        return self.analyzer.pose_detector
+
+    def process_packet(self, packet):
+        """
+        Process one frame packet (str/bytes from the socket or an already
+        decoded dict) and return the list of messages to push back.
+
+        Raises:
+            ValueError: on a malformed packet
+        """
+        started = time.perf_counter()
+        seq = None
+        if isinstance(packet, (bytes, bytearray)):
+            t, landmarks = self._decode_binary(packet)
+            self._check_timestamp(t)
+            self.pose_detector.set_landmarks(landmarks)
+        else:
+            if not isinstance(packet, dict):
+                raise ValueError("Packet must be a JSON object or a binary landmark frame")
+            try:
+                t = float(packet['t'])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError("Packet is missing a numeric 't'")
+            self._check_timestamp(t)
+            seq = packet.get('seq')
+            if packet.get('frame') is not None:
+                self._detect_from_jpeg(packet['frame'])
+            else:
+                landmarks = packet.get('landmarks')
+                if landmarks is not None:
+                    try:
+                        landmarks = np.asarray(landmarks, dtype=np.float32)
+                    except (TypeError, ValueError):
+                        raise ValueError("landmarks must be numeric [x, y, z(, visibility)] rows")
+                    if landmarks.shape == (NUM_LANDMARKS, 3):
+                        landmarks = np.concatenate([landmarks, np.ones((NUM_LANDMARKS, 1), np.float32)], axis=1)
+                    if landmarks.shape != (NUM_LANDMARKS, 4):
+                        raise ValueError(f"landmarks must be {NUM_LANDMARKS}x3 or {NUM_LANDMARKS}x4")
+                self.pose_detector.set_landmarks(landmarks)
+
+        if self.t0 is None:
+            self.t0 = t
+        t_sec = max(t - self.t0, self.last_t)  # never let video time run backwards
+        self.last_t = t_sec
+        self.frames += 1
+
+        status = self.analyzer._process_frame(self.frames, t_sec, self.image_shape)
+
+        messages = self._new_rep_messages(status)
+        messages.extend(self._warning_messages(status))
+        if seq is not None:
+            messages.append({
+                'type': 'ack',
+                'seq': seq,
+                'processingMs': round((time.perf_counter() - started) * 1000, 3)
+            })
+        return messages
+
+    def summary(self):
+        """
+        Final counts in the /api/analyze-video results schema, without
+        timeline, formScore and formLabel: the ML form score is computed from
+        whole-recording timeline features, which a live session does not keep
+        (score a saved recording through /api/analyze-video instead).
+        """
+        self.analyzer.frame_count = self.frames
+        self.analyzer.duration = self.last_t
+        results = self.analyzer.get_results_dict()
+        for key in ('timeline', 'formScore', 'formLabel'):
+            results.pop(key, None)
+        results['events'] = self.analyzer._events
+        return results
+
+    # ---- helpers ----
+
+    @staticmethod
+    def _check_timestamp(t):
+        # A NaN/inf first timestamp would poison t0 and every dwell time after it
+        if not np.isfinite(t):
+            raise ValueError("Packet timestamp 't' must be finite")
+
+    @staticmethod
+    def _decode_binary(packet):
+        if len(packet) != BINARY_PACKET_SIZE:
+            raise ValueError(f"Binary packet must be {BINARY_PACKET_SIZE} bytes, got {len(packet)}")
+        data = np.frombuffer(packet, dtype='<f4')
+        landmarks = data[1:].reshape(NUM_LANDMARKS, 4)
+        return float(data[0]), (None if np.isnan(landmarks).any() else landmarks)
+
+    def _detect_from_jpeg(self, encoded):
+        import cv2
+        try:
+            buf = np.frombuffer(base64.b64decode(encoded), dtype=np.uint8)
+        except (ValueError, TypeError):
+            raise ValueError("frame must be base64-encoded JPEG/PNG data")
+        image = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("Could not decode frame image")
+        self.image_shape = image.shape
+        self.pose_detector.detect_pose(image, draw=False)
+
+    def _new_rep_messages(self, status):
+        events = self.analyzer._events
+        messages = []
+        for event in events[self._events_sent:]:
+            message = {'type': 'rep', 'totalReps': status.get('total_reps', 0)}
+            message.update(event)
+            messages.append(message)
+        self._events_sent = len(events)
+        return messages
+
+    def _warning_messages(self, status):
+        current = {}
+        for arm in ('left', 'right'):
+            visible = status.get(f'{arm}_arm_visible', True)
+            if visible and status.get(f'{arm}_alignment_warning'):
+                current[(arm, 'elbow_alignment')] = f"Keep {arm} elbow closer to your side"
+            if status.get(f'{arm}_visibility_message'):
+                current[(arm, 'arm_not_visible')] = status[f'{arm}_visibility_message']
+
+        messages = []
+        for (arm, code), text in current.items():
+            if (arm, code) not in self._active_warnings:
+                messages.append({'type': 'warning', 'arm': arm, 'code': code, 'message': text, 'active': True})
+        for (arm, code) in self._active_warnings.keys() - current.keys():
+            messages.append({'type': 'warning', 'arm': arm, 'code': code, 'message': '', 'active': False})
+        self._active_warnings = current
+        return messages
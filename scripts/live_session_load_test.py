@@ -0,0 +1,191 @@
+"""
+Load test for live rep-counting sessions.
+
+Each simulated client streams synthetic curl landmarks in real time (one
+packet per frame at --fps) and waits for the server's ack, so the measured
+latency is the full per-frame round trip. The session count is ramped and
+the largest count that still keeps up with real time is reported.
+
+Usage:
+  # against a running server (python server/app.py or gunicorn)
+  python live_session_load_test.py --url ws://localhost:8000/api/live-session
+
+  # without a server: same LiveCurlSession code, one thread per session,
+  # measures the CPU ceiling of a single process
+  python live_session_load_test.py --inprocess
+
+Options:
+  --sessions 1,2,4,8,16,32   session counts to ramp through
+  --duration 10              seconds streamed per step
+  --fps 30                   packets per second per session
+
+A step is "sustained" when every session achieves >= 95% of the target
+packet rate and the p95 round trip stays below one frame interval.
+
+Note: with gunicorn each WebSocket holds one thread, so the server allows
+GUNICORN_THREADS - HTTP_RESERVED_THREADS sessions (see .env.example); raise
+GUNICORN_THREADS to test more sessions than that.
+"""
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+
+from live_session import LiveCurlSession
+
+
+WIDTH, HEIGHT = 720, 1280
+
+
+def synthetic_curl_landmarks(duration_s, fps=30.0, rep_period_s=2.5, seed=0):
+    """
+    Front-facing curl poses: every rep_period_s both elbows flex 170° -> 30° -> 170°
+    over the first 75% of the period and rest extended for the remainder.
+
+    Returns:
+        (timestamps (N,), landmarks (N, 33, 4)) normalized like MediaPipe output
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(0.0, duration_s, 1.0 / fps)
+    phase = np.clip((t % rep_period_s) / (0.75 * rep_period_s), 0.0, 1.0)
+    elbow = 170.0 - 140.0 * np.sin(np.pi * phase)
+
+    lm = np.zeros((len(t), 33, 4), dtype=np.float32)
+    lm[:, :, :2] = 0.5
+    lm[:, :, 3] = 0.95
+    theta = np.radians(180.0 - elbow)
+    for shoulder, elbow_id, wrist, hip, x, sign in ((11, 13, 15, 23, 0.42, -1), (12, 14, 16, 24, 0.58, 1)):
+        lm[:, shoulder, 0], lm[:, shoulder, 1] = x, 0.35
+        lm[:, elbow_id, 0], lm[:, elbow_id, 1] = x, 0.50
+        lm[:, wrist, 0] = x + sign * 0.13 * np.sin(theta)
+        lm[:, wrist, 1] = 0.50 + 0.13 * np.cos(theta)
+        lm[:, hip, 0], lm[:, hip, 1] = x, 0.65
+    lm[:, :, :2] += rng.normal(0.0, 0.001, (len(t), 33, 2)).astype(np.float32)
+    return t, lm
+
+
+class _ClientStats:
+    def __init__(self):
+        self.latencies_ms = []
+        self.sent = 0
+        self.reps = 0
+        self.errors = 0
+
+
+def _pace(start, i, fps):
+    delay = start + i / fps - time.perf_counter()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def _run_inprocess_client(stats, duration, fps, seed):
+    t, lm = synthetic_curl_landmarks(duration, fps, seed=seed)
+    session = LiveCurlSession(WIDTH, HEIGHT, fps)
+    start = time.perf_counter()
+    for i in range(len(t)):
+        _pace(start, i, fps)
+        sent_at = time.perf_counter()
+        messages = session.process_packet({'t': float(t[i]), 'landmarks': lm[i], 'seq': i})
+        stats.latencies_ms.append((time.perf_counter() - sent_at) * 1000)
+        stats.reps += sum(1 for m in messages if m['type'] == 'rep')
+        stats.sent += 1
+
+
+def _run_ws_client(stats, url, duration, fps, seed):
+    from simple_websocket import Client
+
+    t, lm = synthetic_curl_landmarks(duration, fps, seed=seed)
+    ws = Client.connect(url)
+    try:
+        ws.send(json.dumps({'type': 'start', 'width': WIDTH, 'height': HEIGHT, 'fps': fps}))
+        ready = json.loads(ws.receive(timeout=10))
+        if ready.get('type') != 'ready':
+            stats.errors += 1
+            return
+        start = time.perf_counter()
+        for i in range(len(t)):
+            _pace(start, i, fps)
+            sent_at = time.perf_counter()
+            ws.send(json.dumps({'t': round(float(t[i]), 4), 'landmarks': lm[i].round(5).tolist(), 'seq': i}))
+            while True:
+                message = ws.receive(timeout=10)
+                if message is None:
+                    stats.errors += 1
+                    return
+                message = json.loads(message)
+                if message['type'] == 'rep':
+                    stats.reps += 1
+                elif message['type'] == 'error':
+                    stats.errors += 1
+                elif message['type'] == 'ack' and message['seq'] == i:
+                    break
+            stats.latencies_ms.append((time.perf_counter() - sent_at) * 1000)
+            stats.sent += 1
+        ws.send(json.dumps({'type': 'end'}))
+        ws.receive(timeout=10)
+    finally:
+        ws.close()
+
+
+def run_step(n_sessions, duration, fps, url=None):
+    """Run n_sessions concurrent clients for `duration` seconds and summarize."""
+    stats = [_ClientStats() for _ in range(n_sessions)]
+    threads = []
+    started = time.perf_counter()
+    for k in range(n_sessions):
+        if url:
+            target, args = _run_ws_client, (stats[k], url, duration, fps, k)
+        else:
+            target, args = _run_inprocess_client, (stats[k], duration, fps, k)
+        th = threading.Thread(target=target, args=args, daemon=True)
+        th.start()
+        threads.append(th)
+    for th in threads:
+        th.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = np.concatenate([s.latencies_ms for s in stats if s.latencies_ms]) if any(s.latencies_ms for s in stats) else np.array([np.nan])
+    min_rate = min(s.sent for s in stats) / elapsed
+    p95 = float(np.percentile(latencies, 95))
+    return {
+        'sessions': n_sessions,
+        'packets': sum(s.sent for s in stats),
+        'min_rate_hz': round(min_rate, 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(p95, 2),
+        'reps': sum(s.reps for s in stats),
+        'errors': sum(s.errors for s in stats),
+        'sustained': bool(min_rate >= 0.95 * fps and p95 < 1000.0 / fps and not any(s.errors for s in stats)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent live-session load test')
+    parser.add_argument('--url', help='WebSocket URL of /api/live-session')
+    parser.add_argument('--inprocess', action='store_true', help='Drive LiveCurlSession directly (no server)')
+    parser.add_argument('--sessions', default='1,2,4,8,16,32', help='Comma-separated session counts')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds streamed per step')
+    parser.add_argument('--fps', type=float, default=30.0, help='Packets per second per session')
+    args = parser.parse_args()
+
+    if not args.url and not args.inprocess:
+        parser.error('pass --url ws://host:port/api/live-session or --inprocess')
+
+    print(f"{'sessions':>8} {'packets':>8} {'min Hz':>7} {'p50 ms':>7} {'p95 ms':>7} {'reps':>5} {'errors':>6}  sustained")
+    best = 0
+    for n in [int(x) for x in args.sessions.split(',') if x.strip()]:
+        row = run_step(n, args.duration, args.fps, url=None if args.inprocess else args.url)
+        print(f"{row['sessions']:>8} {row['packets']:>8} {row['min_rate_hz']:>7} {row['p50_ms']:>7} "
+              f"{row['p95_ms']:>7} {row['reps']:>5} {row['errors']:>6}  {'yes' if row['sustained'] else 'NO'}")
+        if row['sustained']:
+            best = n
+        else:
+            break
+
+    print(f"\nSustained up to {best} concurrent sessions at {args.fps:.0f} packets/s each")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+
+from rf_inference import CompiledForest, compile_cached
+
+
+DEFAULT_MODELS_DIR = Path(__file__).resolve().parent.parent / 'models'
+DEFAULT_FORM_MODEL = 'biceps_curl_rf_augmented.joblib'
+DEFAULT_CACHE_DIR = Path(os.environ.get('GYMBUDDY_MODEL_CACHE', Path(tempfile.gettempdir()) / 'gymbuddy_model_cache'))
+
+
+class ModelEntry:
+    """
+    A loaded model together with the file signature it was loaded from
+    and the feature schema it expects.
+    """
+    def __init__(self, path, model, signature, compiled: Optional[CompiledForest] = None):
+        self.path = str(path)
+        self.model = model
+        self.signature = signature
+        self.compiled = compiled
+        self.feature_names = [str(f) for f in model.feature_names_in_]
+        self.loaded_at = time.time()
+
+    def build_vector(self, features: Dict) -> List[float]:
+        """
+        Order a feature dict by the model's schema.
+
+        Raises:
+            ValueError: if any feature the model was trained on is missing
+        """
+        missing = [name for name in self.feature_names if name not in features]
+        if missing:
+            raise ValueError(f"Missing features for {os.path.basename(self.path)}: {missing}")
+        return [features[name] for name in self.feature_names]
+
+    def predict_proba(self, X):
+        """Class probabilities via the compiled forest when available, else sklearn."""
+        if self.compiled is not None:
+            return self.compiled.predict_proba(X)
+        return self.model.predict_proba(X)
+
+    def predict(self, X):
+        if self.compiled is not None:
+            return self.compiled.predict(X)
+        return self.model.predict(X)
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of joblib models.
+
+    Each model file is loaded once per process and reused by every analysis.
+    The file is re-checked at most every `check_interval` seconds; when its
+    signature (mtime, size, inode) changes the new file is loaded and
+    validated *before* the cached entry is swapped, so a half-written or
+    incompatible file never replaces a working model. A file that fails to
+    load is not retried until its signature changes again. Deploy new models
+    by writing to a temp file and `os.replace`-ing it over the old one.
+    """
+    def __init__(self, models_dir=None, check_interval: float = 1.0, mmap_mode: Optional[str] = 'r',
+                 cache_dir=None):
+        self.models_dir = Path(models_dir) if models_dir else DEFAULT_MODELS_DIR
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.check_interval = check_interval
+        self.mmap_mode = mmap_mode
+        self._entries: Dict[str, ModelEntry] = {}
+        self._last_checked: Dict[str, float] = {}
+        self._failed: Dict[str, Tuple[Tuple[int, int, int], Exception]] = {}  # key -> (signature, load error)
+        self._lock = threading.Lock()
+
+    def resolve(self, name_or_path) -> Path:
+        path = Path(name_or_path)
+        if not path.is_absolute() and not path.exists():
+            path = self.models_dir / path
+        return path.resolve()
+
+    @staticmethod
+    def _signature(path: Path) -> Tuple[int, int, int]:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _load(self, path: Path, signature) -> ModelEntry:
+        # mmap_mode only applies to numpy buffers stored in the pickle;
+        # it is ignored for pickles that were written compressed.
+        model = joblib.load(path, mmap_mode=self.mmap_mode)
+        if not hasattr(model, 'feature_names_in_'):
+            raise ValueError(f"{path.name} has no feature_names_in_; cannot validate schema")
+        n_features = getattr(model, 'n_features_in_', len(model.feature_names_in_))
+        if n_features != len(model.feature_names_in_):
+            raise ValueError(f"{path.name}: n_features_in_={n_features} does not match feature_names_in_")
+        return ModelEntry(path, model, signature, self._compile(path, model, signature))
+
+    def _compile(self, path: Path, model, signature) -> Optional[CompiledForest]:
+        """
+        Flatten forests into memory-mapped node arrays shared by every process
+        on the host (keyed by file signature). Falls back to sklearn on failure.
+        """
+        if not hasattr(model, 'estimators_'):
+            return None
+        key = hashlib.sha1(f"{path}:{signature}".encode('utf-8')).hexdigest()[:16]
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            return compile_cached(model, self.cache_dir, f"{path.stem}-{key}")
+        except Exception as e:
+            print(f"⚠️ Could not compile {path.name}, using sklearn inference: {e}")
+            return None
+
+    def get(self, name_or_path=DEFAULT_FORM_MODEL) -> ModelEntry:
+        """
+        Return the cached entry for a model, loading or reloading it if the
+        file changed on disk.
+
+        Raises:
+            FileNotFoundError: if the model was never loaded and the file is missing
+        """
+        path = self.resolve(name_or_path)
+        key = str(path)
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry is not None and now - self._last_checked.get(key, 0.0) < self.check_interval:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(key)
+            self._last_checked[key] = now
+            try:
+                signature = self._signature(path)
+            except FileNotFoundError:
+                if entry is not None:
+                    # File is mid-replace or was removed; keep serving the old model
+                    return entry
+                raise
+
+            if entry is not None and entry.signature == signature:
+                return entry
+
+            failed = self._failed.get(key)
+            if failed is not None and failed[0] == signature:
+                # Same bad file as last time: do not load (or warn) again
+                if entry is None:
+                    raise failed[1]
+                return entry
+
+            try:
+                new_entry = self._load(path, signature)
+            except Exception as e:
+                self._failed[key] = (signature, e)
+                if entry is None:
+                    raise
+                print(f"⚠️ Reload of {path.name} failed, keeping previous model: {e}")
+                return entry
+            self._failed.pop(key, None)
+
+            if entry is not None:
+                if new_entry.feature_names != entry.feature_names:
+                    print(f"⚠️ {path.name} reloaded with a different feature schema ({len(new_entry.feature_names)} features)")
+                print(f"✅ Reloaded model {path.name}")
+            self._entries[key] = new_entry
+            return new_entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._last_checked.clear()
+            self._failed.clear()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """Return the process-wide model registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
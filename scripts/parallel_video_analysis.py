@@ -0,0 +1,173 @@
+"""
+Parallel pose extraction for a single long video.
+
+The video is split into contiguous frame segments, one per worker process.
+Each worker decodes up to its segment (frame-accurate, unlike
+CAP_PROP_POS_FRAMES seeks, which land on keyframes for many codecs), first
+runs pose on a short overlap before the segment so MediaPipe's tracker has
+settled, and then records landmarks for its own frames. The per-segment
+arrays are concatenated in frame order. BicepsCurlVideoAnalyzer replays
+the stitched stream through a single BicepsCurlCounter, so counter state
+never has to be merged across segments. The tracker still restarts at
+each segment, so counts are not guaranteed to match a sequential run;
+--compare checks a given video.
+
+Usage:
+  python parallel_video_analysis.py <video.mp4> [--workers N] [--compare]
+
+  --compare also runs the sequential analyzer and checks that the rep
+  counts agree, printing both wall-clock times.
+"""
+import math
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from pose_pool import iter_pose_pool
+
+
+NUM_LANDMARKS = 33
+MIN_SEGMENT_SECONDS = 10.0  # shorter segments don't pay back the worker start-up cost
+
+_worker_detector = None
+
+
+def _init_worker(pose_config):
+    global _worker_detector
+    # Imported here so the parent process never loads a MediaPipe graph for this
+    from pose_detection import PoseDetector
+    _worker_detector = PoseDetector(**pose_config)
+
+
+def _extract_segment(video_path, start_frame, end_frame, overlap_frames):
+    """
+    Run pose on frames [start_frame, end_frame) (0-based; end_frame=None reads to EOF),
+    warming the tracker up on the preceding overlap_frames.
+
+    Returns:
+        (start_frame, landmarks (n, 33, 4) float32 with NaN rows for no pose, image_shape)
+    """
+    from biceps_curl_video_analyzer import resize_frame
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video file {video_path}")
+
+    # grab() without retrieve is far cheaper than pose, and lands exactly on `first`
+    first = max(0, start_frame - overlap_frames)
+    for _ in range(first):
+        if not cap.grab():
+            break
+
+    rows = []
+    image_shape = None
+    frame_no = first
+    while end_frame is None or frame_no < end_frame:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame = resize_frame(frame)
+        image_shape = frame.shape
+        _worker_detector.detect_pose(frame, draw=False)
+        if frame_no >= start_frame:
+            lm = _worker_detector.get_landmarks_array()
+            rows.append(lm if lm is not None else np.full((NUM_LANDMARKS, 4), np.nan, dtype=np.float32))
+        frame_no += 1
+    cap.release()
+
+    landmarks = np.stack(rows) if rows else np.empty((0, NUM_LANDMARKS, 4), dtype=np.float32)
+    return start_frame, landmarks, image_shape
+
+
+def plan_segments(frame_count, fps, workers, min_segment_s=MIN_SEGMENT_SECONDS):
+    """Split [0, frame_count) into at most `workers` contiguous segments; the last is open-ended."""
+    min_len = max(1, int(min_segment_s * (fps or 30.0)))
+    n = max(1, min(workers, frame_count // min_len if frame_count else 1))
+    bounds = [round(i * frame_count / n) for i in range(n + 1)]
+    return [(bounds[i], bounds[i + 1] if i < n - 1 else None) for i in range(n)]
+
+
+def extract_landmarks_parallel(video_path, workers=None, pose_config=None, overlap_s=1.0,
+                               progress_callback=None):
+    """
+    Extract per-frame pose landmarks for the whole video using a process pool.
+
+    Args:
+        video_path: input video
+        workers: number of processes (default: CPU count)
+        pose_config: PoseDetector keyword arguments for the workers
+        overlap_s: seconds of tracker warm-up before each segment
+        progress_callback: called as (frames_done, frame_count) when segments finish
+
+    Returns:
+        (landmarks (N, 33, 4) float32, image_shape) with NaN rows where no pose was found
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video file {video_path}")
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+
+    workers = workers or os.cpu_count() or 1
+    segments = plan_segments(frame_count, fps, workers)
+    overlap_frames = int(math.ceil(overlap_s * fps))
+
+    results = {}
+    done = 0
+    jobs = [(video_path, start, end, overlap_frames) for start, end in segments]
+    for _, result, error in iter_pose_pool(_extract_segment, jobs, _init_worker, (pose_config or {},),
+                                           workers=len(segments)):
+        if error is not None:
+            raise error
+        start, landmarks, shape = result
+        results[start] = (landmarks, shape)
+        done += len(landmarks)
+        if progress_callback:
+            progress_callback(min(done, frame_count), frame_count)
+
+    ordered = [results[start] for start, _ in segments]
+    image_shape = next((shape for _, shape in ordered if shape is not None), None)
+    landmarks = np.concatenate([lm for lm, _ in ordered], axis=0)
+    return landmarks, image_shape
+
+
+def main(argv):
+    if len(argv) < 2:
+        print(__doc__)
+        return 1
+    video_path = argv[1]
+    workers = int(argv[argv.index('--workers') + 1]) if '--workers' in argv else os.cpu_count()
+
+    from biceps_curl_video_analyzer import BicepsCurlVideoAnalyzer
+
+    t0 = time.perf_counter()
+    parallel = BicepsCurlVideoAnalyzer(video_path, visualize=False, workers=workers)
+    parallel.rep_counter.debug_mode = False
+    parallel.analyze()
+    t_parallel = time.perf_counter() - t0
+    print(f"Parallel ({workers} workers): {parallel.rep_counter.total_reps} reps in {t_parallel:.1f}s")
+
+    if '--compare' in argv:
+        t0 = time.perf_counter()
+        sequential = BicepsCurlVideoAnalyzer(video_path, visualize=False)
+        sequential.rep_counter.debug_mode = False
+        sequential.analyze()
+        t_seq = time.perf_counter() - t0
+        print(f"Sequential: {sequential.rep_counter.total_reps} reps in {t_seq:.1f}s "
+              f"(speed-up {t_seq / t_parallel:.2f}x)")
+        keys = ['total_reps', 'left_reps', 'right_reps', 'left_correct_reps', 'right_correct_reps']
+        a, b = parallel.rep_counter.get_status(), sequential.rep_counter.get_status()
+        mismatched = [k for k in keys if a[k] != b[k]]
+        if mismatched:
+            print(f"❌ Rep counts differ: {[(k, a[k], b[k]) for k in mismatched]}")
+            return 1
+        print("✅ Rep counts match the sequential run")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
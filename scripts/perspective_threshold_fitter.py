@@ -1,3 +1,11 @@
+"""
+Per-perspective angle statistics from angle_threshold_finder.py mins/maxs.
+
+arm_up / arm_down / torso are means of the per-video angle extremes in each
+width_to_height_med bucket. They describe the data (e.g. to pick threshold_tuner.py
+grid ranges); they are not counter thresholds, and the analyzer will not load
+this output (use threshold_tuner.py for models/thresholds_perspective.json).
+"""
 import os
 import sys
 import json
@@ -139,7 +147,7 @@ def main(argv: List[str]) -> None:
     with open(out_json, "w", encoding="utf-8") as f:
         json.dump(model, f, indent=2)
 
-    print(f"Saved perspective thresholds: {out_json}")
+    print(f"Saved perspective angle statistics: {out_json}")
 
 
 if __name__ == "__main__":
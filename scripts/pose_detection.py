@@ -1,5 +1,6 @@
 import cv2
 import mediapipe as mp
+from mediapipe.framework.formats import landmark_pb2
 import numpy as np
 import time
 
@@ -34,7 +35,9 @@ class PoseDetector:
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
         
-        self.pose = self.mp_pose.Pose(
+        # The MediaPipe graph is created on first use, so detectors that are
+        # only fed pre-computed landmarks (set_landmarks) never load the model
+        self._pose_config = dict(
             static_image_mode=static_image_mode,
             model_complexity=model_complexity,
             smooth_landmarks=smooth_landmarks,
@@ -43,10 +46,18 @@ class PoseDetector:
             min_detection_confidence=min_detection_confidence,
             min_tracking_confidence=min_tracking_confidence
         )
+        self._pose = None
         
         # Store landmark positions for analysis
         self.landmarks = None
         self.pose_landmarks = None
+
+    @property
+    def pose(self):
+        """MediaPipe Pose graph (created lazily)"""
+        if self._pose is None:
+            self._pose = self.mp_pose.Pose(**self._pose_config)
+        return self._pose
         
     def detect_pose(self, image, draw=True):
         """
@@ -89,6 +100,60 @@ class PoseDetector:
         
         return image, results
     
+    def set_landmarks(self, landmarks):
+        """
+        Use externally computed landmarks instead of running inference
+        (e.g. poses uploaded by the mobile app).
+        
+        Args:
+            landmarks: Array-like of shape (33, 4) with normalized
+                       [x, y, z, visibility] per landmark, or None when no
+                       pose was detected in this frame
+        """
+        if landmarks is None:
+            self.pose_landmarks = None
+            return
+        
+        landmarks = np.asarray(landmarks, dtype=float)
+        pose_landmarks = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z, visibility in landmarks:
+            pose_landmarks.landmark.add(x=x, y=y, z=z, visibility=visibility)
+        
+        self.pose_landmarks = pose_landmarks
+        self.landmarks = {
+            idx: {'x': float(x), 'y': float(y), 'z': float(z), 'visibility': float(v)}
+            for idx, (x, y, z, v) in enumerate(landmarks)
+        }
+    
+    def get_landmarks_array(self):
+        """
+        Current landmarks as an array
+        
+        Returns:
+            np.ndarray: shape (33, 4) [x, y, z, visibility], or None if no pose
+        """
+        if not self.is_pose_detected() or not self.landmarks:
+            return None
+        return np.array([[lm['x'], lm['y'], lm['z'], lm['visibility']]
+                         for _, lm in sorted(self.landmarks.items())], dtype=np.float32)
+    
+    def draw_landmarks(self, image):
+        """
+        Draw the current pose landmarks onto an image (in place)
+        
+        Args:
+            image: Image (BGR format)
+        """
+        if self.pose_landmarks is None:
+            return image
+        self.mp_drawing.draw_landmarks(
+            image,
+            self.pose_landmarks,
+            self.mp_pose.POSE_CONNECTIONS,
+            landmark_drawing_spec=self.mp_drawing_styles.get_default_pose_landmarks_style()
+        )
+        return image
+    
     def _extract_landmarks(self, pose_landmarks):
         """
         Extract landmark coordinates from MediaPipe results
@@ -402,11 +467,23 @@ class PoseDetector:
         """
         return self.pose_landmarks is not None
     
+    def reset(self):
+        """
+        Drop tracking state so the next frame is treated as the start of a
+        new video (lets one detector be reused across videos)
+        """
+        if self._pose is not None:
+            self._pose.reset()
+        self.landmarks = None
+        self.pose_landmarks = None
+
     def close(self):
         """
         Clean up resources
         """
-        self.pose.close()
+        if self._pose is not None:
+            self._pose.close()
+            self._pose = None
 
 
 class LivePoseDetection:
@@ -0,0 +1,49 @@
+"""
+Process pools for MediaPipe work.
+
+MediaPipe/TFLite state is not fork-safe (and the server is multi-threaded),
+so pools that run pose start their workers with 'spawn' and build one graph
+per worker in an initializer, reused for every job the worker runs.
+
+Usage:
+    from pose_pool import iter_pose_pool
+    for (video_path,), result, error in iter_pose_pool(fn, [(path,) for path in videos], _init_worker):
+        ...
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+def pose_pool(workers, initializer=None, initargs=()):
+    """ProcessPoolExecutor with spawned workers, each set up by initializer(*initargs)."""
+    ctx = multiprocessing.get_context('spawn')
+    return ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=initializer, initargs=initargs)
+
+
+def iter_pose_pool(fn, jobs, initializer=None, initargs=(), workers=None):
+    """
+    Run fn(*job) for every job in a pose_pool.
+
+    Args:
+        fn: picklable module-level function
+        jobs: iterable of argument tuples
+        initializer, initargs: per-worker setup (e.g. building the Pose graph)
+        workers: processes (default: CPU count, never more than there are jobs)
+
+    Yields:
+        (job, result, error) in completion order; error is the exception the
+        job raised (result is then None), so one bad video does not stop the rest
+    """
+    jobs = [tuple(job) for job in jobs]
+    if not jobs:
+        return
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    with pose_pool(workers, initializer, initargs) as pool:
+        futures = {pool.submit(fn, *job): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                result, error = None, e
+            yield futures[future], result, error
@@ -0,0 +1,237 @@
+"""
+Pre-flight quality gate for uploaded curl videos.
+
+Before committing to a full analysis (every frame decoded and run through
+pose), a handful of frames spread across the video are sampled and checked:
+
+  - pose detectability: is somebody in frame most of the time?
+  - arm visibility: get_arms_visibility_with_depth with the counter's
+    confidence/depth settings; at least one arm must be countable
+  - perspective: shoulder width / torso height (the same width_to_height
+    feature perspective_features_extractor.py computes) flags side-on
+    camera angles
+
+The verdict is 'ok', 'warn' (analysis runs, the client should show the
+warnings) or 'reject' (analysis would not produce anything useful). The
+result also carries a cost estimate, frames x seconds-per-frame profile,
+so callers can schedule the job (None when the container does not report
+a frame count, e.g. browser MediaRecorder .webm files; those are sampled
+by decoding from the start instead of seeking).
+
+Usage:
+  python preflight.py <video.mp4> [--samples 10]
+"""
+import json
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from biceps_curl_counter import BicepsCurlCounter
+from biceps_curl_video_analyzer import resize_frame, shoulder_torso_size
+from pose_detection import PoseDetector
+
+
+DEFAULT_SAMPLES = 10
+
+# Verdict thresholds (fractions of sampled frames)
+MIN_DETECT_RATE = 0.3        # below: reject, nobody in frame
+WARN_DETECT_RATE = 0.7       # below: warn, person leaves the frame
+MIN_ARM_RATE = 0.3           # below (for both arms): reject, no countable arm
+WARN_ARM_RATE = 0.6          # below for one arm: warn, only one arm counted
+SIDEWAY_WIDTH_TO_HEIGHT = 0.35  # shoulder width / torso height under this is a side view
+UNKNOWN_LENGTH_STRIDE_MS = 500  # sample spacing when the frame count is unknown
+
+# Relative per-frame pose cost by model_complexity, normalised to the
+# complexity-1 static-image inference the pre-flight itself runs
+COMPLEXITY_COST = {0: 0.6, 1: 1.0, 2: 2.6}
+OVERLAY_S_PER_FRAME = 0.004  # drawing + encoding the annotated video
+
+
+def _sample_indices(frame_count, samples):
+    """Evenly spaced frame indices, skipping the first/last 5% (setup and walk-off)."""
+    if frame_count <= 0:
+        return []
+    lo, hi = int(frame_count * 0.05), max(int(frame_count * 0.95) - 1, 0)
+    n = min(samples, hi - lo + 1)
+    return sorted(set(np.linspace(lo, hi, n).round().astype(int).tolist()))
+
+
+def _sample_frames(cap, frame_count, fps, samples):
+    """
+    Yield up to `samples` frames spread over the video.
+
+    With a known frame count, seeks to _sample_indices. Otherwise (the
+    container reports 0 or -1 frames) decodes from the start and takes one
+    frame every UNKNOWN_LENGTH_STRIDE_MS of video time, or the last frame
+    if the video is shorter than that.
+    """
+    if frame_count > 0:
+        for idx in _sample_indices(frame_count, samples):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+            ret, frame = cap.read()
+            if ret:
+                yield frame
+        return
+
+    taken = read = 0
+    next_ms = UNKNOWN_LENGTH_STRIDE_MS
+    last = None
+    while taken < samples:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        read += 1
+        # Some backends leave POS_MSEC at 0; fall back to the nominal rate
+        position_ms = cap.get(cv2.CAP_PROP_POS_MSEC) or read * 1000.0 / fps
+        if position_ms >= next_ms:
+            taken += 1
+            next_ms = position_ms + UNKNOWN_LENGTH_STRIDE_MS
+            last = None
+            yield frame
+        else:
+            last = frame
+    if taken == 0 and last is not None:
+        yield last
+
+
+def estimate_cost(frames, seconds_per_inference, model_complexity=2, visualize=True, target_pose_hz=None,
+                  fps=None):
+    """
+    Cost estimate for a full analysis: frames x per-frame profile.
+
+    Args:
+        frames: frames in the video
+        seconds_per_inference: measured complexity-1 pose time on this machine
+        model_complexity: complexity the analysis will run with
+        visualize: whether the annotated video is rendered
+        target_pose_hz: decimation rate, if used (upper bound: turning points run at full rate)
+        fps: video frame rate (needed with target_pose_hz)
+    """
+    inference_frames = frames
+    if target_pose_hz and fps and fps > target_pose_hz:
+        inference_frames = int(np.ceil(frames * target_pose_hz / fps))
+    pose_s = seconds_per_inference * COMPLEXITY_COST.get(model_complexity, 1.0)
+    overlay_s = OVERLAY_S_PER_FRAME if visualize else 0.0
+    return {
+        'frames': int(frames),
+        'inferenceFrames': int(inference_frames),
+        'secondsPerInference': round(pose_s, 4),
+        'estimatedSeconds': round(inference_frames * pose_s + frames * overlay_s, 1),
+    }
+
+
+def run_preflight(video_path, samples=DEFAULT_SAMPLES, pose_detector=None, model_complexity=2,
+                  visualize=True, target_pose_hz=None):
+    """
+    Sample frames and decide whether a full analysis is worth running.
+
+    Returns:
+        dict with verdict ('ok' | 'warn' | 'reject'), reasons (list of
+        {'code', 'message'}), per-check measurements and 'estimate' (None
+        when the frame count is unknown or nothing could be decoded)
+    """
+    started = time.perf_counter()
+    reasons = []
+
+    def reason(code, message):
+        reasons.append({'code': code, 'message': message})
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        reason('unreadable', 'The video could not be opened')
+        return {'verdict': 'reject', 'reasons': reasons, 'estimate': None, 'elapsedMs': 0}
+
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    counter = BicepsCurlCounter()
+    counter.debug_mode = False
+    detector = pose_detector or PoseDetector(static_image_mode=True, model_complexity=1)
+
+    sampled = detected = 0
+    left_visible = right_visible = 0
+    widths, heights = [], []
+    inference_s = []
+    for frame in _sample_frames(cap, frame_count, fps, samples):
+        frame = resize_frame(frame)
+        sampled += 1
+        t0 = time.perf_counter()
+        detector.detect_pose(frame, draw=False)
+        inference_s.append(time.perf_counter() - t0)
+        if not detector.is_pose_detected():
+            continue
+        detected += 1
+        visibility = detector.get_arms_visibility_with_depth(
+            min_confidence=counter.min_landmark_confidence,
+            depth_threshold=counter.depth_threshold,
+            depth_filter_enabled=counter.depth_filter_enabled
+        )
+        left_visible += int(visibility['left']['visible'])
+        right_visible += int(visibility['right']['visible'])
+        width, height = shoulder_torso_size(detector, frame.shape)
+        if width is not None:
+            widths.append(width)
+        if height is not None:
+            heights.append(height)
+    cap.release()
+    if pose_detector is None:
+        detector.close()
+
+    if sampled == 0:
+        reason('unreadable', 'No frames could be decoded from the video')
+        return {'verdict': 'reject', 'reasons': reasons, 'estimate': None,
+                'elapsedMs': round((time.perf_counter() - started) * 1000, 1)}
+
+    detect_rate = detected / sampled
+    left_rate = left_visible / detected if detected else 0.0
+    right_rate = right_visible / detected if detected else 0.0
+    width_to_height = None
+    if widths and heights and np.median(heights) > 0:
+        width_to_height = float(np.median(widths) / np.median(heights))
+
+    reject = False
+    if detect_rate < MIN_DETECT_RATE:
+        reject = True
+        reason('no_person', f'Nobody was detected in {sampled - detected} of {sampled} sampled frames')
+    else:
+        if detect_rate < WARN_DETECT_RATE:
+            reason('person_intermittent', f'Person not detected in {sampled - detected} of {sampled} sampled frames')
+        if max(left_rate, right_rate) < MIN_ARM_RATE:
+            reject = True
+            reason('arms_not_visible', 'Neither arm is clearly visible; keep shoulders, elbows and wrists in frame')
+        elif min(left_rate, right_rate) < WARN_ARM_RATE:
+            hidden = 'left' if left_rate < right_rate else 'right'
+            reason('one_arm_visible', f'The {hidden} arm is mostly hidden; only the other arm will be counted reliably')
+        if width_to_height is not None and width_to_height < SIDEWAY_WIDTH_TO_HEIGHT:
+            reason('side_view', 'The camera sees you from the side; face the camera for both arms to be checked')
+
+    seconds_per_inference = float(np.median(inference_s)) if inference_s else 0.0
+    verdict = 'reject' if reject else ('warn' if reasons else 'ok')
+    return {
+        'verdict': verdict,
+        'reasons': reasons,
+        'samples': sampled,
+        'detectRate': round(detect_rate, 3),
+        'leftArmVisibleRate': round(left_rate, 3),
+        'rightArmVisibleRate': round(right_rate, 3),
+        'widthToHeight': round(width_to_height, 3) if width_to_height is not None else None,
+        'estimate': estimate_cost(frame_count, seconds_per_inference, model_complexity, visualize,
+                                  target_pose_hz, fps) if frame_count > 0 else None,
+        'elapsedMs': round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def main(argv):
+    if len(argv) < 2:
+        print(__doc__)
+        return 1
+    samples = int(argv[argv.index('--samples') + 1]) if '--samples' in argv else DEFAULT_SAMPLES
+    result = run_preflight(argv[1], samples=samples)
+    print(json.dumps(result, indent=2))
+    return 0 if result['verdict'] != 'reject' else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -1,5 +1,10 @@
+import argparse
+import codecs
+import json
 import os
 import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import List, Dict, Optional, Tuple
 
 import numpy as np
@@ -38,6 +43,89 @@ def _logit_transform(p: pd.Series, eps: float = 1e-6) -> pd.Series:
     return np.log((p + eps) / (1.0 - p + eps))
 
 
+def _segment_reduce(ufunc, values: np.ndarray, lo: np.ndarray, hi: np.ndarray, fill: float) -> np.ndarray:
+    """
+    ufunc.reduceat over the disjoint, sorted segments values[lo[k]:hi[k]].
+    Empty segments yield `fill`.
+    """
+    out = np.full(len(lo), fill, dtype=float)
+    nonempty = hi > lo
+    if nonempty.any():
+        # Pad so hi == len(values) is a valid reduceat index; odd slots (gaps) are discarded
+        padded = np.append(values.astype(float), fill)
+        bounds = np.column_stack([lo[nonempty], hi[nonempty]]).ravel()
+        out[nonempty] = ufunc.reduceat(padded, bounds)[::2]
+    return out
+
+
+def _next_index(mask: np.ndarray) -> np.ndarray:
+    """For each position, the first index >= it where mask is True (len(mask) if none)."""
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(idx[::-1])[::-1] if n else idx
+
+
+def _prev_index(mask: np.ndarray) -> np.ndarray:
+    """For each position, the last index <= it where mask is True (-1 if none)."""
+    idx = np.where(mask, np.arange(len(mask)), -1)
+    return np.maximum.accumulate(idx) if len(mask) else idx
+
+
+def _segment_reps(states: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find ordered reps (down -> transition/up ... up ... transition -> down) in
+    a state sequence using run-length encoding.
+
+    A rep starts at the last frame of a down run followed by transition/up,
+    ends at the first frame of the next down run, and must contain an up
+    followed (later) by a transition. After an accepted rep the scan resumes
+    one frame past its end, so a single-frame down run that closes a rep
+    cannot also open the next one.
+
+    Returns:
+        (start_idx, end_idx, first_up_idx, last_up_idx) arrays, one entry per rep
+    """
+    empty = np.array([], dtype=int)
+    n = len(states)
+    if n < 2:
+        return empty, empty, empty, empty
+
+    # Run-length encoding
+    run_starts = np.flatnonzero(np.r_[True, states[1:] != states[:-1]])
+    run_ends = np.r_[run_starts[1:], n] - 1
+    run_values = states[run_starts]
+
+    is_down_run = run_values == "down"
+    next_run_value = np.append(run_values[1:], "")
+    candidate_runs = np.flatnonzero(is_down_run & np.isin(next_run_value, ("transition", "up")))
+    # Each candidate closes at the next down run; one without a closing down ends the scan
+    next_down_run = _next_index(np.r_[is_down_run[1:], False])[candidate_runs] + 1
+    closed = next_down_run < len(run_values)
+    candidate_runs, next_down_run = candidate_runs[closed], next_down_run[closed]
+    if candidate_runs.size == 0:
+        return empty, empty, empty, empty
+
+    start_idx = run_ends[candidate_runs]
+    end_idx = run_starts[next_down_run]
+
+    is_up = states == "up"
+    first_up_idx = _next_index(is_up)[start_idx]
+    has_up = first_up_idx < end_idx
+    last_transition = _prev_index(states == "transition")[end_idx - 1]
+    valid = has_up & (last_transition > first_up_idx)
+
+    # A one-frame closing down of an accepted rep is skipped as the next start
+    accepted = valid.copy()
+    linked = np.flatnonzero(start_idx[1:] == end_idx[:-1]) + 1
+    for k in linked:
+        if accepted[k - 1]:
+            accepted[k] = False
+
+    start_idx, end_idx, first_up_idx = start_idx[accepted], end_idx[accepted], first_up_idx[accepted]
+    last_up_idx = _prev_index(is_up)[end_idx]
+    return start_idx, end_idx, first_up_idx, last_up_idx
+
+
 def _detect_reps_for_arm(df: pd.DataFrame,
                          arm_prefix: str,
                          torso_threshold_deg: float = 30.0,
@@ -45,6 +133,9 @@ def _detect_reps_for_arm(df: pd.DataFrame,
     """
     Detect ordered reps for one arm using down → transition → up → transition → down.
     Returns a list of rep-level dicts with computed metrics.
+
+    Segmentation is run-length based (_segment_reps); counts, extrema and
+    timings are computed for all reps at once with segment reductions.
     """
     state_col = f"{arm_prefix}_state"
     angle_raw_col = f"{arm_prefix}_angle_raw_deg"
@@ -54,141 +145,81 @@ def _detect_reps_for_arm(df: pd.DataFrame,
     torso_height_col = f"{arm_prefix}_torso_height"
 
     # Prepare series
-    time_s = _coerce_numeric(df.get("time_s", pd.Series(index=df.index, dtype=float)))
+    time_s = _coerce_numeric(df.get("time_s", pd.Series(index=df.index, dtype=float))).values
     states = df[state_col].astype(str).fillna("unknown").values
     angle_raw = _coerce_numeric(df.get(angle_raw_col, pd.Series(index=df.index, dtype=float))).values
     aligned = _coerce_numeric(df.get(aligned_col, pd.Series(index=df.index, dtype=float))).fillna(1).astype(int).values
     torso = _coerce_numeric(df.get(torso_col, pd.Series(index=df.index, dtype=float))).values
+    shoulder_x = _coerce_numeric(df.get(shoulder_x_col, pd.Series(index=df.index, dtype=float))).values
+    torso_height = _coerce_numeric(df.get(torso_height_col, pd.Series(index=df.index, dtype=float))).values
 
     # For torso violation percentage, compute rolling 3-frame average over entire sequence
     torso_series = pd.Series(torso)
     torso_rolling_avg = torso_series.rolling(window=3, min_periods=3).mean().values
     torso_violation_mask = torso_rolling_avg > torso_threshold_deg
 
-    reps: List[Dict] = []
-
-    i = 0
-    n = len(df)
-    while i < n - 1:
-        # Look for leaving DOWN: current down and next not down
-        if states[i] == "down" and states[i + 1] in ("transition", "up"):
-            start_idx = i
-
-            # Find first UP after start
-            j = i + 1
-            first_up_idx: Optional[int] = None
-            while j < n and states[j] != "down":
-                if states[j] == "up" and first_up_idx is None:
-                    first_up_idx = j
-                # After seeing an UP, look for a transition then a down to close
-                j += 1
-
-            # If we exited loop because we hit a down, j points to first down after leaving down
-            if j < n and states[j] == "down":
-                end_idx = j
-            else:
-                # No closing down; incomplete cycle
-                i += 1
-                continue
-
-            # Validate ordered sequence: must have reached up, and there must be a transition between up and final down
-            if first_up_idx is None:
-                i = end_idx  # Skip ahead to after this segment
-                continue
-
-            had_transition_after_up = any(s == "transition" for s in states[first_up_idx:end_idx])
-            if not had_transition_after_up:
-                i = end_idx
-                continue
-
-            # Window for this rep [start_idx, end_idx]
-            idx_slice = slice(start_idx, end_idx + 1)
-            window_len = end_idx - start_idx + 1
-            if window_len <= 1:
-                i = end_idx
-                continue
-
-            # Metrics
-            angles_win = angle_raw[idx_slice]
-            times_win = time_s[idx_slice]
-            aligned_win = aligned[idx_slice]
-            torso_violation_win = torso_violation_mask[idx_slice]
-            lost_pose_mask = np.isnan(angles_win)
-            
-            # Shoulder drift calculation (normalized by body scale)
-            shoulder_x = _coerce_numeric(df.get(shoulder_x_col, pd.Series(index=df.index, dtype=float))).values
-            torso_height = _coerce_numeric(df.get(torso_height_col, pd.Series(index=df.index, dtype=float))).values
-            if shoulder_x is not None and len(shoulder_x) > 0 and torso_height is not None and len(torso_height) > 0:
-                shoulder_x_win = shoulder_x[idx_slice]
-                torso_height_win = torso_height[idx_slice]
-                valid_mask = ~(np.isnan(shoulder_x_win) | np.isnan(torso_height_win) | (torso_height_win <= 0))
-                if np.sum(valid_mask) > 1:
-                    valid_x = shoulder_x_win[valid_mask]
-                    valid_h = torso_height_win[valid_mask]
-                    # Normalize x drift by torso height to be scale-invariant
-                    x_normalized = valid_x / valid_h
-                    drift_px = float(np.std(x_normalized))
-                else:
-                    drift_px = float("nan")
-            else:
-                drift_px = float("nan")
-
-            # ROM
-            finite_angles = angles_win[~np.isnan(angles_win)]
-            if finite_angles.size:
-                rom_deg = float(np.nanmax(finite_angles) - np.nanmin(finite_angles))
-            else:
-                rom_deg = float("nan")
-
-            # Tempo up: from leaving down (start_idx) to first_up_idx
-            tempo_up_s = float(time_s[first_up_idx] - time_s[start_idx]) if first_up_idx is not None else float("nan")
-            # Tempo down: from last up (use last occurrence between start and end) to end_idx
-            up_indices = np.where(states[start_idx:end_idx + 1] == "up")[0]
-            if up_indices.size:
-                last_up_idx = start_idx + int(up_indices[-1])
-                tempo_down_s = float(time_s[end_idx] - time_s[last_up_idx])
-            else:
-                tempo_down_s = float("nan")
-
-            tempo_asymmetry = float(
-                abs((tempo_up_s if np.isfinite(tempo_up_s) else 0.0) - (tempo_down_s if np.isfinite(tempo_down_s) else 0.0)) /
-                ((tempo_up_s if np.isfinite(tempo_up_s) else 0.0) + (tempo_down_s if np.isfinite(tempo_down_s) else 0.0) + epsilon)
-            )
-
-            # Roughness: RMS of first differences of angle
-            diffs = np.diff(finite_angles) if finite_angles.size > 1 else np.array([])
-            roughness = float(np.sqrt(np.mean(diffs ** 2))) if diffs.size else float("nan")
-
-            # Percentages
-            torso_violation_pct = float(np.nanmean(torso_violation_win.astype(float))) if window_len else float("nan")
-            align_off_pct = float(np.mean((aligned_win == 0).astype(float))) if window_len else float("nan")
-            lost_pose_pct = float(np.mean(lost_pose_mask.astype(float))) if window_len else float("nan")
-
-            # Mean FPS in window
-            duration = float(time_s[end_idx] - time_s[start_idx])
-            mean_fps = float((window_len - 1) / max(duration, epsilon)) if duration > 0 else float("nan")
-
-            reps.append({
-                "arm": arm_prefix,
-                "rep_start_time": float(time_s[start_idx]),
-                "rep_end_time": float(time_s[end_idx]),
-                "rom_deg": rom_deg,
-                "torso_violation_pct": torso_violation_pct,
-                "align_off_pct": align_off_pct,
-                "tempo_up_s": tempo_up_s,
-                "tempo_down_s": tempo_down_s,
-                "tempo_asymmetry": tempo_asymmetry,
-                "roughness": roughness,
-                "lost_pose_pct": lost_pose_pct,
-                "mean_fps": mean_fps,
-                "shoulder_drift_px": drift_px,
-            })
-
-            # Advance index to end of this rep to avoid overlapping detection
-            i = end_idx
-        i += 1
-
-    return reps
+    start_idx, end_idx, first_up_idx, last_up_idx = _segment_reps(states)
+    if start_idx.size == 0:
+        return []
+
+    # Windows [start_idx, end_idx] are disjoint and sorted
+    lo, hi = start_idx, end_idx + 1
+    window_len = hi - lo
+
+    # ROM over finite angles (fmax/fmin skip NaNs; all-NaN windows stay NaN)
+    rom_deg = (_segment_reduce(np.fmax, angle_raw, lo, hi, np.nan)
+               - _segment_reduce(np.fmin, angle_raw, lo, hi, np.nan))
+
+    # Roughness: RMS of differences between consecutive finite angles in the window.
+    # Float means use np.mean on slices of the precomputed arrays: its pairwise
+    # summation differs from reduceat's sequential sum in the last bits.
+    finite_pos = np.flatnonzero(~np.isnan(angle_raw))
+    finite_lo = np.searchsorted(finite_pos, lo)
+    finite_hi = np.searchsorted(finite_pos, hi)
+    diff_sq = np.diff(angle_raw[finite_pos]) ** 2
+    roughness = [float(np.sqrt(np.mean(diff_sq[a:b - 1]))) if b - a > 1 else float("nan")
+                 for a, b in zip(finite_lo, finite_hi)]
+
+    # Percentages
+    torso_violation_pct = _segment_reduce(np.add, torso_violation_mask, lo, hi, 0.0) / window_len
+    align_off_pct = _segment_reduce(np.add, aligned == 0, lo, hi, 0.0) / window_len
+    lost_pose_pct = _segment_reduce(np.add, np.isnan(angle_raw), lo, hi, 0.0) / window_len
+
+    # Shoulder drift: std of shoulder x normalized by torso height (scale-invariant)
+    valid_pos = np.flatnonzero(~(np.isnan(shoulder_x) | np.isnan(torso_height) | (torso_height <= 0)))
+    valid_lo = np.searchsorted(valid_pos, lo)
+    valid_hi = np.searchsorted(valid_pos, hi)
+    x_normalized = shoulder_x[valid_pos] / torso_height[valid_pos]
+    drift_px = [float(np.std(x_normalized[a:b])) if b - a > 1 else float("nan")
+                for a, b in zip(valid_lo, valid_hi)]
+
+    # Tempo up: leaving down -> first up; tempo down: last up -> closing down
+    tempo_up_s = time_s[first_up_idx] - time_s[start_idx]
+    tempo_down_s = time_s[end_idx] - time_s[last_up_idx]
+    up_or_zero = np.where(np.isfinite(tempo_up_s), tempo_up_s, 0.0)
+    down_or_zero = np.where(np.isfinite(tempo_down_s), tempo_down_s, 0.0)
+    tempo_asymmetry = np.abs(up_or_zero - down_or_zero) / (up_or_zero + down_or_zero + epsilon)
+
+    # Mean FPS in window
+    duration = time_s[end_idx] - time_s[start_idx]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_fps = np.where(duration > 0, (window_len - 1) / np.maximum(duration, epsilon), np.nan)
+
+    return [{
+        "arm": arm_prefix,
+        "rep_start_time": float(time_s[start_idx[k]]),
+        "rep_end_time": float(time_s[end_idx[k]]),
+        "rom_deg": float(rom_deg[k]),
+        "torso_violation_pct": float(torso_violation_pct[k]),
+        "align_off_pct": float(align_off_pct[k]),
+        "tempo_up_s": float(tempo_up_s[k]),
+        "tempo_down_s": float(tempo_down_s[k]),
+        "tempo_asymmetry": float(tempo_asymmetry[k]),
+        "roughness": roughness[k],
+        "lost_pose_pct": float(lost_pose_pct[k]),
+        "mean_fps": float(mean_fps[k]),
+        "shoulder_drift_px": drift_px[k],
+    } for k in range(len(start_idx))]
 
 
 def _read_csv_robust(csv_path: str) -> pd.DataFrame:
@@ -205,17 +236,66 @@ def _read_csv_robust(csv_path: str) -> pd.DataFrame:
     return pd.read_csv(csv_path, encoding="latin1", engine="python", on_bad_lines="skip")
 
 
+def _sniff_encoding(csv_path: str, sample_size: int = 1 << 16) -> str:
+    """Pick the first of utf-8 / cp1254 / latin1 that decodes the head of the file."""
+    with open(csv_path, "rb") as f:
+        sample = f.read(sample_size)
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    for enc in ("utf-8", "cp1254"):
+        try:
+            sample.decode(enc)
+            return enc
+        except UnicodeDecodeError as e:
+            # A multi-byte character cut off by the sample boundary is still utf-8
+            if enc == "utf-8" and len(sample) == sample_size and e.start >= sample_size - 3:
+                return enc
+    return "latin1"
+
+
+def _read_csv_fast(csv_path: str) -> pd.DataFrame:
+    """Read CSV with the C parser after sniffing the encoding once; falls back to _read_csv_robust."""
+    try:
+        return pd.read_csv(csv_path, encoding=_sniff_encoding(csv_path), engine="c", on_bad_lines="skip")
+    except (UnicodeDecodeError, pd.errors.ParserError):
+        # Undecodable bytes past the sniffed sample, or quoting the C parser rejects
+        return _read_csv_robust(csv_path)
+
+
+def _write_table(df: pd.DataFrame, output_path: str) -> str:
+    """Save parquet (fallback to CSV if parquet engine missing). Returns the written path."""
+    try:
+        df.to_parquet(output_path, index=False)
+        return output_path
+    except Exception:
+        alt_path = os.path.splitext(output_path)[0] + ".csv"
+        df.to_csv(alt_path, index=False)
+        return alt_path
+
+
 def extract_reps_from_csv(csv_path: str,
                           output_path: Optional[str] = None,
                           video_id: Optional[str] = None,
                           athlete_id: Optional[str] = None,
-                          torso_threshold_deg: float = 30.0) -> str:
+                          torso_threshold_deg: float = 30.0,
+                          population=None) -> str:
     """
     Load frame-level CSV, compute rep-level features, and save to Parquet.
     Returns the output file path.
     """
-    df = _read_csv_robust(csv_path)
+    reps_df = compute_reps(_read_csv_fast(csv_path), csv_path, video_id=video_id, athlete_id=athlete_id,
+                           torso_threshold_deg=torso_threshold_deg, population=population)
+
+    # Output path
+    if output_path is None:
+        os.makedirs("interim", exist_ok=True)
+        output_path = os.path.join("interim", "reps.parquet")
+
+    return _write_table(reps_df, output_path)
 
+
+def detect_reps(df: pd.DataFrame, torso_threshold_deg: float = 30.0) -> pd.DataFrame:
+    """Raw (untransformed) per-rep measurements for both arms of one frame-level timeline."""
     # Normalize expected columns if missing
     for col in [
         "left_state", "right_state",
@@ -239,8 +319,26 @@ def extract_reps_from_csv(csv_path: str,
             "arm", "rep_start_time", "rep_end_time", "rom_deg", "torso_violation_pct",
             "align_off_pct", "tempo_up_s", "tempo_down_s", "tempo_asymmetry",
             "roughness", "lost_pose_pct", "mean_fps", "shoulder_drift_px",
-            "video_id", "athlete_id",
         ])
+    return reps_df
+
+
+def compute_reps(df: pd.DataFrame,
+                 csv_path: str,
+                 video_id: Optional[str] = None,
+                 athlete_id: Optional[str] = None,
+                 torso_threshold_deg: float = 30.0,
+                 population=None) -> pd.DataFrame:
+    """
+    Rep-level feature table (compact feature set + identifiers) for one frame-level timeline.
+
+    By default the z features are standardized within this file. With a
+    population (rep_normalizer.PopulationNormalizer) they are scored against
+    the reference population's winsorize bounds and median/MAD instead, so
+    reps from different sessions share one scale.
+    """
+    reps_df = detect_reps(df, torso_threshold_deg=torso_threshold_deg)
+    raw_reps = reps_df.copy() if population is not None else None
 
     # Attach metadata
     if video_id is None:
@@ -326,30 +424,244 @@ def extract_reps_from_csv(csv_path: str,
         "shoulder_drift_norm_log1p_z", "lost_pose_any", "tempo_total_log1p_z",
         "speed_up_log1p_z", "speed_down_log1p_z", "fps_ok",
     ]
+    if population is not None:
+        for col, z in population.transform(raw_reps).items():
+            reps_df[col] = z.to_numpy()
+
     for c in list(reps_df.columns):
         if c not in keep_cols:
             del reps_df[c]
 
-    # Output path
-    if output_path is None:
-        os.makedirs("interim", exist_ok=True)
-        output_path = os.path.join("interim", "reps.parquet")
+    return reps_df
+
+
+# --- Folder -> partitioned dataset -------------------------------------------------
+
+DATASET_MANIFEST = "_manifest.json"
+DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+def _partition_value(value: Optional[str]) -> str:
+    """Make an id safe as a hive partition directory value."""
+    value = (value or "").strip()
+    if not value:
+        return DEFAULT_PARTITION
+    return "".join("_" if ch in '/\\=:*?"<>|' else ch for ch in value)
+
+
+def partition_dir(dataset_root: str, athlete_id: Optional[str], video_id: str) -> str:
+    return os.path.join(dataset_root, f"athlete_id={_partition_value(athlete_id)}",
+                        f"video_id={_partition_value(video_id)}")
+
+
+def collect_timelines(input_dir: str, athlete_id: Optional[str] = None) -> List[Tuple[str, str, str]]:
+    """
+    List (csv_path, athlete_id, video_id) for every CSV under input_dir.
+
+    Without an explicit athlete_id, CSVs in a sub-folder take its first path
+    component (input_dir/<athlete>/.../<video>.csv); top-level CSVs get none.
+    video_id is the rest of the relative path without the extension, so
+    session folders with a generic file name (<session>/timeline.csv) stay
+    distinct.
+    """
+    jobs = []
+    for dirpath, _, filenames in os.walk(input_dir):
+        for name in sorted(filenames):
+            if not name.lower().endswith(".csv"):
+                continue
+            csv_path = os.path.abspath(os.path.join(dirpath, name))
+            rel_parts = os.path.relpath(csv_path, os.path.abspath(input_dir)).split(os.sep)
+            rel_parts[-1] = os.path.splitext(rel_parts[-1])[0]
+            if athlete_id is not None:
+                athlete = athlete_id
+            elif len(rel_parts) > 1:
+                athlete, rel_parts = rel_parts[0], rel_parts[1:]
+            else:
+                athlete = ""
+            jobs.append((csv_path, athlete, "/".join(rel_parts)))
+    return sorted(jobs)
+
+
+def _check_unique_partitions(jobs: List[Tuple[str, str, str]], dataset_root: str) -> None:
+    """
+    Raises:
+        ValueError: if two timelines map to the same athlete_id/video_id partition
+    """
+    owners = {}
+    clashes = []
+    for csv_path, athlete, video_id in jobs:
+        key = partition_dir(dataset_root, athlete, video_id)
+        if key in owners:
+            clashes.append(f"{owners[key]} and {csv_path} -> {os.path.relpath(key, dataset_root)}")
+        else:
+            owners[key] = csv_path
+    if clashes:
+        raise ValueError("Timelines share a partition:\n  " + "\n  ".join(clashes))
+
+
+def _file_signature(path: str) -> Dict:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _load_manifest(dataset_root: str) -> Dict:
+    path = os.path.join(dataset_root, DATASET_MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest: Dict, dataset_root: str) -> None:
+    path = os.path.join(dataset_root, DATASET_MANIFEST)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _aggregate_one(csv_path: str, dataset_root: str, athlete_id: str, video_id: str,
+                   torso_threshold_deg: float, population=None) -> Tuple[int, str]:
+    """Compute one timeline's reps and (re)write its partition. Returns (rows, file path)."""
+    reps_df = compute_reps(_read_csv_fast(csv_path), csv_path, video_id=video_id, athlete_id=athlete_id,
+                           torso_threshold_deg=torso_threshold_deg, population=population)
+    out_dir = partition_dir(dataset_root, athlete_id, video_id)
+    os.makedirs(out_dir, exist_ok=True)
+    # The partition path carries athlete_id/video_id; readers restore them as columns
+    table = reps_df.drop(columns=["athlete_id", "video_id"])
+    # Unique temp name: never shared with another writer of the same folder
+    tmp_path = _write_table(table, os.path.join(out_dir, f".part-0.{os.getpid()}.{uuid.uuid4().hex}.tmp.parquet"))
+    final_path = os.path.join(out_dir, "part-0" + os.path.splitext(tmp_path)[1])
+    os.replace(tmp_path, final_path)
+    # Drop a part written with the other format (parquet engine installed/removed since)
+    for ext in (".parquet", ".csv"):
+        stale = os.path.join(out_dir, "part-0" + ext)
+        if stale != final_path and os.path.exists(stale):
+            os.remove(stale)
+    return len(table), final_path
+
+
+def aggregate_folder(input_dir: str,
+                     dataset_root: str,
+                     athlete_id: Optional[str] = None,
+                     workers: Optional[int] = None,
+                     force: bool = False,
+                     torso_threshold_deg: float = 30.0,
+                     population=None) -> Dict[str, int]:
+    """
+    Add every timeline CSV under input_dir to a dataset partitioned as
+    dataset_root/athlete_id=<athlete>/video_id=<video>/part-0.parquet.
+
+    A manifest (dataset_root/_manifest.json) records each CSV's size/mtime,
+    so a rerun only processes new or changed timelines; each one rewrites
+    just its own partition. Timelines are processed in a process pool.
+    With a population (rep_normalizer.PopulationNormalizer), z features are
+    scored against it; partitions written against a different population
+    size are reprocessed.
+
+    Returns:
+        counts of 'processed', 'skipped' and 'failed' timelines
+
+    Raises:
+        ValueError: if two timelines map to the same partition (nothing is written)
+    """
+    jobs = collect_timelines(input_dir, athlete_id)
+    _check_unique_partitions(jobs, dataset_root)
+
+    os.makedirs(dataset_root, exist_ok=True)
+    manifest = _load_manifest(dataset_root)
+    counts = {"processed": 0, "skipped": 0, "failed": 0}
+    population_reps = population.reps if population is not None else None
+
+    todo = []
+    for csv_path, athlete, video_id in jobs:
+        entry = manifest.get(csv_path)
+        signature = _file_signature(csv_path)
+        up_to_date = (entry is not None
+                      and entry.get("signature") == signature
+                      and entry.get("athlete_id") == athlete
+                      and entry.get("video_id") == video_id
+                      and entry.get("torso_threshold_deg") == torso_threshold_deg
+                      and entry.get("population_reps") == population_reps
+                      and os.path.exists(entry.get("path", "")))
+        if up_to_date and not force:
+            counts["skipped"] += 1
+        else:
+            todo.append((csv_path, athlete, video_id, signature))
+
+    print(f"{len(todo) + counts['skipped']} timelines, {counts['skipped']} up to date, {len(todo)} to process")
+    if not todo:
+        return counts
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(todo)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_aggregate_one, csv_path, dataset_root, athlete, video_id, torso_threshold_deg,
+                               population):
+                   (csv_path, athlete, video_id, signature)
+                   for csv_path, athlete, video_id, signature in todo}
+        for future in as_completed(futures):
+            csv_path, athlete, video_id, signature = futures[future]
+            try:
+                rows, path = future.result()
+            except Exception as e:
+                print(f"Failed {csv_path}: {e}")
+                counts["failed"] += 1
+                continue
+            manifest[csv_path] = {
+                "athlete_id": athlete,
+                "video_id": video_id,
+                "signature": signature,
+                "torso_threshold_deg": torso_threshold_deg,
+                "population_reps": population_reps,
+                "rows": rows,
+                "path": path,
+            }
+            _save_manifest(manifest, dataset_root)
+            counts["processed"] += 1
+    return counts
+
+
+def _batch_main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(prog="rep_aggregator.py batch",
+                                     description="Aggregate a folder of timelines into a partitioned rep dataset")
+    parser.add_argument("input_dir", help="Folder of frame-level CSVs (searched recursively)")
+    parser.add_argument("dataset_root", help="Dataset root (athlete_id=/video_id= partitions)")
+    parser.add_argument("--athlete", default=None, help="Athlete id for all CSVs (default: first sub-folder)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Reprocess timelines already in the manifest")
+    parser.add_argument("--torso-threshold", type=float, default=30.0, help="Torso violation threshold (deg)")
+    parser.add_argument("--population", default=None,
+                        help="Population JSON from rep_normalizer.py (default: per-file z-scores)")
+    args = parser.parse_args(argv)
+
+    population = None
+    if args.population:
+        from rep_normalizer import PopulationNormalizer
+        population = PopulationNormalizer.load(args.population)
 
-    # Save parquet (fallback to CSV if parquet engine missing)
     try:
-        reps_df.to_parquet(output_path, index=False)
-        return output_path
-    except Exception:
-        alt_path = os.path.splitext(output_path)[0] + ".csv"
-        reps_df.to_csv(alt_path, index=False)
-        return alt_path
+        counts = aggregate_folder(args.input_dir, args.dataset_root, athlete_id=args.athlete, workers=args.workers,
+                                  force=args.force, torso_threshold_deg=args.torso_threshold, population=population)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Rep dataset updated: {args.dataset_root} "
+          f"({counts['processed']} processed, {counts['skipped']} up to date, {counts['failed']} failed)")
+    if counts["failed"]:
+        sys.exit(1)
 
 
 def main(argv: List[str]) -> None:
     if len(argv) < 2:
         print("Usage: python rep_aggregator.py <frame_level_csv> [output_path] [video_id] [athlete_id]")
+        print("       python rep_aggregator.py batch <input_dir> <dataset_root> [--athlete ID] [--workers N] [--force] "
+              "[--population FILE]")
         sys.exit(1)
 
+    if argv[1] == "batch":
+        _batch_main(argv[2:])
+        return
+
     csv_path = argv[1]
     output_path = argv[2] if len(argv) > 2 else None
     video_id = argv[3] if len(argv) > 3 else None
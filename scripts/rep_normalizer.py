@@ -0,0 +1,367 @@
+"""
+Reference-population normalizer for rep-level features.
+
+rep_aggregator.compute_reps standardizes each feature within one timeline
+(winsorize at the 1%/99% quantiles, then (x - median) / (1.4826 * MAD)), so
+a z-score only says how a rep compares to the other reps of the same
+session. This module keeps a reference population instead: one mergeable
+quantile sketch per transformed feature, from which the winsorize bounds and
+median/MAD are read. New sessions are added incrementally (update / merge,
+e.g. one sketch per worker process), and scoring a rep is O(1) per value
+once the statistics are cached -- no pass over the corpus.
+
+The sketch follows DDSketch: values are counted in logarithmic buckets
+gamma^(k-1) < |x| <= gamma^k with gamma = (1 + a) / (1 - a), so every
+quantile is within relative error a (default 1%) of an exact one. Two
+sketches with the same accuracy merge by adding bucket counts, and the
+bucket counts serialize to a small JSON document.
+
+Winsorizing commutes with the monotonic logit/log1p transforms, so bounds
+are applied in transformed space. Derived features (total tempo, speeds)
+are computed from raw rather than winsorized tempos.
+
+Usage:
+  python rep_normalizer.py <timeline_dir> <population.json> [--workers N] [--rebuild]
+  # then: extract_reps_from_csv(csv_path, population=PopulationNormalizer.load("population.json"))
+"""
+import argparse
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from rep_aggregator import (_file_signature, _logit_transform, _read_csv_fast, collect_timelines,
+                            detect_reps)
+
+
+NORMALIZER_VERSION = 1
+
+
+class QuantileSketch:
+    """Mergeable relative-error quantile sketch (DDSketch-style) for signed values."""
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-9):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _add_to_store(self, store: Dict[int, int], magnitudes: np.ndarray) -> None:
+        if len(magnitudes) == 0:
+            return
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64),
+                                 return_counts=True)
+        for key, n in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + n
+
+    def add(self, values) -> None:
+        """Add values (scalar or array-like); NaN/inf are ignored."""
+        v = np.asarray(values, dtype=float).ravel()
+        v = v[np.isfinite(v)]
+        if len(v) == 0:
+            return
+        self._add_to_store(self.positive, v[v > self.min_value])
+        self._add_to_store(self.negative, -v[v < -self.min_value])
+        self.zero_count += int(np.count_nonzero(np.abs(v) <= self.min_value))
+        self.count += len(v)
+        self.sum += float(v.sum())
+        self.sum_sq += float(np.square(v).sum())
+        self.min = min(self.min, float(v.min()))
+        self.max = max(self.max, float(v.max()))
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if not math.isclose(other.gamma, self.gamma) or other.min_value != self.min_value:
+            raise ValueError("cannot merge sketches with different accuracy")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, n in other_store.items():
+                store[key] = store.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.sum_sq += other.sum_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _value(self, key: int) -> float:
+        # Bucket representative with relative error <= relative_accuracy
+        return 2.0 * self.gamma ** key / (self.gamma + 1.0)
+
+    def buckets(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(representative values ascending, counts) over all buckets."""
+        neg_keys = sorted(self.negative, reverse=True)
+        pos_keys = sorted(self.positive)
+        values = ([-self._value(k) for k in neg_keys]
+                  + ([0.0] if self.zero_count else [])
+                  + [self._value(k) for k in pos_keys])
+        counts = ([self.negative[k] for k in neg_keys]
+                  + ([self.zero_count] if self.zero_count else [])
+                  + [self.positive[k] for k in pos_keys])
+        return np.asarray(values, dtype=float), np.asarray(counts, dtype=np.int64)
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return math.nan
+        values, counts = self.buckets()
+        return float(np.clip(_weighted_quantile(values, counts, q), self.min, self.max))
+
+    def median_mad(self) -> Tuple[float, float]:
+        """Median and median absolute deviation, both from the bucket distribution."""
+        if self.count == 0:
+            return math.nan, math.nan
+        values, counts = self.buckets()
+        med = float(np.clip(_weighted_quantile(values, counts, 0.5), self.min, self.max))
+        deviations = np.abs(values - med)
+        order = np.argsort(deviations, kind="stable")
+        return med, _weighted_quantile(deviations[order], counts[order], 0.5)
+
+    def std(self) -> float:
+        if self.count == 0:
+            return math.nan
+        mean = self.sum / self.count
+        return math.sqrt(max(self.sum_sq / self.count - mean * mean, 0.0))
+
+    def to_dict(self) -> Dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "min_value": self.min_value,
+            "positive": {str(k): n for k, n in sorted(self.positive.items())},
+            "negative": {str(k): n for k, n in sorted(self.negative.items())},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "sum_sq": self.sum_sq,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"], data["min_value"])
+        sketch.positive = {int(k): int(n) for k, n in data["positive"].items()}
+        sketch.negative = {int(k): int(n) for k, n in data["negative"].items()}
+        sketch.zero_count = int(data["zero_count"])
+        sketch.count = int(data["count"])
+        sketch.sum = float(data["sum"])
+        sketch.sum_sq = float(data["sum_sq"])
+        sketch.min = math.inf if data["min"] is None else float(data["min"])
+        sketch.max = -math.inf if data["max"] is None else float(data["max"])
+        return sketch
+
+
+def _weighted_quantile(values: np.ndarray, counts: np.ndarray, q: float) -> float:
+    """Lower q-quantile of sorted values repeated counts times (DDSketch rank rule)."""
+    rank = q * (counts.sum() - 1)
+    return float(values[np.searchsorted(np.cumsum(counts), rank, side="right")])
+
+
+# --- Feature definitions ----------------------------------------------------------
+
+def _num(raw: pd.DataFrame, col: str) -> pd.Series:
+    if col in raw.columns:
+        return pd.to_numeric(raw[col], errors="coerce")
+    return pd.Series(np.nan, index=raw.index)
+
+
+def _log1p(s: pd.Series) -> pd.Series:
+    return np.log1p(s.clip(lower=0))
+
+
+def _speed(raw: pd.DataFrame, tempo_col: str) -> pd.Series:
+    return _log1p(_num(raw, "rom_deg") / _num(raw, tempo_col).replace(0, np.nan))
+
+
+# z column (as written by compute_reps) -> transformed value from raw per-rep measurements
+FEATURES = {
+    "rom_deg_z": lambda raw: _log1p(_num(raw, "rom_deg")),
+    "torso_violation_pct_logit_z": lambda raw: _logit_transform(_num(raw, "torso_violation_pct")),
+    "align_off_pct_logit_z": lambda raw: _logit_transform(_num(raw, "align_off_pct")),
+    "tempo_asymmetry_logit_z": lambda raw: _logit_transform(_num(raw, "tempo_asymmetry")),
+    "tempo_up_s_log1p_z": lambda raw: _log1p(_num(raw, "tempo_up_s")),
+    "tempo_down_s_log1p_z": lambda raw: _log1p(_num(raw, "tempo_down_s")),
+    "roughness_log1p_z": lambda raw: _log1p(_num(raw, "roughness")),
+    "shoulder_drift_norm_log1p_z": lambda raw: _log1p(_num(raw, "shoulder_drift_px")),
+    "tempo_total_log1p_z": lambda raw: _log1p(_num(raw, "tempo_up_s") + _num(raw, "tempo_down_s")),
+    "speed_up_log1p_z": lambda raw: _speed(raw, "tempo_up_s"),
+    "speed_down_log1p_z": lambda raw: _speed(raw, "tempo_down_s"),
+}
+
+
+class PopulationNormalizer:
+    """
+    Per-feature quantile sketches of a reference rep population.
+
+    Statistics (winsorize bounds, median, MAD-based scale) are cached per
+    feature and recomputed lazily after update/merge.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, lower_q: float = 0.01, upper_q: float = 0.99):
+        self.relative_accuracy = relative_accuracy
+        self.lower_q = lower_q
+        self.upper_q = upper_q
+        self.sketches = {name: QuantileSketch(relative_accuracy) for name in FEATURES}
+        self.sources: Dict[str, Dict] = {}  # timeline path -> file signature, to skip re-adding
+        self._stats: Dict[str, Tuple[float, float, float, float]] = {}
+
+    @property
+    def reps(self) -> int:
+        return max((s.count for s in self.sketches.values()), default=0)
+
+    def update(self, raw_reps: pd.DataFrame) -> None:
+        """Add raw per-rep measurements (rep_aggregator.detect_reps output)."""
+        for name, transform in FEATURES.items():
+            self.sketches[name].add(transform(raw_reps).to_numpy(dtype=float))
+        self._stats.clear()
+
+    def merge(self, other: "PopulationNormalizer") -> None:
+        for name, sketch in other.sketches.items():
+            self.sketches[name].merge(sketch)
+        self.sources.update(other.sources)
+        self._stats.clear()
+
+    def stats(self, name: str) -> Tuple[float, float, float, float]:
+        """(lower bound, upper bound, median, scale) of one feature in transformed space."""
+        cached = self._stats.get(name)
+        if cached is None:
+            sketch = self.sketches[name]
+            med, mad = sketch.median_mad()
+            # A MAD within one bucket width of the median is sketch resolution, not spread
+            resolved = mad > 2 * sketch.relative_accuracy * abs(med)
+            scale = 1.4826 * mad if resolved else (sketch.std() or 1.0)
+            cached = (sketch.quantile(self.lower_q), sketch.quantile(self.upper_q), med, scale)
+            self._stats[name] = cached
+        return cached
+
+    def zscore(self, name: str, value: float) -> float:
+        """Robust z of one already-transformed value against the population."""
+        lo, hi, med, scale = self.stats(name)
+        return (min(max(value, lo), hi) - med) / scale
+
+    def transform(self, raw_reps: pd.DataFrame) -> Dict[str, pd.Series]:
+        """Population z-scores for every feature of raw per-rep measurements."""
+        out = {}
+        for name, transform in FEATURES.items():
+            lo, hi, med, scale = self.stats(name)
+            out[name] = (transform(raw_reps).clip(lower=lo, upper=hi) - med) / scale
+        return out
+
+    def to_dict(self) -> Dict:
+        return {
+            "normalizer_version": NORMALIZER_VERSION,
+            "relative_accuracy": self.relative_accuracy,
+            "lower_q": self.lower_q,
+            "upper_q": self.upper_q,
+            "reps": self.reps,
+            "sources": self.sources,
+            "sketches": {name: sketch.to_dict() for name, sketch in self.sketches.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PopulationNormalizer":
+        if data.get("normalizer_version") != NORMALIZER_VERSION:
+            raise ValueError(f"unsupported normalizer version {data.get('normalizer_version')}")
+        normalizer = cls(data["relative_accuracy"], data["lower_q"], data["upper_q"])
+        normalizer.sources = data.get("sources", {})
+        for name, sketch in data["sketches"].items():
+            if name in normalizer.sketches:
+                normalizer.sketches[name] = QuantileSketch.from_dict(sketch)
+        return normalizer
+
+    def save(self, path: str) -> None:
+        # Write-then-rename so a crash never leaves a half-written file
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "PopulationNormalizer":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def _sketch_timelines(csv_paths: List[str], relative_accuracy: float,
+                      torso_threshold_deg: float) -> PopulationNormalizer:
+    """Worker: one partial population over a chunk of timelines (merged by the parent)."""
+    partial = PopulationNormalizer(relative_accuracy)
+    for csv_path in csv_paths:
+        try:
+            partial.update(detect_reps(_read_csv_fast(csv_path), torso_threshold_deg=torso_threshold_deg))
+        except Exception as e:
+            print(f"Skipped {csv_path}: {e}")
+            continue
+        partial.sources[csv_path] = _file_signature(csv_path)
+    return partial
+
+
+def update_population(input_dir: str,
+                      population_path: str,
+                      workers: Optional[int] = None,
+                      rebuild: bool = False,
+                      torso_threshold_deg: float = 30.0) -> PopulationNormalizer:
+    """
+    Add every timeline CSV under input_dir not yet in the population file.
+
+    Timelines already recorded with the same size/mtime are skipped, so the
+    population grows incrementally as new sessions land. A timeline that
+    changed since it was added cannot be subtracted from the sketches; use
+    rebuild=True to start over.
+    """
+    if os.path.exists(population_path) and not rebuild:
+        population = PopulationNormalizer.load(population_path)
+    else:
+        population = PopulationNormalizer()
+
+    todo = [csv_path for csv_path, _, _ in collect_timelines(input_dir)
+            if population.sources.get(csv_path) != _file_signature(csv_path)]
+    changed = [csv_path for csv_path in todo if csv_path in population.sources]
+    if changed:
+        print(f"⚠️ {len(changed)} timelines changed since they were added (counted again; use --rebuild)")
+    print(f"{len(todo)} new timelines, {population.reps} reps in population")
+    if not todo:
+        return population
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(todo)))
+    chunks = [todo[i::workers] for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(_sketch_timelines, chunks, [population.relative_accuracy] * workers,
+                                [torso_threshold_deg] * workers):
+            population.merge(partial)
+
+    population.save(population_path)
+    return population
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Build or update a reference rep population from timelines")
+    parser.add_argument("input_dir", help="Folder of frame-level CSVs (searched recursively)")
+    parser.add_argument("population", help="Population JSON file (created or updated)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the existing population file")
+    parser.add_argument("--torso-threshold", type=float, default=30.0, help="Torso violation threshold (deg)")
+    args = parser.parse_args(argv)
+
+    population = update_population(args.input_dir, args.population, workers=args.workers,
+                                   rebuild=args.rebuild, torso_threshold_deg=args.torso_threshold)
+    print(f"Population saved: {args.population} ({population.reps} reps, {len(population.sources)} timelines)")
+    for name in FEATURES:
+        lo, hi, med, scale = population.stats(name)
+        print(f"  {name:<30} median={med:8.3f} scale={scale:7.3f} bounds=[{lo:.3f}, {hi:.3f}]")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,187 @@
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+
+class CompiledForest:
+    """
+    Flat NumPy representation of a fitted sklearn RandomForestClassifier.
+
+    All trees are concatenated into contiguous node arrays (children,
+    feature, threshold, leaf probabilities) and evaluated with a vectorized
+    traversal over (samples x trees). Leaves point to themselves so the
+    traversal is a fixed number of gather steps (the deepest tree's depth).
+
+    Probabilities match `RandomForestClassifier.predict_proba` exactly:
+    inputs are cast to float32 like sklearn's tree code, thresholds are
+    compared in float64 with `<=`, NaNs follow `missing_go_to_left`, and
+    per-tree probabilities are accumulated in estimator order before the
+    final division by the number of trees.
+    """
+    ARRAYS = ('roots', 'left', 'right', 'feature', 'threshold', 'missing_left', 'value')
+
+    def __init__(self, roots, left, right, feature, threshold, missing_left, value,
+                 classes, n_features, feature_names=None, max_depth=None):
+        self.roots = roots
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.missing_left = missing_left
+        self.value = value
+        self.classes_ = np.asarray(classes)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.n_estimators = len(roots)
+        self.n_features = int(n_features)
+        self.max_depth = int(max_depth) if max_depth is not None else self._compute_depth()
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        """Flatten a fitted RandomForestClassifier (single output)."""
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests are supported")
+        n_classes = len(model.classes_)
+
+        roots, lefts, rights, features, thresholds, missing, values = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for est in model.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            node_ids = np.arange(offset, offset + n, dtype=np.int32)
+            left = tree.children_left.astype(np.int32)
+            right = tree.children_right.astype(np.int32)
+            is_leaf = left == -1
+            # Leaves loop onto themselves; internal nodes get global ids
+            left = np.where(is_leaf, node_ids, left + offset).astype(np.int32)
+            right = np.where(is_leaf, node_ids, right + offset).astype(np.int32)
+            feature = np.where(is_leaf, 0, tree.feature).astype(np.int32)
+
+            mgl = getattr(tree, 'missing_go_to_left', None)
+            mgl = np.zeros(n, dtype=bool) if mgl is None else np.asarray(mgl).astype(bool)
+
+            roots.append(offset)
+            lefts.append(left)
+            rights.append(right)
+            features.append(feature)
+            thresholds.append(tree.threshold.astype(np.float64))
+            missing.append(mgl)
+            values.append(np.asarray(tree.value[:, 0, :n_classes], dtype=np.float64))
+            max_depth = max(max_depth, int(tree.max_depth))
+            offset += n
+
+        return cls(
+            roots=np.asarray(roots, dtype=np.int32),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            missing_left=np.concatenate(missing),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            classes=model.classes_,
+            n_features=model.n_features_in_,
+            feature_names=getattr(model, 'feature_names_in_', None),
+            max_depth=max_depth,
+        )
+
+    def _compute_depth(self) -> int:
+        depth = 0
+        nodes = self.roots.copy()
+        while True:
+            nxt = np.concatenate([self.left[nodes], self.right[nodes]])
+            nxt = nxt[np.concatenate([self.left[nodes] != nodes, self.right[nodes] != nodes])]
+            if nxt.size == 0:
+                return depth
+            nodes = np.unique(nxt)
+            depth += 1
+
+    def apply(self, X) -> np.ndarray:
+        """Return the leaf node id reached in every tree, shape (n_samples, n_trees)."""
+        X = self._check_X(X)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_estimators)).copy()
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            go_left = x <= self.threshold[nodes]
+            nan = np.isnan(x)
+            if nan.any():
+                go_left = np.where(nan, self.missing_left[nodes], go_left)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_tree_proba(self, X) -> np.ndarray:
+        """Per-tree class probabilities, shape (n_samples, n_trees, n_classes)."""
+        return self.value[self.apply(X)]
+
+    def predict_proba(self, X) -> np.ndarray:
+        per_tree = self.predict_tree_proba(X)
+        # cumsum accumulates strictly in tree order, like sklearn's += loop
+        total = np.cumsum(per_tree, axis=1)[:, -1, :]
+        return total / self.n_estimators
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def _check_X(self, X) -> np.ndarray:
+        if isinstance(X, dict):
+            if self.feature_names is None:
+                raise ValueError("Model has no feature names; pass an ordered vector")
+            X = [X[name] for name in self.feature_names]
+        if hasattr(X, 'columns') and self.feature_names is not None:
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        return X.astype(np.float64)
+
+    # ---- persistence (memory-mappable) ----
+
+    def save(self, directory):
+        """Write node arrays as .npy files plus a small meta.json."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(directory / f"{name}.npy", getattr(self, name))
+        meta = {
+            'classes': self.classes_.tolist(),
+            'n_features': self.n_features,
+            'feature_names': self.feature_names,
+            'max_depth': self.max_depth,
+        }
+        with open(directory / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode: Optional[str] = 'r') -> "CompiledForest":
+        """Load arrays written by `save`; with mmap_mode='r' processes share the pages."""
+        directory = Path(directory)
+        with open(directory / 'meta.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in cls.ARRAYS}
+        return cls(classes=meta['classes'], n_features=meta['n_features'], feature_names=meta['feature_names'],
+                   max_depth=meta['max_depth'], **arrays)
+
+
+def compile_cached(model, cache_dir, key: str) -> CompiledForest:
+    """
+    Compile `model` once and keep the flattened arrays under cache_dir/key,
+    returning a memory-mapped instance. The directory is written under a
+    temp name and renamed so concurrent workers never see partial output.
+    """
+    target = Path(cache_dir) / key
+    if not (target / 'meta.json').exists():
+        tmp = Path(cache_dir) / f".{key}.{os.getpid()}.tmp"
+        CompiledForest.from_sklearn(model).save(tmp)
+        try:
+            os.replace(tmp, target)
+        except OSError:
+            # Another process finished first; use its copy
+            for name in os.listdir(tmp):
+                os.remove(tmp / name)
+            os.rmdir(tmp)
+    return CompiledForest.load(target)
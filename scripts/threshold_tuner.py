@@ -0,0 +1,365 @@
+"""
+Tune rep counter thresholds for counting accuracy, per perspective bucket.
+
+angle_threshold_finder.py / perspective_threshold_fitter.py derive
+thresholds from angle extremes; this tuner searches them. Every labeled
+video's stored timeline (raw elbow angles, elbow alignment angles,
+visibility, frame times -- see timeline_replay.counter_inputs) is run
+through an offline copy of the BicepsCurlCounter state machine that
+advances ALL grid points at once: per frame, each parameter set is one
+element of a numpy vector, so a 5000-point grid costs about as much as a
+handful of replays. Videos are spread over worker processes.
+
+Labels CSV (one row per video):
+    video,reps[,correct_reps][,width_to_height_med]
+where reps is the expected counter total (left + right arm reps) and video
+matches a timeline by stem ('true_5.mp4', 'output_true_5.csv' and
+'true_5__timeline.csv' all match 'true_5'). width_to_height_med may also
+come from a perspective_features_extractor.py CSV (--features).
+
+For each perspective bucket (quantile split of width_to_height_med, as in
+perspective_threshold_fitter.py) the parameter set with the highest
+exact-count accuracy wins; ties go to the lowest mean absolute count
+error (plus correct-rep error when correct_reps is labeled). The torso
+threshold only affects correct/incorrect, so it is searched only when
+correct_reps labels exist. The output has the thresholds_perspective.json
+layout, so the analyzer can load it directly (PERSPECTIVE_THRESHOLDS_PATH).
+
+Usage:
+  python threshold_tuner.py <timelines_dir> <labels_csv> [--features CSV] [--buckets 2]
+                            [--workers N] [--out models/thresholds_perspective.json]
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from biceps_curl_counter import BicepsCurlCounter
+from timeline_replay import counter_inputs, load_timeline
+
+
+# Default search grid
+GRID = {
+    'angle_threshold_up': np.arange(30.0, 85.0, 5.0),
+    'angle_threshold_down': np.arange(130.0, 180.0, 5.0),
+    'min_hold_time': np.array([0.0, 0.1, 0.2, 0.3, 0.4]),
+    'torso_angle_threshold': np.arange(15.0, 65.0, 5.0),
+}
+
+# Counter states as integers
+UNKNOWN, DOWN, TRANSITION, UP = 0, 1, 2, 3
+NO_PENDING = -1
+
+
+def video_key(name):
+    """Match key for labels and timelines: file stem without output_/__timeline decorations."""
+    stem = os.path.splitext(os.path.basename(str(name)))[0]
+    stem = re.sub(r'__timeline$', '', stem)
+    return re.sub(r'^output_', '', stem)
+
+
+def make_grid(grid=None, tune_torso=True):
+    """
+    Cartesian product of the grid values, skipping up >= down.
+
+    Returns:
+        dict: {param: (P,) array}
+    """
+    grid = dict(GRID, **(grid or {}))
+    if not tune_torso:
+        grid['torso_angle_threshold'] = np.array([float(BicepsCurlCounter().torso_angle_threshold)])
+    names = list(grid)
+    points = [p for p in itertools.product(*(grid[n] for n in names))
+              if p[names.index('angle_threshold_up')] < p[names.index('angle_threshold_down')]]
+    columns = np.asarray(points, dtype=float).reshape(-1, len(names))
+    return {name: columns[:, i] for i, name in enumerate(names)}
+
+
+class _ArmMachine:
+    """One arm of BicepsCurlCounter (counting and rep validity) for P parameter sets at once."""
+
+    def __init__(self, size):
+        self.state = np.full(size, UNKNOWN, dtype=np.int8)
+        self.pending = np.full(size, NO_PENDING, dtype=np.int8)
+        self.since = np.zeros(size)
+        self.started = np.zeros(size, dtype=bool)
+        self.reached_up = np.zeros(size, dtype=bool)
+        self.descending = np.zeros(size, dtype=bool)
+        self.visited_down = np.zeros(size, dtype=bool)
+        self.visited_transition = np.zeros(size, dtype=bool)
+        self.visited_up = np.zeros(size, dtype=bool)
+        self.violation = np.zeros(size, dtype=bool)
+        # 3-frame torso window (oldest first) and its fill level
+        self.window = np.zeros((3, size))
+        self.window_len = np.zeros(size, dtype=np.int8)
+        self.reps = np.zeros(size, dtype=np.int32)
+        self.correct = np.zeros(size, dtype=np.int32)
+
+    def torso(self, torso_angle, torso_threshold):
+        """update(): sliding-window torso check while the rep is active (state != DOWN)."""
+        active = self.state != DOWN
+        self.window[:, active] = np.roll(self.window[:, active], -1, axis=0)
+        self.window[2, active] = torso_angle
+        self.window_len[active] = np.minimum(self.window_len[active] + 1, 3)
+        full = active & (self.window_len == 3)
+        mean = (self.window[0] + self.window[1] + self.window[2]) / 3
+        self.violation |= full & (mean > torso_threshold)
+
+    def step(self, angle, t, up, down, hold):
+        """_update_arm_state(): propose, dwell, commit, count."""
+        proposed = np.where(angle > down, DOWN, np.where(angle < up, UP, TRANSITION)).astype(np.int8)
+        same = proposed == self.state
+        waiting = ~same & (self.pending == proposed)
+        commit = waiting & ((t - self.since) >= hold)
+        restart = ~same & ~waiting
+        self.pending[same] = NO_PENDING
+        self.pending[restart] = proposed[restart]
+        self.since[restart] = t
+        if not commit.any():
+            return
+
+        old, new = self.state, proposed
+        self.visited_down |= commit & (new == DOWN)
+        self.visited_transition |= commit & (new == TRANSITION)
+        self.visited_up |= commit & (new == UP)
+
+        start = commit & (old == DOWN) & (new != DOWN)
+        self.started |= start
+        self.reached_up &= ~start
+        self.descending &= ~start
+        self.reached_up |= commit & (new == UP) & self.started
+        self.descending |= commit & (old == UP) & (new == TRANSITION) & self.reached_up
+        # New rep cycle: clear its transition/up visits and the torso window
+        self.visited_transition &= ~start
+        self.visited_up &= ~start
+        self.violation &= ~start
+        self.window_len[start] = 0
+
+        complete = commit & ((old == UP) | (old == TRANSITION)) & (new == DOWN)
+        counted = complete & self.started & self.reached_up & self.descending
+        valid = self.visited_down & self.visited_transition & self.visited_up & ~self.violation
+        self.reps += counted
+        self.correct += counted & valid
+        self.started &= ~complete
+        self.reached_up &= ~complete
+        self.descending &= ~complete
+        self.window_len[complete] = 0
+
+        self.state = np.where(commit, new, self.state).astype(np.int8)
+        self.pending[commit] = NO_PENDING
+
+
+def simulate_counts(inputs, grid):
+    """
+    Rep counts a BicepsCurlCounter would produce for every grid point.
+
+    Args:
+        inputs: timeline_replay.counter_inputs(...) of one timeline
+        grid: make_grid() output
+
+    Returns:
+        (reps, correct_reps): (P,) int arrays, left + right arm totals
+    """
+    size = len(grid['angle_threshold_up'])
+    up, down = grid['angle_threshold_up'], grid['angle_threshold_down']
+    hold, torso_threshold = grid['min_hold_time'], grid['torso_angle_threshold']
+    arms = {arm: _ArmMachine(size) for arm in ('left', 'right')}
+    angles, visible, torso = inputs['angles'], inputs['visible'], inputs['torso']
+    times, updates = inputs['times'], inputs['updates']
+
+    for i in np.flatnonzero(updates):
+        for arm, machine in arms.items():
+            machine.torso(torso[arm][i], torso_threshold)
+        for arm, machine in arms.items():
+            if visible[arm][i] and not np.isnan(angles[arm][i]):
+                machine.step(angles[arm][i], times[i], up, down, hold)
+
+    reps = arms['left'].reps + arms['right'].reps
+    correct = arms['left'].correct + arms['right'].correct
+    return reps, correct
+
+
+def _simulate_file(csv_path, grid):
+    """Worker: (reps, correct_reps) over the grid for one timeline."""
+    return simulate_counts(counter_inputs(load_timeline(csv_path)), grid)
+
+
+def collect_labeled_timelines(timelines_dir, labels_csv, features_csv=None):
+    """
+    Join labels with timeline CSVs (and perspective features) by video_key.
+
+    Returns:
+        DataFrame: key, csv_path, reps, correct_reps (NaN if unlabeled), width_to_height_med
+    """
+    labels = pd.read_csv(labels_csv, encoding='utf-8-sig')
+    if 'video' not in labels.columns or 'reps' not in labels.columns:
+        raise ValueError("labels CSV needs 'video' and 'reps' columns")
+    labels['key'] = labels['video'].map(video_key)
+    if 'correct_reps' not in labels.columns:
+        labels['correct_reps'] = np.nan
+    if features_csv:
+        features = pd.read_csv(features_csv, encoding='utf-8-sig')
+        features['key'] = features['video'].map(video_key)
+        labels = labels.drop(columns=['width_to_height_med'], errors='ignore').merge(
+            features[['key', 'width_to_height_med']], on='key', how='left')
+    if 'width_to_height_med' not in labels.columns:
+        labels['width_to_height_med'] = np.nan
+
+    timelines = {}
+    for dirpath, _, filenames in os.walk(timelines_dir):
+        for name in sorted(filenames):
+            if name.lower().endswith('.csv'):
+                timelines.setdefault(video_key(name), os.path.join(dirpath, name))
+    labels['csv_path'] = labels['key'].map(timelines)
+    missing = labels['csv_path'].isna()
+    if missing.any():
+        print(f"⚠️ No timeline for {int(missing.sum())} labeled videos: {', '.join(labels.loc[missing, 'key'][:5])}")
+    return labels[~missing].reset_index(drop=True)
+
+
+def _best(grid, reps, correct, labels):
+    """Index of the best grid point for these videos and its scores."""
+    expected = labels['reps'].to_numpy(dtype=float)[:, None]
+    accuracy = (reps == expected).mean(axis=0)
+    error = np.abs(reps - expected).mean(axis=0)
+    expected_correct = labels['correct_reps'].to_numpy(dtype=float)[:, None]
+    has_correct = ~np.isnan(expected_correct[:, 0])
+    if has_correct.any():
+        error = error + np.abs(correct[has_correct] - expected_correct[has_correct]).mean(axis=0)
+    # Highest accuracy, then lowest error, then the earliest (smallest) grid point
+    best = int(np.lexsort((error, -accuracy))[0])
+    result = {name: float(values[best]) for name, values in grid.items()}
+    result.update({'count_accuracy': float(accuracy[best]), 'mae': float(error[best]), 'videos': int(len(labels))})
+    return result
+
+
+def _bucket_entry(name, best, lo, hi):
+    return {
+        'name': name,
+        'arm_up': best['angle_threshold_up'],
+        'arm_down': best['angle_threshold_down'],
+        'torso': best['torso_angle_threshold'],
+        'min_hold_time': best['min_hold_time'],
+        'count': best['videos'],
+        'range': [float(lo), float(hi)],
+        'count_accuracy': best['count_accuracy'],
+        'mae': best['mae'],
+    }
+
+
+def tune(labeled, grid, k_buckets=2, workers=None):
+    """
+    Simulate every labeled timeline over the grid (in parallel) and pick
+    the best parameters globally and per width_to_height_med bucket.
+
+    Timelines that cannot be read or simulated are reported and left out.
+
+    Returns:
+        dict: thresholds model in the perspective_threshold_fitter.py layout
+
+    Raises:
+        ValueError: if no timeline could be simulated
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(labeled)))
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_simulate_file, csv_path, grid): i for i, csv_path in enumerate(labeled['csv_path'])}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                print(f"⚠️ Skipping {os.path.basename(labeled['csv_path'].iloc[i])}: {e}")
+    if not results:
+        raise ValueError("No labeled timeline could be simulated")
+    failed = len(labeled) - len(results)
+    kept = sorted(results)
+    labeled = labeled.iloc[kept].reset_index(drop=True)
+    reps = np.stack([results[i][0] for i in kept])
+    correct = np.stack([results[i][1] for i in kept])
+
+    overall = _best(grid, reps, correct, labeled)
+    model = {
+        'feature': 'width_to_height_med',
+        'buckets': [],
+        'global': {
+            'arm_up': overall['angle_threshold_up'],
+            'arm_down': overall['angle_threshold_down'],
+            'torso': overall['torso_angle_threshold'],
+            'min_hold_time': overall['min_hold_time'],
+            'count_accuracy': overall['count_accuracy'],
+            'mae': overall['mae'],
+        },
+        'tuner': {'grid_points': int(len(grid['angle_threshold_up'])), 'videos': int(len(labeled)),
+                  'failed': int(failed)},
+    }
+
+    x = pd.to_numeric(labeled['width_to_height_med'], errors='coerce').to_numpy(dtype=float)
+    if np.isnan(x).all():
+        print("⚠️ No width_to_height_med for the labeled videos: global thresholds only")
+        return model
+
+    valid = ~np.isnan(x)
+    edges = np.quantile(x[valid], np.linspace(0, 1, k_buckets + 1))
+    for i in range(1, len(edges)):
+        if edges[i] <= edges[i - 1]:
+            edges[i] = edges[i - 1] + 1e-6
+    class_names = ["sideway", "frontal"] if k_buckets == 2 else [f"bucket_{i}" for i in range(k_buckets)]
+    for b in range(k_buckets):
+        lo, hi = edges[b], edges[b + 1]
+        sel = valid & (x >= lo) & ((x < hi) if b < k_buckets - 1 else (x <= hi))
+        if not sel.any():
+            best = dict(overall, videos=0)
+        else:
+            best = _best(grid, reps[sel], correct[sel], labeled[sel])
+        model['buckets'].append(_bucket_entry(class_names[b], best, lo, hi))
+    if k_buckets == 2:
+        model['split_threshold'] = float(edges[1])
+        model['class_names'] = class_names
+    return model
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Tune counter thresholds for rep-count accuracy per perspective bucket')
+    parser.add_argument('timelines_dir', help='Folder of timeline CSVs (searched recursively)')
+    parser.add_argument('labels_csv', help='CSV with video,reps[,correct_reps][,width_to_height_med]')
+    parser.add_argument('--features', default=None, help='perspective_features_extractor.py CSV (width_to_height_med)')
+    parser.add_argument('--buckets', type=int, default=2, help='Perspective buckets')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--out', default=os.path.join('models', 'thresholds_perspective.json'), help='Output JSON')
+    args = parser.parse_args(argv)
+
+    labeled = collect_labeled_timelines(args.timelines_dir, args.labels_csv, args.features)
+    if labeled.empty:
+        print("No labeled timelines found.")
+        sys.exit(1)
+    grid = make_grid(tune_torso=labeled['correct_reps'].notna().any())
+    print(f"Tuning {len(grid['angle_threshold_up'])} parameter sets on {len(labeled)} timelines")
+
+    started = time.perf_counter()
+    try:
+        model = tune(labeled, grid, k_buckets=args.buckets, workers=args.workers)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(model, f, indent=2)
+    for bucket in model['buckets'] + [dict(model['global'], name='global')]:
+        print(f"  {bucket['name']:<8} up={bucket['arm_up']:.0f} down={bucket['arm_down']:.0f} "
+              f"torso={bucket['torso']:.0f} hold={bucket['min_hold_time']:.1f} "
+              f"accuracy={bucket['count_accuracy']:.1%} mae={bucket['mae']:.2f}")
+    print(f"Saved tuned thresholds: {args.out}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
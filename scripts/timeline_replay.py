@@ -0,0 +1,205 @@
+"""
+Re-run the rep counter over a stored timeline CSV with different thresholds.
+
+A timeline (BicepsCurlVideoAnalyzer CSV) keeps every input the counter saw
+on each frame: raw elbow angles, elbow alignment angles (the counter's
+"torso" input), alignment flags, arm visibility and the frame time. Feeding
+them back through a BicepsCurlCounter driven by the frame timestamps gives
+the counts, rep records and ML form score a different configuration would
+have produced, in milliseconds and without the video.
+
+Replay notes:
+  - angles (0.01 deg) and times (1 ms) come back at CSV precision, so rep
+    records can differ from the original run in the last digit
+  - rows with pose_source 'none' / 'skipped' are frames where the analyzer
+    did not update the counter; they only carry the smoothed angles forward
+  - timelines written before the *_arm_visible columns treat an arm as
+    visible whenever its raw angle is present
+  - perspective thresholds (results['perspective']) are applied from the
+    first frame, where the analyzer switched to them after its sampling window
+  - timelines are written in the platform encoding (e.g. cp1254 on Turkish
+    Windows); load_timeline sniffs it like rep_aggregator
+
+Usage:
+  python timeline_replay.py <timeline.csv> [--up 50] [--down 160] [--torso 45] [--hold 0.2] [--fps 30]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from biceps_curl_counter import BicepsCurlCounter
+from biceps_curl_video_analyzer import ml_form_score
+from rep_aggregator import _read_csv_fast
+
+
+# Counter parameters a replay may override
+REPLAY_PARAMS = ('angle_threshold_up', 'angle_threshold_down', 'torso_angle_threshold', 'min_hold_time')
+
+# Timeline rows where the analyzer did not call BicepsCurlCounter.update
+NO_UPDATE_SOURCES = ('none', 'skipped')
+
+
+def load_timeline(csv_path):
+    """Timeline CSV in whatever encoding the analyzer's platform wrote it."""
+    return _read_csv_fast(csv_path)
+
+
+def _column(df, name, default=np.nan):
+    if name in df.columns:
+        return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float)
+    return np.full(len(df), default, dtype=float)
+
+
+def resolve_params(params=None):
+    """
+    Counter parameters with overrides applied over the BicepsCurlCounter defaults.
+
+    Raises:
+        ValueError: unknown parameter, or UP threshold not below DOWN threshold
+    """
+    params = dict(params or {})
+    unknown = set(params) - set(REPLAY_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown counter parameters: {', '.join(sorted(unknown))}")
+    defaults = BicepsCurlCounter()
+    resolved = {name: float(params.get(name, getattr(defaults, name))) for name in REPLAY_PARAMS}
+    if resolved['angle_threshold_up'] >= resolved['angle_threshold_down']:
+        raise ValueError("angle_threshold_up must be below angle_threshold_down")
+    return resolved
+
+
+def _frame_times(df, fps=None):
+    """
+    Counter timestamps. time_s is rounded to ms in the CSV; when it matches
+    frame / fps the exact value is used so dwell comparisons come out as in
+    the original run.
+    """
+    time_s = _column(df, 'time_s', 0.0)
+    if fps and 'frame' in df.columns:
+        exact = _column(df, 'frame') / float(fps)
+        if np.all(np.abs(np.round(exact, 3) - time_s) < 1e-9):
+            return exact
+    return time_s
+
+
+def counter_inputs(df, fps=None):
+    """
+    Per-frame BicepsCurlCounter.update inputs stored in a timeline.
+
+    Returns:
+        dict: 'times', 'updates' (frames where update() was called) and, per
+        arm, {arm: array} dicts 'angles' (NaN = none), 'torso', 'aligned', 'visible'
+    """
+    angles = {arm: _column(df, f'{arm}_angle_raw_deg') for arm in ('left', 'right')}
+    torso = {arm: np.nan_to_num(_column(df, f'{arm}_elbow_alignment_angle_deg'), nan=0.0)
+             for arm in ('left', 'right')}
+    aligned = {arm: _column(df, f'{arm}_aligned', 1.0) != 0 for arm in ('left', 'right')}
+    visible = {}
+    for arm in ('left', 'right'):
+        if f'{arm}_arm_visible' in df.columns:
+            visible[arm] = _column(df, f'{arm}_arm_visible') == 1
+        else:
+            visible[arm] = ~np.isnan(angles[arm])
+    if 'pose_source' in df.columns:
+        updates = ~df['pose_source'].isin(NO_UPDATE_SOURCES).to_numpy()
+    else:
+        updates = ~(np.isnan(angles['left']) & np.isnan(angles['right']))
+    return {'times': _frame_times(df, fps), 'updates': updates, 'angles': angles,
+            'torso': torso, 'aligned': aligned, 'visible': visible}
+
+
+def replay_timeline(df, params=None, fps=None):
+    """
+    Replay a timeline through a fresh counter.
+
+    Args:
+        df: timeline DataFrame (load_timeline)
+        params: {name: value} overrides for REPLAY_PARAMS
+        fps: video fps of the original analysis (for exact frame times)
+
+    Returns:
+        dict: rep counts in the /api/analyze-video results schema, plus
+        'reps' (rep records), 'formScore'/'formLabel', 'params' and 'elapsedMs'
+    """
+    started = time.perf_counter()
+    counter = BicepsCurlCounter()
+    counter.debug_mode = False
+    for name, value in resolve_params(params).items():
+        setattr(counter, name, value)
+
+    inputs = counter_inputs(df, fps)
+    times, updates, angles = inputs['times'], inputs['updates'], inputs['angles']
+    torso, aligned, visible = inputs['torso'], inputs['aligned'], inputs['visible']
+
+    def angle_or_none(value):
+        return None if np.isnan(value) else float(value)
+
+    smoothed = {'left': [], 'right': []}
+    for i in range(len(df)):
+        if updates[i]:
+            counter.update(
+                angle_or_none(angles['left'][i]), angle_or_none(angles['right'][i]),
+                bool(aligned['left'][i]), bool(aligned['right'][i]),
+                float(torso['left'][i]), float(torso['right'][i]),
+                left_arm_visible=bool(visible['left'][i]),
+                right_arm_visible=bool(visible['right'][i]),
+                timestamp=float(times[i])
+            )
+        for arm in ('left', 'right'):
+            history = counter.left_angle_history if arm == 'left' else counter.right_angle_history
+            smoothed[arm].append(round(float(np.mean(history)), 2) if history else np.nan)
+
+    # ML score on the replayed smoothed angles (smoothing windows reset at each counted rep)
+    scored = df.copy()
+    scored['left_angle_smoothed_deg'] = smoothed['left']
+    scored['right_angle_smoothed_deg'] = smoothed['right']
+    try:
+        form_score, form_label = ml_form_score(scored)
+    except Exception as e:
+        print(f"⚠️ ML form prediction failed: {e}")
+        form_score, form_label = None, None
+
+    status = counter.get_status()
+    form_feedback = [f"Left: {reason}" for reason in status['left_last_rep_reasons']]
+    form_feedback += [f"Right: {reason}" for reason in status['right_last_rep_reasons']]
+    return {
+        'totalReps': status['total_reps'],
+        'correctReps': status['left_correct_reps'] + status['right_correct_reps'],
+        'incorrectReps': status['left_incorrect_reps'] + status['right_incorrect_reps'],
+        'leftReps': status['left_reps'],
+        'rightReps': status['right_reps'],
+        'leftCorrectReps': status['left_correct_reps'],
+        'rightCorrectReps': status['right_correct_reps'],
+        'leftIncorrectReps': status['left_incorrect_reps'],
+        'rightIncorrectReps': status['right_incorrect_reps'],
+        'formFeedback': form_feedback,
+        'formScore': round(form_score, 1) if form_score is not None else None,
+        'formLabel': form_label,
+        'reps': counter.rep_records,
+        'params': {name: getattr(counter, name) for name in REPLAY_PARAMS},
+        'frames': int(len(df)),
+        'elapsedMs': round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a timeline CSV through the rep counter')
+    parser.add_argument('timeline', help='Timeline CSV written by BicepsCurlVideoAnalyzer')
+    parser.add_argument('--up', type=float, dest='angle_threshold_up', help='Angle threshold for UP (deg)')
+    parser.add_argument('--down', type=float, dest='angle_threshold_down', help='Angle threshold for DOWN (deg)')
+    parser.add_argument('--torso', type=float, dest='torso_angle_threshold', help='Torso angle threshold (deg)')
+    parser.add_argument('--hold', type=float, dest='min_hold_time', help='Minimum hold time (s)')
+    parser.add_argument('--fps', type=float, default=None, help='Original video fps (exact frame times)')
+    args = parser.parse_args()
+
+    params = {name: getattr(args, name) for name in REPLAY_PARAMS if getattr(args, name) is not None}
+    results = replay_timeline(load_timeline(args.timeline), params, fps=args.fps)
+    results.pop('reps')
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
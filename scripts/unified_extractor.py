@@ -0,0 +1,388 @@
+"""
+Single-pass dataset extraction.
+
+angle_threshold_finder.py, perspective_features_extractor.py and
+frame_csv_extractor.py each need the same decoded, resized frames and the
+same MediaPipe landmarks. Here every video is decoded and run through pose
+once, and each frame is handed to a set of accumulators:
+
+  - AngleRangeAccumulator:  min/max arm and torso angles (threshold finding)
+  - PerspectiveAccumulator: shoulder width / torso height medians etc.
+  - TimelineAccumulator:    the per-frame timeline CSV rows
+
+Per video, <base>__timeline.csv and <base>__features.json (angle ranges +
+perspective features) are written to the output folder; a video whose
+outputs are newer than the video file is skipped. The folder summaries
+angle_thresholds_summary.csv and perspective_features.csv are rebuilt from
+all feature files at the end, in the formats the single-purpose scripts
+produce. Videos are processed in a process pool, one PoseDetector per worker.
+
+Usage:
+  python unified_extractor.py <folder_with_videos> [--out DIR] [--workers N] [--force]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from angle_threshold_finder import aggregate_thresholds, get_torso_angle_elbow_shoulder_hip
+from biceps_curl_counter import BicepsCurlCounter
+from biceps_curl_video_analyzer import resize_frame
+from frame_csv_extractor import check_arm_alignment, get_torso_angle
+from perspective_features_extractor import angle_to_vertical
+from pose_detection import PoseDetector
+from pose_pool import iter_pose_pool
+
+
+VIDEO_EXTS = {".mp4", ".mov", ".mkv", ".avi", ".m4v"}
+
+
+def list_videos(folder: str) -> List[str]:
+    files = []
+    for name in os.listdir(folder):
+        p = os.path.join(folder, name)
+        if os.path.isfile(p) and os.path.splitext(name.lower())[1] in VIDEO_EXTS:
+            files.append(p)
+    files.sort()
+    return files
+
+
+# ---- accumulators ----
+
+class AngleRangeAccumulator:
+    """Min/max of arm and torso (elbow-shoulder-hip) angles over pose frames."""
+    KEYS = ('left_arm', 'right_arm', 'left_torso', 'right_torso')
+
+    def __init__(self):
+        self.mins = {k: np.inf for k in self.KEYS}
+        self.maxs = {k: -np.inf for k in self.KEYS}
+
+    def update(self, pose, image_shape, frame_idx, t_sec):
+        if not pose.is_pose_detected():
+            return
+        angles = pose.get_body_angles(image_shape)
+        values = (angles.get('left_arm'), angles.get('right_arm'),
+                  get_torso_angle_elbow_shoulder_hip(pose, image_shape, 'left'),
+                  get_torso_angle_elbow_shoulder_hip(pose, image_shape, 'right'))
+        for key, val in zip(self.KEYS, values):
+            if val is None or not np.isfinite(val):
+                continue
+            self.mins[key] = min(self.mins[key], float(val))
+            self.maxs[key] = max(self.maxs[key], float(val))
+
+    def result(self) -> Dict[str, float]:
+        def fin(v):
+            return v if np.isfinite(v) else np.nan
+        return {**{f"min_{k}": fin(self.mins[k]) for k in self.KEYS},
+                **{f"max_{k}": fin(self.maxs[k]) for k in self.KEYS}}
+
+
+class PerspectiveAccumulator:
+    """
+    Perspective features (medians over every `stride`-th processed frame),
+    as computed by perspective_features_extractor.py.
+    """
+    def __init__(self, stride: int = 3):
+        self.stride = max(1, stride)
+        self._seen = 0
+        self.shoulder_widths = []
+        self.torso_heights = []
+        self.left_verticality = []
+        self.right_verticality = []
+        self.left_ratio = []
+        self.right_ratio = []
+
+    def update(self, pose, image_shape, frame_idx, t_sec):
+        self._seen += 1
+        if (self._seen - 1) % self.stride != 0 or not pose.is_pose_detected():
+            return
+        ls, rs, le, re, lw, rw, lh, rh = (pose.get_landmark_position(i, image_shape)
+                                          for i in (11, 12, 13, 14, 15, 16, 23, 24))
+        if ls is not None and rs is not None:
+            self.shoulder_widths.append(abs(rs[0] - ls[0]))
+        side_heights = []
+        if ls is not None and lh is not None:
+            side_heights.append(abs(lh[1] - ls[1]))
+        if rs is not None and rh is not None:
+            side_heights.append(abs(rh[1] - rs[1]))
+        if side_heights:
+            self.torso_heights.append(float(np.mean(side_heights)))
+
+        self.left_verticality.append(angle_to_vertical(ls, le))
+        self.right_verticality.append(angle_to_vertical(rs, re))
+
+        def seg_len(a, b):
+            if a is None or b is None:
+                return np.nan
+            return float(np.hypot(a[0] - b[0], a[1] - b[1]))
+
+        la, lf, ra, rf = seg_len(ls, le), seg_len(le, lw), seg_len(rs, re), seg_len(re, rw)
+        if np.isfinite(lf) and np.isfinite(la) and la > 0:
+            self.left_ratio.append(lf / la)
+        if np.isfinite(rf) and np.isfinite(ra) and ra > 0:
+            self.right_ratio.append(rf / ra)
+
+    def result(self) -> Dict[str, float]:
+        def med(x):
+            arr = np.array([v for v in x if np.isfinite(v)], dtype=float)
+            return float(np.median(arr)) if arr.size else np.nan
+
+        shoulder_w = med(self.shoulder_widths)
+        torso_h = med(self.torso_heights)
+        width_to_height = float(shoulder_w / torso_h) if np.isfinite(shoulder_w) and np.isfinite(torso_h) and torso_h > 0 else np.nan
+        return {
+            "shoulder_width_px_med": shoulder_w,
+            "torso_height_px_med": torso_h,
+            "width_to_height_med": width_to_height,
+            "left_arm_verticality_deg_med": med(self.left_verticality),
+            "right_arm_verticality_deg_med": med(self.right_verticality),
+            "left_forearm_upperarm_ratio_med": med(self.left_ratio),
+            "right_forearm_upperarm_ratio_med": med(self.right_ratio),
+        }
+
+
+class TimelineAccumulator:
+    """Per-frame timeline rows (frame_csv_extractor.py format) driven by a BicepsCurlCounter."""
+    def __init__(self):
+        self.counter = BicepsCurlCounter()
+        self.counter.debug_mode = False
+        self.rows: List[dict] = []
+
+    def update(self, pose, image_shape, frame_idx, t_sec):
+        left_arm_angle = right_arm_angle = None
+        left_torso_angle = right_torso_angle = None
+        left_alignment = right_alignment = True
+        left_shoulder_x = right_shoulder_x = None
+        left_torso_height = right_torso_height = None
+
+        if pose.is_pose_detected():
+            angles = pose.get_body_angles(image_shape)
+            left_arm_angle = angles.get('left_arm')
+            right_arm_angle = angles.get('right_arm')
+            left_torso_angle = get_torso_angle(pose, image_shape, 'left')
+            right_torso_angle = get_torso_angle(pose, image_shape, 'right')
+            left_alignment = check_arm_alignment(pose, image_shape, 'left')
+            right_alignment = check_arm_alignment(pose, image_shape, 'right')
+
+            # Shoulder positions and torso height for drift normalization
+            left_shoulder = pose.get_landmark_position(11, image_shape)
+            right_shoulder = pose.get_landmark_position(12, image_shape)
+            left_hip = pose.get_landmark_position(23, image_shape)
+            right_hip = pose.get_landmark_position(24, image_shape)
+            if left_shoulder is not None:
+                left_shoulder_x = left_shoulder[0]
+            if right_shoulder is not None:
+                right_shoulder_x = right_shoulder[0]
+            if left_shoulder is not None and left_hip is not None:
+                left_torso_height = abs(left_hip[1] - left_shoulder[1])
+            if right_shoulder is not None and right_hip is not None:
+                right_torso_height = abs(right_hip[1] - right_shoulder[1])
+
+            # Dwell in video time so the CSV does not depend on processing speed
+            self.counter.update(left_arm_angle, right_arm_angle, left_alignment, right_alignment,
+                                left_torso_angle, right_torso_angle, timestamp=t_sec)
+
+        status = self.counter.get_status()
+        self.rows.append({
+            "frame": frame_idx,
+            "time_s": round(t_sec, 3),
+            "left_cycle_index": status.get('left_cycle_index', 0),
+            "right_cycle_index": status.get('right_cycle_index', 0),
+            "left_state": status.get('left_state', 'unknown'),
+            "right_state": status.get('right_state', 'unknown'),
+            "left_angle_raw_deg": round(status.get('left_raw_angle'), 2) if status.get('left_raw_angle') is not None else "",
+            "right_angle_raw_deg": round(status.get('right_raw_angle'), 2) if status.get('right_raw_angle') is not None else "",
+            "left_angle_smoothed_deg": round(status.get('left_smoothed_angle'), 2) if status.get('left_smoothed_angle') is not None else "",
+            "right_angle_smoothed_deg": round(status.get('right_smoothed_angle'), 2) if status.get('right_smoothed_angle') is not None else "",
+            # Names aligned to rep_aggregator expectations
+            "left_torso_angle_deg": round(left_torso_angle, 2) if left_torso_angle is not None else "",
+            "right_torso_angle_deg": round(right_torso_angle, 2) if right_torso_angle is not None else "",
+            "left_shoulder_x": round(left_shoulder_x, 2) if left_shoulder_x is not None else "",
+            "right_shoulder_x": round(right_shoulder_x, 2) if right_shoulder_x is not None else "",
+            "left_torso_height": round(left_torso_height, 2) if left_torso_height is not None else "",
+            "right_torso_height": round(right_torso_height, 2) if right_torso_height is not None else "",
+            "left_aligned": int(bool(left_alignment)),
+            "right_aligned": int(bool(right_alignment)),
+            "left_reps": status.get('left_reps', 0),
+            "right_reps": status.get('right_reps', 0),
+            "left_correct_reps": status.get('left_correct_reps', 0),
+            "right_correct_reps": status.get('right_correct_reps', 0),
+            "left_incorrect_reps": status.get('left_incorrect_reps', 0),
+            "right_incorrect_reps": status.get('right_incorrect_reps', 0),
+            "total_reps": status.get('total_reps', 0),
+            "left_last_rep_reasons": '; '.join(status.get('left_last_rep_reasons', [])),
+            "right_last_rep_reasons": '; '.join(status.get('right_last_rep_reasons', [])),
+        })
+
+    def write_csv(self, out_csv: str) -> str:
+        if not self.rows:
+            return out_csv
+        with open(out_csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(self.rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(self.rows)
+        return out_csv
+
+
+def run_accumulators(video_path: str, accumulators, pose: PoseDetector = None,
+                     frame_stride: int = 1, max_dim: int = 1280) -> int:
+    """
+    Decode the video once, run pose on every frame_stride-th frame and feed
+    each processed frame to every accumulator. A reused detector is reset
+    first, so no tracking state carries over from the previous video.
+
+    Returns:
+        number of processed frames
+    """
+    if pose is None:
+        pose = PoseDetector()
+    else:
+        pose.reset()
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    frame_idx = 0
+    processed = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame_idx += 1
+        if frame_stride > 1 and (frame_idx - 1) % frame_stride != 0:
+            continue
+        frame = resize_frame(frame, max_dim)
+        pose.detect_pose(frame, draw=False)
+        for acc in accumulators:
+            acc.update(pose, frame.shape, frame_idx, frame_idx / fps)
+        processed += 1
+    cap.release()
+    return processed
+
+
+# ---- per-video job ----
+
+def output_paths(video_path: str, out_dir: str):
+    base = os.path.splitext(os.path.basename(video_path))[0]
+    return (os.path.join(out_dir, f"{base}__timeline.csv"),
+            os.path.join(out_dir, f"{base}__features.json"))
+
+
+def is_up_to_date(video_path: str, out_dir: str) -> bool:
+    video_mtime = os.path.getmtime(video_path)
+    return all(os.path.exists(p) and os.path.getmtime(p) >= video_mtime
+               for p in output_paths(video_path, out_dir))
+
+
+_worker_pose = None
+
+
+def _init_worker():
+    global _worker_pose
+    _worker_pose = PoseDetector()
+
+
+def extract_video(video_path: str, out_dir: str, pose: PoseDetector = None) -> Dict:
+    """Run all accumulators over one video and write its timeline CSV and features JSON."""
+    started = time.perf_counter()
+    angle_acc, perspective_acc, timeline_acc = AngleRangeAccumulator(), PerspectiveAccumulator(), TimelineAccumulator()
+    frames = run_accumulators(video_path, [angle_acc, perspective_acc, timeline_acc], pose=pose or _worker_pose)
+
+    timeline_csv, features_json = output_paths(video_path, out_dir)
+    timeline_acc.write_csv(timeline_csv)
+    features = {
+        "video": os.path.basename(video_path),
+        "frames": frames,
+        "angles": angle_acc.result(),
+        "perspective": perspective_acc.result(),
+    }
+    # Written last: its mtime marks the video as done
+    with open(features_json, "w", encoding="utf-8") as f:
+        json.dump(features, f, indent=2)
+    features["seconds"] = time.perf_counter() - started
+    return features
+
+
+def write_summaries(videos: List[str], out_dir: str):
+    """Rebuild angle_thresholds_summary.csv and perspective_features.csv from the per-video feature files."""
+    angle_rows, perspective_rows = [], []
+    for vp in videos:
+        _, features_json = output_paths(vp, out_dir)
+        if not os.path.exists(features_json):
+            continue
+        with open(features_json, "r", encoding="utf-8") as f:
+            features = json.load(f)
+        angle_rows.append({"video": features["video"], **features["angles"]})
+        perspective_rows.append({"video": features["video"], **features["perspective"]})
+    if not angle_rows:
+        return None, None
+
+    agg = aggregate_thresholds(angle_rows)
+    all_fields = set(angle_rows[0].keys()) | set(agg.keys())
+    field_order = ["video"] + sorted(all_fields - {"video"})
+    angle_csv = os.path.join(out_dir, "angle_thresholds_summary.csv")
+    with open(angle_csv, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=field_order)
+        writer.writeheader()
+        writer.writerows(angle_rows)
+        writer.writerow({"video": "__AGGREGATE__", **agg})
+
+    perspective_csv = os.path.join(out_dir, "perspective_features.csv")
+    with open(perspective_csv, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=list(perspective_rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(perspective_rows)
+    return angle_csv, perspective_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Single-pass timeline, angle-range and perspective extraction')
+    parser.add_argument('folder', help='Folder with videos')
+    parser.add_argument('--out', help='Output folder (default: the video folder)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+    parser.add_argument('--force', action='store_true', help='Re-extract videos whose outputs are up to date')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.folder):
+        print(f"Not a folder: {args.folder}")
+        sys.exit(1)
+    out_dir = os.path.abspath(args.out or args.folder)
+    os.makedirs(out_dir, exist_ok=True)
+
+    videos = list_videos(args.folder)
+    if not videos:
+        print("No videos found.")
+        sys.exit(0)
+    todo = [vp for vp in videos if args.force or not is_up_to_date(vp, out_dir)]
+    print(f"Found {len(videos)} video(s), {len(videos) - len(todo)} up to date, extracting {len(todo)}...")
+
+    started = time.perf_counter()
+    total_frames = 0
+    if todo:
+        results = iter_pose_pool(extract_video, [(vp, out_dir) for vp in todo], _init_worker, workers=args.workers)
+        for i, ((vp, _), features, error) in enumerate(results, 1):
+            if error is not None:
+                print(f"[{i}/{len(todo)}] ERROR {vp}: {error}")
+                continue
+            total_frames += features["frames"]
+            print(f"[{i}/{len(todo)}] {os.path.basename(vp)}: {features['frames']} frames "
+                  f"in {features['seconds']:.1f}s")
+
+    angle_csv, perspective_csv = write_summaries(videos, out_dir)
+    elapsed = time.perf_counter() - started
+    if total_frames:
+        print(f"\nExtracted {total_frames} frames in {elapsed:.1f}s ({total_frames / elapsed:.1f} frames/s)")
+    if angle_csv:
+        print(f"Angle thresholds summary: {angle_csv}")
+        print(f"Perspective features:     {perspective_csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 from flask import Flask, request, jsonify, send_from_directory, Response
 from flask_cors import CORS
+from flask_sock import Sock
+from simple_websocket import ConnectionClosed
 import os
 import sys
 import tempfile
@@ -7,6 +9,7 @@ import json
 import shutil
 import uuid
 import threading
+import csv
 from datetime import datetime
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
@@ -18,7 +21,12 @@ load_dotenv()
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
 sys.path.insert(0, os.path.dirname(__file__))  # Add server directory for meal_planner_module
 
+from biceps_curl_counter import REP_RECORD_FIELDS
 from biceps_curl_video_analyzer import BicepsCurlVideoAnalyzer
+from landmark_payload import LandmarkSequence
+from live_session import LiveCurlSession
+from preflight import run_preflight
+from timeline_replay import REPLAY_PARAMS, load_timeline, replay_timeline, resolve_params
 import meal_planner_module as mpm
 import workout_planner_module as wpm
 
@@ -27,21 +35,41 @@ app = Flask(__name__)
 # Configure CORS for mobile app
 allowed_origins = os.getenv('ALLOWED_ORIGINS', '*')
 CORS(app, resources={r"/api/*": {"origins": allowed_origins}})
+sock = Sock(app)
 
 # Configuration
 UPLOAD_FOLDER = tempfile.gettempdir()
 ALLOWED_EXTENSIONS = {'mp4', 'mov', 'avi', 'webm'}
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+# Pose inference rate for uploads (e.g. 15); unset = every frame
+POSE_TARGET_HZ = float(os.getenv('POSE_TARGET_HZ', '0')) or None
+# Skip pose on static / person-absent stretches of uploads (1 = on)
+MOTION_GATING = os.getenv('MOTION_GATING', '0') == '1'
+# Sample a few frames and reject unusable uploads before the full analysis (0 = off)
+PREFLIGHT_ENABLED = os.getenv('PREFLIGHT_ENABLED', '1') == '1'
 RESULTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'exerciseevaluation', 'results')
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
 
 # In-memory progress tracking store
-# Format: {job_id: {'current': 0, 'total': 0, 'status': 'processing'|'complete'|'error', 'error': str}}
+# Format: {job_id: {'current': 0, 'total': 0, 'status': 'processing'|'complete'|'error', 'error': str, 'events': [rep events]}}
 progress_store = {}
 progress_store_lock = threading.Lock()
 
+# Live WebSocket sessions. Each one holds a gunicorn thread for as long as it
+# is connected, so the cap leaves HTTP_RESERVED_THREADS free for health checks,
+# progress channels and uploads. GUNICORN_THREADS must match the Dockerfile CMD;
+# MAX_LIVE_SESSIONS can only lower the derived cap.
+GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', '16'))
+HTTP_RESERVED_THREADS = int(os.getenv('HTTP_RESERVED_THREADS', '4'))
+MAX_LIVE_SESSIONS = max(GUNICORN_THREADS - HTTP_RESERVED_THREADS, 0)
+if os.getenv('MAX_LIVE_SESSIONS'):
+    MAX_LIVE_SESSIONS = min(MAX_LIVE_SESSIONS, int(os.getenv('MAX_LIVE_SESSIONS')))
+LIVE_SESSION_IDLE_TIMEOUT = 30  # seconds without a packet before the session is closed
+live_sessions = {}
+live_sessions_lock = threading.Lock()
+
 # Ensure results directory exists
 os.makedirs(RESULTS_DIR, exist_ok=True)
 
@@ -91,6 +119,10 @@ def save_exercise_result(results, timeline_csv_path, annotated_video_path, origi
             dest_csv = os.path.join(result_dir, 'timeline.csv')
             shutil.copy2(timeline_csv_path, dest_csv)
         
+        # Per-rep summary table (one row per counted rep)
+        if results.get('reps') is not None:
+            write_reps_csv(results['reps'], os.path.join(result_dir, 'reps.csv'))
+        
         # Copy annotated video if it exists
         if annotated_video_path and os.path.exists(annotated_video_path):
             dest_video = os.path.join(result_dir, 'annotated_video.mp4')
@@ -105,6 +137,38 @@ def save_exercise_result(results, timeline_csv_path, annotated_video_path, origi
 
 
 
+def write_reps_csv(reps, csv_path):
+    """Write rep records (BicepsCurlCounter.rep_records) as a CSV table."""
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=REP_RECORD_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for rep in reps:
+            row = dict(rep)
+            row['reasons'] = '; '.join(row.get('reasons') or [])
+            writer.writerow(row)
+
+
+def read_reps_csv(csv_path):
+    """Read a reps.csv written by write_reps_csv back into rep records."""
+    reps = []
+    with open(csv_path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            rep = {}
+            for key, value in row.items():
+                if key == 'arm':
+                    rep[key] = value
+                elif key == 'reasons':
+                    rep[key] = value.split('; ') if value else []
+                elif key == 'correct':
+                    rep[key] = value == 'True'
+                elif key in ('rep', 'arm_rep', 'frames'):
+                    rep[key] = int(value)
+                else:
+                    rep[key] = float(value) if value != '' else None
+            reps.append(rep)
+    return reps
+
+
 @app.route('/', methods=['GET'])
 def root():
     """Root endpoint - API documentation"""
@@ -117,6 +181,8 @@ def root():
             'tutorials': '/api/tutorials (GET)',
             'tutorial_detail': '/api/tutorials/{id} (GET)',
             'analyze_video': '/api/analyze-video (POST)',
+            'analyze_landmarks': '/api/analyze-landmarks (POST - JSON or GBL1 binary)',
+            'live_session': '/api/live-session (WebSocket)',
             'progress': '/api/progress/{job_id} (GET - SSE)',
             'generate_meal_plan': '/api/generate-meal-plan (POST)',
             'list_results': '/api/exercise-results (GET)',
@@ -216,25 +282,29 @@ def get_progress(job_id):
     def generate():
         """Generator function for SSE stream"""
         last_current = -1
+        events_sent = 0
         
         while True:
             with progress_store_lock:
                 job_data = progress_store.get(job_id)
+                new_events = list(job_data.get('events', [])[events_sent:]) if job_data else []
             
             if not job_data:
                 # Job not found - send error and close
                 yield f"data: {{\"error\": \"Job not found\", \"job_id\": \"{job_id}\"}}\n\n"
                 break
             
-            # Only send update if progress changed
+            # Only send update if progress changed or new reps were detected
             current = job_data.get('current', 0)
-            if current != last_current or job_data.get('status') in ['complete', 'error']:
+            if current != last_current or new_events or job_data.get('status') in ['complete', 'error']:
                 progress_data = {
                     'job_id': job_id,
                     'current': job_data.get('current', 0),
                     'total': job_data.get('total', 0),
                     'status': job_data.get('status', 'processing'),
-                    'percentage': round((job_data.get('current', 0) / job_data.get('total', 1)) * 100, 1) if job_data.get('total', 0) > 0 else 0
+                    'percentage': round((job_data.get('current', 0) / job_data.get('total', 1)) * 100, 1) if job_data.get('total', 0) > 0 else 0,
+                    'events': new_events,  # Rep events detected since the previous message
+                    'eventCount': events_sent + len(new_events)
                 }
                 
                 if job_data.get('status') == 'error':
@@ -242,6 +312,7 @@ def get_progress(job_id):
                 
                 yield f"data: {json.dumps(progress_data)}\n\n"
                 last_current = current
+                events_sent += len(new_events)
             
             # Close stream if job is done
             if job_data.get('status') in ['complete', 'error']:
@@ -264,9 +335,15 @@ def get_progress_json(job_id):
     """
     Simple JSON endpoint for polling progress (no SSE streaming)
     Returns current progress state directly
+    
+    Query params:
+        since: number of rep events the client already has; only newer
+               events are returned (default 0 = all events so far)
     """
+    since = request.args.get('since', 0, type=int) or 0
     with progress_store_lock:
         job_data = progress_store.get(job_id)
+        events = list(job_data.get('events', [])) if job_data else []
     
     if not job_data:
         return jsonify({
@@ -279,7 +356,9 @@ def get_progress_json(job_id):
         'current': job_data.get('current', 0),
         'total': job_data.get('total', 0),
         'status': job_data.get('status', 'processing'),
-        'percentage': round((job_data.get('current', 0) / job_data.get('total', 1)) * 100, 1) if job_data.get('total', 0) > 0 else 0
+        'percentage': round((job_data.get('current', 0) / job_data.get('total', 1)) * 100, 1) if job_data.get('total', 0) > 0 else 0,
+        'events': events[max(since, 0):],
+        'eventCount': len(events)  # pass back as ?since= on the next poll
     }
     
     if job_data.get('status') == 'error':
@@ -320,6 +399,20 @@ def analyze_video():
         temp_video_path = os.path.join(app.config['UPLOAD_FOLDER'], f'upload_{os.getpid()}_{filename}')
         video_file.save(temp_video_path)
         
+        # Pre-flight: a few sampled frames decide whether the full pass is worth running
+        preflight = None
+        if PREFLIGHT_ENABLED:
+            preflight = run_preflight(temp_video_path, target_pose_hz=POSE_TARGET_HZ)
+            print(f"🛫 Pre-flight {preflight['verdict']} in {preflight['elapsedMs']:.0f} ms: "
+                  f"{[r['code'] for r in preflight['reasons']]}")
+            if preflight['verdict'] == 'reject':
+                os.remove(temp_video_path)
+                return jsonify({
+                    'error': 'Video failed pre-flight checks',
+                    'details': '; '.join(r['message'] for r in preflight['reasons']),
+                    'preflight': preflight
+                }), 422
+        
         # Generate unique job ID for progress tracking
         job_id = str(uuid.uuid4())
         
@@ -330,7 +423,8 @@ def analyze_video():
             progress_store[job_id] = {
                 'current': 0,
                 'total': 0,
-                'status': 'processing'
+                'status': 'processing',
+                'events': []
             }
         
         # Create output directory for annotated videos
@@ -345,6 +439,12 @@ def analyze_video():
                         progress_store[job_id]['current'] = current
                         progress_store[job_id]['total'] = total
             
+            # Rep callback so clients see each rep while the video is still processing
+            def publish_event(event):
+                with progress_store_lock:
+                    if job_id in progress_store:
+                        progress_store[job_id]['events'].append(event)
+            
             # Function to run analysis in background
             def run_analysis():
                 try:
@@ -353,7 +453,10 @@ def analyze_video():
                         video_path=temp_video_path,
                         visualize=True,
                         output_dir=output_dir,
-                        progress_callback=update_progress
+                        progress_callback=update_progress,
+                        event_callback=publish_event,
+                        target_pose_hz=POSE_TARGET_HZ,
+                        motion_gating=MOTION_GATING
                     )
                     
                     # Run analysis
@@ -438,7 +541,9 @@ def analyze_video():
             return jsonify({
                 'jobId': job_id,
                 'status': 'processing',
-                'message': 'Video analysis started. Connect to /api/progress/{jobId} for real-time updates.'
+                'message': 'Video analysis started. Connect to /api/progress/{jobId} for real-time updates.',
+                'warnings': preflight['reasons'] if preflight else [],
+                'estimate': preflight.get('estimate') if preflight else None
             }), 202  # 202 Accepted
             
         except Exception as e:
@@ -468,6 +573,138 @@ def analyze_video():
         }), 500
 
 
+@app.route('/api/analyze-landmarks', methods=['POST'])
+def analyze_landmarks():
+    """
+    Analyze a pose landmark sequence computed on the client
+    
+    Expects (request body, see scripts/landmark_payload.py):
+        - application/json: {width, height, fps?, frames: [{t, landmarks}]}
+        - application/octet-stream: GBL1 binary landmark payload
+    
+    Returns:
+        JSON with the same results schema as /api/analyze-video
+        (annotatedVideoUrl is always null - there is no video)
+    """
+    import time
+    started = time.perf_counter()
+    
+    data = request.get_data(cache=False)
+    if not data:
+        return jsonify({'error': 'No landmark data provided'}), 400
+    
+    try:
+        sequence = LandmarkSequence.from_request_body(data, request.content_type)
+    except ValueError as e:
+        return jsonify({'error': 'Invalid landmark payload', 'details': str(e)}), 400
+    
+    work_dir = tempfile.mkdtemp(prefix='landmarks_')
+    try:
+        analyzer = BicepsCurlVideoAnalyzer(
+            video_path='landmarks',
+            visualize=False,
+            output_dir=work_dir
+        )
+        analyzer.analyze_landmarks(sequence)
+        
+        results = analyzer.get_results_dict()
+        results['annotatedVideoUrl'] = None
+        
+        result_id = save_exercise_result(
+            results=results,
+            timeline_csv_path=analyzer._out_path_csv,
+            annotated_video_path=None,
+            original_filename=request.args.get('filename', 'landmarks')
+        )
+        if result_id:
+            results['savedResultId'] = result_id
+        
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"✅ Landmark analysis complete: {results['totalReps']} reps from {len(sequence)} frames in {elapsed_ms:.0f} ms")
+        return jsonify(results), 200
+    
+    except Exception as e:
+        print(f"❌ Error analyzing landmarks: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'error': 'Failed to analyze landmarks',
+            'details': str(e)
+        }), 500
+    
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+@sock.route('/api/live-session')
+def live_session(ws):
+    """
+    Live rep counting over a WebSocket (see scripts/live_session.py)
+    
+    Protocol:
+        1. client -> {"type": "start", "width": 720, "height": 1280, "fps": 30}
+           server -> {"type": "ready", "sessionId": ...}
+        2. client -> one packet per frame (JSON landmarks / base64 frame, or
+           532-byte binary landmark frame)
+           server -> rep / warning / ack messages as they happen
+        3. client -> {"type": "end"}
+           server -> {"type": "summary", "results": {...}} and closes
+    """
+    def send(payload):
+        ws.send(json.dumps(payload, default=float))
+    
+    session_id = str(uuid.uuid4())
+    with live_sessions_lock:
+        if len(live_sessions) >= MAX_LIVE_SESSIONS:
+            send({'type': 'error', 'error': 'Too many live sessions, try again later'})
+            return
+        live_sessions[session_id] = None
+    
+    try:
+        start = ws.receive(timeout=LIVE_SESSION_IDLE_TIMEOUT)
+        try:
+            start = json.loads(start) if start is not None else None
+            if not isinstance(start, dict) or start.get('type') != 'start':
+                raise ValueError("first message must be {'type': 'start', ...}")
+            session = LiveCurlSession(int(start['width']), int(start['height']), start.get('fps', 30.0))
+        except (KeyError, TypeError, ValueError) as e:
+            send({'type': 'error', 'error': 'Invalid start message', 'details': str(e)})
+            return
+        
+        with live_sessions_lock:
+            live_sessions[session_id] = session
+        send({'type': 'ready', 'sessionId': session_id})
+        print(f"📡 Live session started: {session_id}")
+        
+        while True:
+            data = ws.receive(timeout=LIVE_SESSION_IDLE_TIMEOUT)
+            if data is None:
+                send({'type': 'error', 'error': 'Session idle timeout'})
+                break
+            
+            try:
+                packet = data if isinstance(data, (bytes, bytearray)) else json.loads(data)
+                if isinstance(packet, dict) and packet.get('type') == 'end':
+                    send({'type': 'summary', 'results': session.summary()})
+                    break
+                messages = session.process_packet(packet)
+            except ValueError as e:
+                send({'type': 'error', 'error': 'Invalid packet', 'details': str(e)})
+                continue
+            
+            for message in messages:
+                send(message)
+    
+    except ConnectionClosed:
+        pass
+    
+    finally:
+        with live_sessions_lock:
+            session = live_sessions.pop(session_id, None)
+        if session is not None:
+            print(f"📡 Live session closed: {session_id} ({session.frames} frames, {session.analyzer.rep_counter.total_reps} reps)")
+
+
 @app.route('/static/videos/<path:filename>')
 def serve_video(filename):
     """Serve annotated video files"""
@@ -508,6 +745,7 @@ def list_exercise_results():
                     # Add preview info
                     metadata['hasAnnotatedVideo'] = os.path.exists(os.path.join(result_dir, 'annotated_video.mp4'))
                     metadata['hasTimeline'] = os.path.exists(os.path.join(result_dir, 'timeline.csv'))
+                    metadata['hasReps'] = os.path.exists(os.path.join(result_dir, 'reps.csv'))
                     
                     results_list.append(metadata)
                 except Exception as e:
@@ -557,6 +795,9 @@ def get_exercise_result(result_id):
         if os.path.exists(os.path.join(result_dir, 'timeline.csv')):
             metadata['timelineCsvUrl'] = f'/api/exercise-results/{result_id}/timeline'
         
+        if os.path.exists(os.path.join(result_dir, 'reps.csv')):
+            metadata['repsUrl'] = f'/api/exercise-results/{result_id}/reps'
+        
         return jsonify(metadata), 200
         
     except Exception as e:
@@ -617,6 +858,95 @@ def serve_result_timeline(result_id):
     return send_from_directory(result_dir, 'timeline.csv')
 
 
+@app.route('/api/exercise-results/<result_id>/reps')
+def serve_result_reps(result_id):
+    """
+    Serve the per-rep summary table for a specific result
+    
+    Query params:
+        format: 'json' (default) or 'csv' (the stored reps.csv)
+    
+    Returns:
+        JSON {id, reps: [rep records]} or the CSV file
+    """
+    result_dir = os.path.join(RESULTS_DIR, result_id)
+    csv_path = os.path.join(result_dir, 'reps.csv')
+    
+    if not os.path.exists(csv_path):
+        return jsonify({'error': 'Rep table not found'}), 404
+    
+    if request.args.get('format') == 'csv':
+        return send_from_directory(result_dir, 'reps.csv')
+    
+    try:
+        return jsonify({'id': result_id, 'reps': read_reps_csv(csv_path)}), 200
+    except Exception as e:
+        print(f"❌ Error reading rep table {result_id}: {e}")
+        return jsonify({'error': 'Failed to read rep table', 'details': str(e)}), 500
+
+
+@app.route('/api/exercise-results/<result_id>/rescore', methods=['POST'])
+def rescore_exercise_result(result_id):
+    """
+    Replay a saved result's timeline through the rep counter with other thresholds
+    
+    Expects (JSON body, all optional):
+        - angle_threshold_up, angle_threshold_down: elbow angle thresholds (deg)
+        - torso_angle_threshold (or torso_threshold): torso threshold (deg)
+        - min_hold_time: state dwell time (s)
+    
+    Parameters not given default to the result's perspective thresholds, then
+    the counter defaults. The saved result is not modified.
+    
+    Returns:
+        JSON with new rep counts, rep records, ML form score and the parameters used
+    """
+    result_dir = os.path.join(RESULTS_DIR, result_id)
+    csv_path = os.path.join(result_dir, 'timeline.csv')
+    if not os.path.exists(csv_path):
+        return jsonify({'error': 'Timeline not found'}), 404
+    
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({'error': 'Invalid rescore parameters', 'details': 'body must be a JSON object'}), 400
+    if 'torso_threshold' in body:
+        body.setdefault('torso_angle_threshold', body.pop('torso_threshold'))
+    
+    params = {}
+    fps = None
+    metadata_path = os.path.join(result_dir, 'metadata.json')
+    if os.path.exists(metadata_path):
+        with open(metadata_path, 'r') as f:
+            results = json.load(f).get('results', {})
+        fps = results.get('fps')
+        thresholds = (results.get('perspective') or {}).get('thresholds', {})
+        for key, name in (('arm_up', 'angle_threshold_up'), ('arm_down', 'angle_threshold_down'),
+                          ('torso', 'torso_angle_threshold'), ('min_hold_time', 'min_hold_time')):
+            if key in thresholds:
+                params[name] = thresholds[key]
+    
+    try:
+        for name, value in body.items():
+            if name not in REPLAY_PARAMS:
+                raise ValueError(f"unknown parameter '{name}' (expected one of {', '.join(REPLAY_PARAMS)})")
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                raise ValueError(f"'{name}' must be a non-negative number")
+            params[name] = value
+        params = resolve_params(params)
+    except ValueError as e:
+        return jsonify({'error': 'Invalid rescore parameters', 'details': str(e)}), 400
+    
+    try:
+        rescored = replay_timeline(load_timeline(csv_path), params, fps=fps)
+        rescored['id'] = result_id
+        print(f"🔁 Rescored {result_id}: {rescored['totalReps']} reps in {rescored['elapsedMs']:.0f} ms")
+        return jsonify(rescored), 200
+    
+    except Exception as e:
+        print(f"❌ Error rescoring exercise result {result_id}: {e}")
+        return jsonify({'error': 'Failed to rescore result', 'details': str(e)}), 500
+
+
 @app.route('/api/analyze-video-with-output', methods=['POST'])
 def analyze_video_with_output():
     """
@@ -861,6 +1191,8 @@ if __name__ == '__main__':
     print("\n🔍 Endpoints:")
     print("   GET  /api/health")
     print("   POST /api/analyze-video")
+    print("   POST /api/analyze-landmarks")
+    print("   WS   /api/live-session")
     print("   POST /api/generate-meal-plan")
     print("   POST /api/generate-workout-plan")
     print("\n")
@@ -7,6 +7,37 @@ def load_thresholds(json_path: str) -> Dict:
         return json.load(f)
 
 
+def validate_counter_thresholds(model: Dict) -> Dict:
+    """
+    Check that a thresholds model holds counter thresholds (threshold_tuner.py
+    output), not the angle statistics of perspective_threshold_fitter.py.
+
+    The fitter's arm_up / arm_down / torso are means of per-video angle
+    extremes (torso is the mean *minimum* elbow-shoulder-hip angle), which
+    would put the counter's UP/DOWN thresholds at the average extreme and its
+    torso limit below typical torso angles. Tuner output is searched against
+    the counter itself and is recognized by min_hold_time in every entry.
+
+    Raises:
+        ValueError: if the global entry or a bucket has no min_hold_time
+    """
+    entries = [("global", model.get("global") or {})]
+    entries += [(b.get("name", f"bucket {i}"), b) for i, b in enumerate(model.get("buckets", []))]
+    missing = [name for name, entry in entries if "min_hold_time" not in entry]
+    if missing:
+        raise ValueError(
+            f"no min_hold_time in {', '.join(missing)}: not threshold_tuner.py output "
+            "(perspective_threshold_fitter.py angle statistics are not counter thresholds)")
+    return model
+
+
+def _bucket_thresholds(bucket: Dict) -> Dict:
+    thresholds = {"arm_up": bucket["arm_up"], "arm_down": bucket["arm_down"], "torso": bucket["torso"]}
+    if "min_hold_time" in bucket:
+        thresholds["min_hold_time"] = bucket["min_hold_time"]
+    return thresholds
+
+
 def pick_thresholds_for_video(model: Dict, width_to_height_med: float) -> Dict:
     """
     Select bucket thresholds for a video given its width_to_height_med feature.
@@ -27,7 +58,7 @@ def pick_thresholds_for_video(model: Dict, width_to_height_med: float) -> Dict:
         else:
             chosen = next((b for b in buckets if b.get("name") == "frontal"), None)
         if chosen is not None:
-            return {"arm_up": chosen["arm_up"], "arm_down": chosen["arm_down"], "torso": chosen["torso"]}
+            return _bucket_thresholds(chosen)
 
     # Generic N-bucket selection
     buckets = model["buckets"]
@@ -36,7 +67,7 @@ def pick_thresholds_for_video(model: Dict, width_to_height_med: float) -> Dict:
         if lo is None or hi is None:
             continue
         if width_to_height_med >= lo and width_to_height_med <= hi:
-            return {"arm_up": b["arm_up"], "arm_down": b["arm_down"], "torso": b["torso"]}
+            return _bucket_thresholds(b)
 
     # Otherwise nearest center
     best = None
@@ -51,7 +82,7 @@ def pick_thresholds_for_video(model: Dict, width_to_height_med: float) -> Dict:
             best_dist = d
             best = b
     if best is not None:
-        return {"arm_up": best["arm_up"], "arm_down": best["arm_down"], "torso": best["torso"]}
+        return _bucket_thresholds(best)
 
     # Fallback
     return model.get("global", {})